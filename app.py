@@ -3,17 +3,26 @@ Healthcare Hackathon App - Production Ready
 Features: Voice input, Disease prediction, Risk classification, City monitoring, WhatsApp escalation
 """
 
+import startup_profile
+
 import streamlit as st
-import qrcode
-from io import BytesIO
-import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import json
-import urllib.parse
+import os
+import tempfile
+import uuid
 
-from data import get_city_trends, get_all_cities, get_city_summary
-from prediction import predict_disease, classify_risk
+# Plotly, qrcode/PIL and the prediction table are imported where they are used,
+# so a cold start only pays for what the first render needs
+from data import (
+    get_all_cities, get_city_series, get_city_summary, get_city_version, ingest_case_feed, refresh_case_store,
+)
+import metrics
+from escalation import QR_CACHE, build_whatsapp_url, export_escalations
+from model_files import DEFAULT_MODEL_DIR, ModelWatcher
+from prediction import analyze_patient, extract_symptoms, get_active_model, predict_differential
+from registry import PatientRegistry
+from storage import DEFAULT_DB_PATH, PatientStore, page_cursor
 
 # Page Configuration
 st.set_page_config(
@@ -23,13 +32,71 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Symptoms offered in the patient form, keyed by canonical name for voice matching
+COMMON_SYMPTOMS = [
+    "Fever", "Headache", "Cough", "Joint Pain", "Rash", "Bleeding",
+    "Nausea", "Stomach Pain", "Diarrhea", "Weakness", "Loss of Appetite",
+    "Sore Throat", "Body Ache", "Fatigue", "Runny Nose", "Weight Loss",
+    "Night Sweats", "Chest Pain", "Chills", "Breathing Difficulty", "Loss of Taste"
+]
+SYMPTOM_DISPLAY_NAMES = {s.lower(): s for s in COMMON_SYMPTOMS}
+
 # Initialize session state
-if "patients" not in st.session_state:
-    st.session_state.patients = []
 if "voice_enabled" not in st.session_state:
     st.session_state.voice_enabled = False
 
 
+@st.cache_resource
+def load_prediction_table(path: str):
+    """Enable table mode once per process"""
+    from prediction_table import enable_table_mode
+    
+    return enable_table_mode(path)
+
+
+@st.cache_resource
+def get_patient_store() -> PatientStore:
+    """Process-wide patient store shared by all sessions (HEALTHCARE_DB_PATH)"""
+    return PatientStore(os.environ.get("HEALTHCARE_DB_PATH", DEFAULT_DB_PATH))
+
+
+@st.cache_resource
+def start_metrics_server(port: int):
+    """Serve /metrics once per process"""
+    return metrics.serve(port)
+
+
+@st.cache_resource
+def start_model_watcher(directory: str) -> ModelWatcher:
+    """Activate the newest model file and keep watching for new versions, once per process"""
+    return ModelWatcher(directory).start()
+
+
+@st.cache_resource
+def get_patient_registry() -> PatientRegistry:
+    """Process-wide feed of newly analyzed patients, for cross-session notifications"""
+    return PatientRegistry()
+
+
+if "session_tag" not in st.session_state:
+    st.session_state.session_tag = uuid.uuid4().hex
+    # Notify about patients added after this session started
+    st.session_state.registry_cursor = get_patient_registry().cursor
+    st.session_state.shared_new = []
+
+# Optional stage timing: HEALTHCARE_METRICS=1, exported on HEALTHCARE_METRICS_PORT and/or HEALTHCARE_METRICS_FILE
+if metrics.enabled() and os.environ.get("HEALTHCARE_METRICS_PORT"):
+    start_metrics_server(int(os.environ["HEALTHCARE_METRICS_PORT"]))
+
+# Versioned model files (weights-v<N>.json) in HEALTHCARE_MODEL_DIR, hot-swapped as new versions land
+start_model_watcher(os.environ.get("HEALTHCARE_MODEL_DIR", DEFAULT_MODEL_DIR))
+
+# Optional table mode: HEALTHCARE_PREDICTION_TABLE=<path built by prediction_table.py>
+# Loaded after the model watcher, so a table built with --model for that model is accepted
+if os.environ.get("HEALTHCARE_PREDICTION_TABLE"):
+    load_prediction_table(os.environ["HEALTHCARE_PREDICTION_TABLE"])
+
+
 # ==================== STYLING ====================
 def inject_custom_css():
     """Inject blue/white theme CSS"""
@@ -280,31 +347,15 @@ def render_patient_form():
     # Parse voice input if available
     voice_symptoms = []
     if st.session_state.get("voice_text"):
-        voice_text = st.session_state.voice_text.lower()
-        # Try to match voice input to symptom list
-        common_symptoms_lower = [s.lower() for s in [
-            "Fever", "Headache", "Cough", "Joint Pain", "Rash", "Bleeding",
-            "Nausea", "Stomach Pain", "Diarrhea", "Weakness", "Loss of Appetite",
-            "Sore Throat", "Body Ache", "Fatigue", "Runny Nose", "Weight Loss",
-            "Night Sweats", "Chest Pain", "Chills", "Breathing Difficulty", "Loss of Taste"
-        ]]
-        for symptom in common_symptoms_lower:
-            if symptom in voice_text:
-                voice_symptoms.append(symptom.capitalize())
-    
-    # Manual symptom input
-    common_symptoms = [
-        "Fever", "Headache", "Cough", "Joint Pain", "Rash", "Bleeding",
-        "Nausea", "Stomach Pain", "Diarrhea", "Weakness", "Loss of Appetite",
-        "Sore Throat", "Body Ache", "Fatigue", "Runny Nose", "Weight Loss",
-        "Night Sweats", "Chest Pain", "Chills", "Breathing Difficulty", "Loss of Taste"
-    ]
+        for symptom in extract_symptoms(st.session_state.voice_text):
+            if symptom in SYMPTOM_DISPLAY_NAMES:
+                voice_symptoms.append(SYMPTOM_DISPLAY_NAMES[symptom])
     
     default_symptoms = voice_symptoms if voice_symptoms else []
     
     symptoms = st.multiselect(
         "Select Symptoms",
-        options=common_symptoms,
+        options=COMMON_SYMPTOMS,
         default=default_symptoms,
         key="symptoms"
     )
@@ -325,8 +376,14 @@ def render_patient_form():
 
 
 # ==================== RISK CLASSIFICATION ====================
-def render_risk_classification(disease: str, confidence: float, risk_level: str, risk_score: int):
-    """Render risk classification with progress bar"""
+def render_risk_classification(
+    disease: str,
+    confidence: float,
+    risk_level: str,
+    risk_score: int,
+    differential: Optional[List[Tuple[str, float]]] = None,
+):
+    """Render risk classification with progress bar and the differential diagnosis"""
     st.markdown("### 📊 Risk Classification")
     
     # Determine color based on risk level
@@ -349,6 +406,9 @@ def render_risk_classification(disease: str, confidence: float, risk_level: str,
     </div>
     """, unsafe_allow_html=True)
     
+    if differential:
+        st.caption("Differential: " + " · ".join(f"{name} {score:.0f}%" for name, score in differential))
+    
     # Progress bar (Red → Green)
     progress_color = "#d32f2f" if risk_score >= 70 else "#ff9800" if risk_score >= 40 else "#4caf50"
     
@@ -367,34 +427,67 @@ def render_risk_classification(disease: str, confidence: float, risk_level: str,
 
 
 # ==================== CITY MONITORING ====================
-def render_city_monitoring(city: str):
-    """Render city-wise disease trends with interactive chart"""
-    st.markdown("### 🌆 City-Wise Monitoring")
+# Series longer than this (or not weekly) switch to long-series mode:
+# WebGL traces, a real date axis and LTTB downsampling to the point budget
+LONG_SERIES_POINTS = 60
+# The server cannot see the browser's layout, so the point budget assumes a typical chart
+# plot area; two points per pixel keep every visible peak (a 5-year daily series → 1000 points)
+CHART_WIDTH_PX = 500
+POINTS_PER_PIXEL = 2
+
+
+@st.cache_resource(max_entries=64)
+def build_city_view(city: str, data_version: int):
+    """
+    Summary text and trend chart for a city, cached per (city, data version)
+    Ingesting new counts bumps the version, so stale entries are never served
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
     
-    trends = get_city_trends(city)
     summary = get_city_summary(city)
-    
-    st.info(f"**{city}:** {summary}")
+    series_by_disease = get_city_series(city)
+    longest = max((len(series) for series in series_by_disease.values()), default=0)
+    weekly = all(series.step_days == 7 for series in series_by_disease.values())
     
     # Create interactive line chart
     fig = go.Figure()
+    colors = qualitative.Set3
     
-    weeks = ["Week 1", "Week 2", "Week 3", "Week 4"]
-    
-    colors = px.colors.qualitative.Set3
-    for idx, (disease, cases) in enumerate(trends.items()):
-        fig.add_trace(go.Scatter(
-            x=weeks,
-            y=cases,
-            mode='lines+markers',
-            name=disease,
-            line=dict(width=3, color=colors[idx % len(colors)]),
-            marker=dict(size=8)
-        ))
+    if longest > LONG_SERIES_POINTS or not weekly:
+        from downsample import lttb
+        
+        point_budget = CHART_WIDTH_PX * POINTS_PER_PIXEL
+        for idx, (disease, series) in enumerate(series_by_disease.items()):
+            dates, cases = lttb(series.dates(), series.values, point_budget)
+            fig.add_trace(go.Scattergl(
+                x=dates,
+                y=cases,
+                mode='lines',
+                name=disease,
+                line=dict(width=2, color=colors[idx % len(colors)])
+            ))
+        first_date = min(series.start for series in series_by_disease.values())
+        last_date = max(series.dates(len(series) - 1)[0] for series in series_by_disease.values())
+        title = f"Disease Trends in {city} ({first_date} to {last_date})"
+        xaxis = dict(title="Date", type="date")
+    else:
+        weeks = [f"Week {i + 1}" for i in range(longest)]
+        for idx, (disease, series) in enumerate(series_by_disease.items()):
+            fig.add_trace(go.Scatter(
+                x=weeks[:len(series)],
+                y=series.values,
+                mode='lines+markers',
+                name=disease,
+                line=dict(width=3, color=colors[idx % len(colors)]),
+                marker=dict(size=8)
+            ))
+        title = f"Disease Trends in {city} ({longest} Weeks)"
+        xaxis = dict(title="Week")
     
     fig.update_layout(
-        title=f"Disease Trends in {city} (4 Weeks)",
-        xaxis_title="Week",
+        title=title,
+        xaxis=xaxis,
         yaxis_title="Number of Cases",
         hovermode='x unified',
         template="plotly_white",
@@ -402,36 +495,50 @@ def render_city_monitoring(city: str):
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    return summary, fig
+
+
+def render_city_monitoring(city: str):
+    """Render city-wise disease trends with interactive chart"""
+    st.markdown("### 🌆 City-Wise Monitoring")
+    
+    with metrics.span("city_view"):
+        summary, fig = build_city_view(city, get_city_version(city))
+    
+    st.info(f"**{city}:** {summary}")
+    
+    with metrics.span("render_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def render_case_feed_upload():
+    """Append an uploaded case-count feed to the city data (charts refresh via the data version)"""
+    feed = st.file_uploader("📥 Add case counts (CSV or JSONL: city, disease, date, cases)",
+                            type=["csv", "jsonl", "ndjson"], key="case_feed")
+    # The uploader keeps its file across reruns; ingest each upload once
+    if feed is None or st.session_state.get("case_feed_ingested") == feed.file_id:
+        return
+    st.session_state.case_feed_ingested = feed.file_id
+    suffix = os.path.splitext(feed.name)[1]
+    with tempfile.NamedTemporaryFile("wb", suffix=suffix, delete=False) as f:
+        f.write(feed.getvalue())
+    try:
+        ingested = ingest_case_feed(f.name)
+    except (KeyError, ValueError) as e:
+        st.error(f"Could not ingest {feed.name}: {e}")
+        return
+    finally:
+        os.unlink(f.name)
+    st.success(f"✅ Ingested {ingested} case counts from {feed.name}")
 
 
 # ==================== WHATSAPP ESCALATION ====================
 def generate_whatsapp_qr(patient_data: Dict, disease: str, confidence: float, risk_level: str):
-    """Generate WhatsApp link and QR code"""
+    """Generate WhatsApp link and QR code PNG bytes (cached by URL hash)"""
     try:
-        # Create summary message
-        summary = (
-            f"Patient: {patient_data['name']}, {patient_data['age']}{patient_data['gender'][0]}, "
-            f"{disease} {confidence:.0f}%, BP {patient_data['vitals']['bp_systolic']}/{patient_data['vitals']['bp_diastolic']}, "
-            f"Risk: {risk_level}"
-        )
-        
-        # WhatsApp URL with proper encoding
-        phone = patient_data.get('phone', '917878000000').replace('+', '').replace('-', '').replace(' ', '')
-        encoded_text = urllib.parse.quote(summary)
-        whatsapp_url = f"https://wa.me/{phone}?text={encoded_text}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5, error_correction=qrcode.constants.ERROR_CORRECT_L)
-        qr.add_data(whatsapp_url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-        
-        return whatsapp_url, buf
+        with metrics.span("generate_whatsapp_qr"):
+            whatsapp_url = build_whatsapp_url(patient_data, disease, confidence, risk_level)
+            return whatsapp_url, QR_CACHE.get_png(whatsapp_url)
     except Exception as e:
         st.error(f"Error generating QR code: {str(e)}")
         return "", None
@@ -441,7 +548,7 @@ def render_escalation(patient_data: Dict, disease: str, confidence: float, risk_
     """Render escalation button and QR code"""
     st.markdown("### 🚨 Emergency Escalation")
     
-    whatsapp_url, qr_buffer = generate_whatsapp_qr(patient_data, disease, confidence, risk_level)
+    whatsapp_url, qr_png = generate_whatsapp_qr(patient_data, disease, confidence, risk_level)
     
     if not whatsapp_url:
         st.error("Failed to generate escalation link. Please check patient data.")
@@ -470,8 +577,8 @@ def render_escalation(patient_data: Dict, disease: str, confidence: float, risk_
     
     with col2:
         st.markdown("### 📷 QR Code")
-        if qr_buffer:
-            st.image(qr_buffer, caption="Scan to send WhatsApp message", use_container_width=True)
+        if qr_png:
+            st.image(qr_png, caption="Scan to send WhatsApp message", use_container_width=True)
         else:
             st.warning("QR code not available")
 
@@ -481,16 +588,23 @@ def render_bulk_voice():
     """Render bulk voice announcement feature"""
     st.markdown("### 💊 Bulk Voice Announcement")
     
-    if st.session_state.patients:
-        st.info(f"Total patients in system: {len(st.session_state.patients)}")
+    store = get_patient_store()
+    total_patients = store.count()
+    if total_patients:
+        st.info(f"Total patients in system: {total_patients}")
         
-        # Group patients by status
-        normal_patients = [p for p in st.session_state.patients if p.get('risk_level') == 'LOW']
-        medium_patients = [p for p in st.session_state.patients if p.get('risk_level') == 'MEDIUM']
-        high_patients = [p for p in st.session_state.patients if p.get('risk_level') == 'HIGH']
+        # Group patients by status (running counters, no scan)
+        risk_counts = store.counts_by("risk_level")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("🟢 Low Risk", risk_counts.get("LOW", 0))
+        col2.metric("🟡 Medium Risk", risk_counts.get("MEDIUM", 0))
+        col3.metric("🔴 High Risk", risk_counts.get("HIGH", 0))
         
         if st.button("🔊 Announce Patient Status", use_container_width=True):
-            announcement = f"Patients {len(normal_patients)} normal, {len(medium_patients)} medium risk, {len(high_patients)} high risk"
+            announcement = (
+                f"Patients {risk_counts.get('LOW', 0)} normal, {risk_counts.get('MEDIUM', 0)} medium risk, "
+                f"{risk_counts.get('HIGH', 0)} high risk"
+            )
             
             st.markdown(f"""
             <div class="card">
@@ -514,9 +628,202 @@ def render_bulk_voice():
         st.info("No patients recorded yet. Add a patient first.")
 
 
+# ==================== BULK ESCALATION ====================
+# st.download_button serves files from memory, so larger packs are left to the command line
+MAX_DOWNLOAD_BYTES = int(os.environ.get("HEALTHCARE_MAX_DOWNLOAD_MB", "200")) * 1_000_000
+
+
+def render_bulk_escalation():
+    """Render escalation pack export (WhatsApp links + QR codes) for all HIGH-risk patients"""
+    store = get_patient_store()
+    high_risk_count = store.count(risk_level="HIGH")
+    if not high_risk_count:
+        return
+    
+    st.markdown("### 🚨 Bulk Escalation")
+    if st.button(f"📦 Prepare Escalation Pack ({high_risk_count} HIGH-risk patients)", use_container_width=True):
+        with st.spinner("Generating WhatsApp links and QR codes..."):
+            # The ZIP is streamed to disk and only read back if it fits the download cap
+            with tempfile.TemporaryFile() as archive:
+                exported, failed = export_escalations(store.iter_records(risk_level="HIGH"), archive)
+                size = archive.tell()
+                archive.seek(0)
+                zip_bytes = archive.read() if size <= MAX_DOWNLOAD_BYTES else None
+        
+        if failed:
+            st.warning(f"⚠️ {failed} patients could not be escalated; see the error column of index.csv")
+        if zip_bytes is None:
+            st.error(
+                f"Escalation pack is {size / 1e6:.0f} MB, over the {MAX_DOWNLOAD_BYTES / 1e6:.0f} MB download limit. "
+                "Run `python escalation.py high_risk_escalations.zip` on the server instead."
+            )
+            return
+        st.success(f"✅ Escalation pack ready: {exported} patients")
+        st.download_button(
+            "⬇️ Download ZIP (QR codes + index.csv)",
+            data=zip_bytes,
+            file_name="high_risk_escalations.zip",
+            mime="application/zip",
+            use_container_width=True
+        )
+
+
+# ==================== BULK EXPORT ====================
+EXPORT_FORMATS = {"Parquet": "parquet", "Arrow IPC": "arrow"}
+
+
+def render_bulk_export():
+    """Render a columnar (Parquet / Arrow IPC) export of every patient record"""
+    from patient_export import FORMATS, MIME_TYPES, export_store
+    
+    store = get_patient_store()
+    st.markdown("### 📤 Data Export")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        label = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+    export_format = EXPORT_FORMATS[label]
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        prepare = st.button(f"📦 Prepare {label} Export ({store.count()} patients)", use_container_width=True)
+    
+    if prepare:
+        with st.spinner("Writing patient records..."):
+            # Row groups are streamed to disk, but st.download_button holds the finished file in
+            # memory to serve it; exports over MAX_DOWNLOAD_BYTES are left to patient_export.py
+            with tempfile.TemporaryFile() as export_file:
+                exported = export_store(store, export_file, export_format)
+                size = export_file.tell()
+                export_file.seek(0)
+                export_bytes = export_file.read() if size <= MAX_DOWNLOAD_BYTES else None
+        
+        if export_bytes is None:
+            st.error(
+                f"{label} export is {size / 1e6:.0f} MB, over the {MAX_DOWNLOAD_BYTES / 1e6:.0f} MB download limit. "
+                f"Run `python patient_export.py patients{FORMATS[export_format]}` on the server instead."
+            )
+            return
+        st.success(f"✅ Export ready: {exported} patients")
+        st.download_button(
+            f"⬇️ Download {label} file",
+            data=export_bytes,
+            file_name=f"patients{FORMATS[export_format]}",
+            mime=MIME_TYPES[export_format],
+            use_container_width=True
+        )
+
+
+# ==================== PATIENT BROWSER ====================
+PATIENTS_PER_PAGE = 20
+
+
+def render_patient_browser():
+    """Render a paginated, server-side filtered patient list with lazily loaded details"""
+    store = get_patient_store()
+    st.markdown("### 📋 All Patients")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        risk_level = st.selectbox("Risk Level", ["All", "HIGH", "MEDIUM", "LOW"], key="browse_risk")
+    with col2:
+        city = st.selectbox("City", ["All"] + sorted(c for c in store.counts_by("city") if c), key="browse_city")
+    with col3:
+        disease = st.selectbox("Disease", ["All"] + sorted(d for d in store.counts_by("disease") if d), key="browse_disease")
+    with col4:
+        name_prefix = st.text_input("Name starts with", key="browse_name").strip()
+    
+    filters = {
+        "risk_level": None if risk_level == "All" else risk_level,
+        "city": None if city == "All" else city,
+        "disease": None if disease == "All" else disease,
+        "name_prefix": name_prefix or None,
+    }
+    total = store.count(**filters)
+    if not total:
+        st.info("No patients match these filters")
+        return
+    
+    pages = (total + PATIENTS_PER_PAGE - 1) // PATIENTS_PER_PAGE
+    if st.session_state.get("browse_page", 1) > pages:
+        st.session_state.browse_page = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, key="browse_page")
+    first = (page - 1) * PATIENTS_PER_PAGE
+    st.caption(f"Page {page} of {pages} · showing {first + 1}–{min(first + PATIENTS_PER_PAGE, total)} of {total} patients")
+    
+    # Keyset pagination: the cursor where each visited page starts is remembered per filter set,
+    # so paging forward or back is an index seek; a jump only skips rows past the nearest known page
+    if st.session_state.get("browse_filters") != filters:
+        st.session_state.browse_filters = filters
+        st.session_state.browse_cursors = {1: None}
+    cursors = st.session_state.browse_cursors
+    known = max(p for p in cursors if p <= page)
+    patients = store.page(PATIENTS_PER_PAGE, cursors[known], (page - known) * PATIENTS_PER_PAGE, **filters)
+    if not patients and known > 1:
+        # Remembered cursors outlived their rows (data cleared); start over from the newest
+        st.session_state.browse_cursors = cursors = {1: None}
+        patients = store.page(PATIENTS_PER_PAGE, None, first, **filters)
+    if patients:
+        cursors[page + 1] = page_cursor(patients[-1])
+    
+    # Only this page is fetched; full records load when a row is opened
+    for patient in patients:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(
+                f"**#{patient['id']} {patient.get('name') or 'Unknown'}** ({patient.get('age')}, {patient.get('city')}) - "
+                f"{patient.get('disease') or 'N/A'} · {patient.get('risk_level') or 'N/A'} {patient.get('risk_score') or 0}%"
+            )
+        with col2:
+            show_details = st.toggle("Details", key=f"patient_details_{patient['id']}")
+        if show_details:
+            st.json(store.get(patient["id"]))
+
+
+# ==================== SHARED FEED ====================
+@st.fragment(run_every="5s")
+def render_shared_feed():
+    """Patients analyzed in other sessions since this one last looked (reads only new registry entries)"""
+    entries, st.session_state.registry_cursor = get_patient_registry().since(st.session_state.registry_cursor)
+    others = [entry for entry in entries if entry["session"] != st.session_state.session_tag]
+    st.session_state.shared_new = (st.session_state.shared_new + others)[-10:]
+    
+    if not st.session_state.shared_new:
+        return
+    st.markdown("---")
+    st.markdown(f"### 🆕 From Other Sessions ({len(st.session_state.shared_new)})")
+    for entry in reversed(st.session_state.shared_new):
+        st.markdown(f"**{entry['name'] or 'Unknown'}** ({entry['city']}) - {entry['disease']} ({entry['risk_level']})")
+    st.button("Mark as seen", key="shared_seen", on_click=clear_shared_feed, use_container_width=True)
+
+
+def clear_shared_feed():
+    st.session_state.shared_new = []
+
+
+# ==================== DEBUG PANEL ====================
+def render_metrics_panel():
+    """Sidebar debug panel with per-stage latency (HEALTHCARE_METRICS=1)"""
+    with st.expander("⏱️ Stage Latency"):
+        rows = metrics.summary()
+        if rows:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No timings recorded yet")
+        first_render = startup_profile.first_render_ms()
+        if first_render is not None:
+            st.caption(f"Time to first render: {first_render:.0f} ms")
+        st.download_button(
+            "Download metrics (Prometheus)",
+            data=metrics.render_prometheus(),
+            file_name="healthcare_metrics.prom",
+            mime="text/plain",
+            use_container_width=True,
+        )
+
+
 # ==================== MAIN APP ====================
 def main():
     inject_custom_css()
+    store = get_patient_store()
     
     # Header
     st.title("🏥 Smart Healthcare Assistant")
@@ -527,16 +834,25 @@ def main():
     with st.sidebar:
         st.markdown("### 📋 Quick Actions")
         if st.button("🔄 Clear All Data", use_container_width=True):
-            st.session_state.patients = []
+            store.clear()
             st.rerun()
         
         st.markdown("---")
         st.markdown("### 📊 Patient History")
-        if st.session_state.patients:
-            for idx, patient in enumerate(st.session_state.patients[-5:]):  # Show last 5
+        recent_patients = store.page(5)
+        if recent_patients:
+            for patient in reversed(recent_patients):  # Show last 5, oldest first
                 st.markdown(f"**{patient.get('name', 'Unknown')}** - {patient.get('disease', 'N/A')} ({patient.get('risk_level', 'N/A')})")
         else:
             st.info("No patients yet")
+        
+        render_shared_feed()
+        
+        if metrics.enabled():
+            render_metrics_panel()
+        
+        model = get_active_model()
+        st.caption(f"Model v{model.version} ({model.source})")
     
     # Main content tabs
     tab1, tab2, tab3 = st.tabs(["👤 Patient Assessment", "🌆 City Monitoring", "💊 Bulk Operations"])
@@ -548,23 +864,16 @@ def main():
         # Analyze button
         if st.button("🔍 Analyze Patient", type="primary", use_container_width=True):
             with st.spinner("Analyzing symptoms and calculating risk..."):
-                # Predict disease
-                disease, confidence = predict_disease(
-                    patient_data['symptoms'],
-                    patient_data['age'],
-                    patient_data['city'],
-                    patient_data['vitals']
-                )
-                
-                # Classify risk
-                risk_level, risk_score = classify_risk(
-                    patient_data['age'],
-                    patient_data['symptoms'],
-                    patient_data['vitals'],
-                    patient_data['city'],
-                    disease,
-                    confidence
-                )
+                # Predict disease and classify risk (cached on the canonical inputs)
+                with metrics.span("analyze_patient"):
+                    disease, confidence, risk_level, risk_score = analyze_patient(
+                        patient_data['symptoms'],
+                        patient_data['age'],
+                        patient_data['city'],
+                        patient_data['vitals']
+                    )
+                with metrics.span("predict_differential"):
+                    differential = predict_differential(patient_data['symptoms'], patient_data['vitals'], k=3)
                 
                 # Store patient data
                 patient_record = {
@@ -574,32 +883,47 @@ def main():
                     "risk_level": risk_level,
                     "risk_score": risk_score
                 }
-                st.session_state.patients.append(patient_record)
+                with metrics.span("store_patient"):
+                    patient_id = store.add(patient_record)
+                get_patient_registry().append({
+                    "id": patient_id,
+                    "name": patient_data["name"],
+                    "city": patient_data["city"],
+                    "disease": disease,
+                    "risk_level": risk_level,
+                    "session": st.session_state.session_tag,
+                })
                 
                 # Display results
                 st.success("✅ Analysis Complete!")
                 
                 # Risk Classification
-                render_risk_classification(disease, confidence, risk_level, risk_score)
+                render_risk_classification(disease, confidence, risk_level, risk_score, differential)
                 
                 # Escalation
                 render_escalation(patient_data, disease, confidence, risk_level)
     
     with tab2:
+        # Pick up counts the feed CLI saved to HEALTHCARE_CASE_STORE since the last run
+        refresh_case_store()
+        render_case_feed_upload()
         # City selection
         selected_city = st.selectbox("Select City", get_all_cities(), key="monitor_city")
         render_city_monitoring(selected_city)
     
     with tab3:
         render_bulk_voice()
+        render_bulk_escalation()
         
-        # Patient list
-        if st.session_state.patients:
-            st.markdown("### 📋 All Patients")
-            for idx, patient in enumerate(st.session_state.patients):
-                with st.expander(f"Patient {idx+1}: {patient.get('name', 'Unknown')} - {patient.get('disease', 'N/A')}"):
-                    st.json(patient)
+        # Export and patient list
+        if store.count():
+            render_bulk_export()
+            render_patient_browser()
+    
+    startup_profile.record_first_render()
 
 
 if __name__ == "__main__":
-    main()
+    with metrics.span("script_run"):
+        main()
+    metrics.export_file()
@@ -0,0 +1,4 @@
+"""
+Benchmark suite for the prediction, risk, city data and QR paths
+Run from the repository root: python -m benchmarks.run --help
+"""
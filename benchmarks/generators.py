@@ -0,0 +1,88 @@
+"""
+Seeded synthetic data generators for benchmarks
+Patients come in columnar batches so 10M records never need to be in memory at once
+"""
+
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from prediction import SYMPTOM_WEIGHTS, SYMPTOM_VARIATIONS
+from timeseries import CaseSeriesStore
+
+SYMPTOMS: List[str] = list(SYMPTOM_WEIGHTS)
+CITIES: List[str] = ["Ahmedabad", "Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+DISEASES: List[str] = ["Dengue", "Typhoid", "Flu", "TB", "Malaria", "COVID-19"]
+
+
+def patient_batches(n: int, batch_size: int = 100_000, seed: int = 0) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield n synthetic patients as column batches:
+    age, symptom_mask (bit i = SYMPTOMS[i]), bp_systolic, bp_diastolic, temperature, city
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        # 0-7 symptoms per patient, like the triage queue
+        counts = rng.integers(0, 8, size)
+        keys = rng.random((size, len(SYMPTOMS)))
+        ranks = np.argsort(np.argsort(keys, axis=1), axis=1)
+        masks = ((ranks < counts[:, None]) * (1 << np.arange(len(SYMPTOMS)))).sum(axis=1)
+        yield {
+            "age": rng.integers(1, 100, size),
+            "symptom_mask": masks.astype(np.int64),
+            "bp_systolic": rng.integers(70, 180, size),
+            "bp_diastolic": rng.integers(45, 120, size),
+            "temperature": np.round(rng.uniform(96.0, 104.5, size), 1),
+            "city": rng.integers(0, len(CITIES), size),
+        }
+
+
+def symptom_lists(masks: np.ndarray) -> List[List[str]]:
+    """Expand symptom bitmasks into symptom name lists"""
+    return [[s for i, s in enumerate(SYMPTOMS) if mask >> i & 1] for mask in masks.tolist()]
+
+
+def vitals_dicts(batch: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    return [
+        {"bp_systolic": s, "bp_diastolic": d, "temperature": t}
+        for s, d, t in zip(batch["bp_systolic"].tolist(), batch["bp_diastolic"].tolist(), batch["temperature"].tolist())
+    ]
+
+
+def symptom_phrases(n: int, seed: int = 0) -> List[str]:
+    """Raw symptom strings as typed or spoken: canonical names and variations, mixed case and padding"""
+    rng = np.random.default_rng(seed)
+    vocabulary = SYMPTOMS + [v for variants in SYMPTOM_VARIATIONS.values() for v in variants] + ["unknown symptom"]
+    picks = rng.integers(0, len(vocabulary), n)
+    styles = rng.integers(0, 3, n)
+    return [
+        vocabulary[p].upper() if style == 0 else f"  {vocabulary[p].title()} " if style == 1 else vocabulary[p]
+        for p, style in zip(picks.tolist(), styles.tolist())
+    ]
+
+
+def disease_catalog(
+    n_diseases: int = 5000, n_symptoms: int = 400, symptoms_per_disease: int = 8, seed: int = 0
+) -> Dict[str, Dict[str, float]]:
+    """ICD-scale synthetic symptom → disease → weight catalog ("symptom 0".. / "disease 0"..)"""
+    rng = np.random.default_rng(seed)
+    catalog: Dict[str, Dict[str, float]] = {f"symptom {i}": {} for i in range(n_symptoms)}
+    for disease in range(n_diseases):
+        for symptom in rng.choice(n_symptoms, symptoms_per_disease, replace=False).tolist():
+            catalog[f"symptom {symptom}"][f"disease {disease}"] = round(float(rng.uniform(0.1, 1.0)), 2)
+    return catalog
+
+
+def case_store(n_cities: int, n_diseases: int = 6, length: int = 4, step_days: int = 7, seed: int = 0) -> CaseSeriesStore:
+    """Random-walk case series for n_cities x n_diseases, `length` points each"""
+    rng = np.random.default_rng(seed)
+    store = CaseSeriesStore()
+    steps = rng.normal(0, 5, (n_cities, n_diseases, length)).cumsum(axis=2)
+    base = rng.integers(20, 300, (n_cities, n_diseases, 1))
+    counts = np.clip(base + steps, 0, None).astype(np.int32)
+    diseases = (DISEASES * (n_diseases // len(DISEASES) + 1))[:n_diseases]
+    for city in range(n_cities):
+        for d, disease in enumerate(diseases):
+            store.add_series(f"City {city}", f"{disease}-{d}", counts[city, d], "2020-01-01", step_days)
+    return store
@@ -0,0 +1,361 @@
+"""
+Benchmark runner: throughput and p50/p99 latency for the hot paths, saved as JSON
+
+Usage:
+    python -m benchmarks.run run [--records 100k] [--seed 0] [--only NAME ...] [--output FILE]
+    python -m benchmarks.run compare BASELINE.json CURRENT.json [--threshold 0.10]
+
+Scalar (one call per record) benchmarks run on at most --scalar-records records and
+QR rendering on at most --qr-records; the batch benchmarks always cover --records.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+import data
+from benchmarks import generators
+from escalation import QRCodeCache, build_whatsapp_url, render_qr_png
+from prediction import (
+    ScoringModel,
+    SparseScoringModel,
+    classify_risk,
+    classify_risk_batch,
+    normalize_symptom_name,
+    predict_disease,
+    predict_diseases_batch,
+)
+from timeseries import TrendIndex
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+BATCH_SIZE = 100_000
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_count(text: str) -> int:
+    """Parse record counts like 1000, 10k or 10m"""
+    text = text.strip().lower().replace("_", "")
+    if text and text[-1] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+def summarize(latencies_ns: List[int], items: int, unit: str = "call") -> Dict:
+    """Throughput (items/s) and latency percentiles (µs per `unit`) of one benchmark"""
+    latencies = np.asarray(latencies_ns, dtype=np.float64)
+    seconds = latencies.sum() / 1e9
+    return {
+        "items": items,
+        "unit": unit,
+        "seconds": round(seconds, 6),
+        "throughput": round(items / seconds, 1) if seconds else 0.0,
+        "p50_us": round(float(np.percentile(latencies, 50)) / 1000, 3) if len(latencies) else 0.0,
+        "p99_us": round(float(np.percentile(latencies, 99)) / 1000, 3) if len(latencies) else 0.0,
+    }
+
+
+# ==================== BENCHMARKS ====================
+def _scalar_patients(options: argparse.Namespace):
+    """Patient batches as (symptom lists, vitals dicts, raw columns), capped at --scalar-records"""
+    n = min(options.records, options.scalar_records)
+    for batch in generators.patient_batches(n, BATCH_SIZE, options.seed):
+        yield generators.symptom_lists(batch["symptom_mask"]), generators.vitals_dicts(batch), batch
+
+
+def bench_predict_disease(options: argparse.Namespace) -> Dict:
+    parts = []
+    for symptoms, vitals, batch in _scalar_patients(options):
+        cities = [generators.CITIES[c] for c in batch["city"].tolist()]
+        parts.append(_timed(predict_disease, zip(symptoms, batch["age"].tolist(), cities, vitals)))
+    return _combine(parts)
+
+
+def bench_classify_risk(options: argparse.Namespace) -> Dict:
+    parts = []
+    for symptoms, vitals, batch in _scalar_patients(options):
+        cities = [generators.CITIES[c] for c in batch["city"].tolist()]
+        predictions = predict_diseases_batch(symptoms, vitals)
+        calls = (
+            (age, s, v, city, disease, confidence)
+            for age, s, v, city, (disease, confidence) in zip(batch["age"].tolist(), symptoms, vitals, cities, predictions)
+        )
+        parts.append(_timed(classify_risk, calls))
+    return _combine(parts)
+
+
+def bench_normalize_symptom_name(options: argparse.Namespace) -> Dict:
+    n = min(options.records, options.scalar_records)
+    phrases = generators.symptom_phrases(n, options.seed)
+    return _combine([_timed(normalize_symptom_name, ((phrase,) for phrase in phrases))])
+
+
+def bench_predict_diseases_batch(options: argparse.Namespace) -> Dict:
+    latencies, items = [], 0
+    for batch in generators.patient_batches(options.records, BATCH_SIZE, options.seed):
+        symptoms = generators.symptom_lists(batch["symptom_mask"])
+        vitals = generators.vitals_dicts(batch)
+        started = time.perf_counter_ns()
+        predict_diseases_batch(symptoms, vitals)
+        latencies.append(time.perf_counter_ns() - started)
+        items += len(symptoms)
+    return summarize(latencies, items, unit="batch")
+
+
+def bench_classify_risk_batch(options: argparse.Namespace) -> Dict:
+    latencies, items = [], 0
+    rng = np.random.default_rng(options.seed)
+    for batch in generators.patient_batches(options.records, BATCH_SIZE, options.seed):
+        counts = np.bitwise_count(batch["symptom_mask"]) if hasattr(np, "bitwise_count") else np.array(
+            [bin(mask).count("1") for mask in batch["symptom_mask"].tolist()]
+        )
+        confidence = np.round(rng.uniform(0, 100, len(counts)), 1)
+        started = time.perf_counter_ns()
+        classify_risk_batch(
+            batch["age"], counts, batch["bp_systolic"], batch["bp_diastolic"], batch["temperature"], confidence
+        )
+        latencies.append(time.perf_counter_ns() - started)
+        items += len(counts)
+    return summarize(latencies, items, unit="batch")
+
+
+def _catalog_cases(options: argparse.Namespace):
+    """ICD-scale catalog plus symptom lists (1-7 symptoms) to score against it"""
+    catalog = generators.disease_catalog(options.catalog_diseases, options.catalog_symptoms, seed=options.seed)
+    diseases = sorted({disease for weights in catalog.values() for disease in weights}, key=lambda d: int(d.split()[1]))
+    rng = np.random.default_rng(options.seed)
+    symptoms = list(catalog)
+    n = min(options.records, options.scalar_records)
+    cases = [
+        [symptoms[i] for i in rng.choice(len(symptoms), int(size), replace=False)]
+        for size in rng.integers(1, 8, n)
+    ]
+    return catalog, diseases, cases
+
+
+def bench_predict_differential(options: argparse.Namespace) -> Dict:
+    """Top-5 differential over the ICD-scale catalog with the inverted index"""
+    catalog, diseases, cases = _catalog_cases(options)
+    model = SparseScoringModel(catalog, diseases, {}, {})
+    return _combine([_timed(model.top_k, ((symptoms, None, 5) for symptoms in cases))])
+
+
+def bench_predict_differential_dense(options: argparse.Namespace) -> Dict:
+    """Same catalog scored densely (every disease per call), for comparison"""
+    catalog, diseases, cases = _catalog_cases(options)
+    model = ScoringModel(catalog, diseases, {}, {})
+    no_vitals = np.array([120.0]), np.array([80.0]), np.array([98.6])
+    return _combine([_timed(lambda s: model.score(model.encode([s]), *no_vitals), ((s,) for s in cases))])
+
+
+@contextlib.contextmanager
+def _case_store(store):
+    """Point data.py's city functions at a generated store for the duration of a benchmark"""
+    original = data.CASE_STORE, data.TREND_INDEX
+    data.CASE_STORE, data.TREND_INDEX = store, TrendIndex(store)
+    try:
+        yield store
+    finally:
+        data.CASE_STORE, data.TREND_INDEX = original
+
+
+def _generated_store(options: argparse.Namespace):
+    """One year of weekly points for each of 6 diseases per city; --records counts data points"""
+    n_cities = max(1, options.records // (6 * options.series_length))
+    return generators.case_store(n_cities, 6, options.series_length, seed=options.seed)
+
+
+def bench_get_city_summary(options: argparse.Namespace) -> Dict:
+    with _case_store(_generated_store(options)) as store:
+        cities = store.cities()[:options.scalar_records]
+        return _combine([_timed(data.get_city_summary, ((city,) for city in cities))])
+
+
+def bench_get_trend_direction(options: argparse.Namespace) -> Dict:
+    store = _generated_store(options)
+    cases = []
+    for city in store.cities():
+        cases.extend(series.values.tolist() for series in store.city_series(city).values())
+        if len(cases) >= options.scalar_records:
+            break
+    return _combine([_timed(data.get_trend_direction, ((c,) for c in cases[:options.scalar_records]))])
+
+
+def _escalation_args(options: argparse.Namespace) -> List[tuple]:
+    """build_whatsapp_url arguments for distinct synthetic patients, capped at --qr-records"""
+    n = min(options.records, options.qr_records)
+    batch = next(generators.patient_batches(n, n, options.seed))
+    symptoms = generators.symptom_lists(batch["symptom_mask"])
+    vitals = generators.vitals_dicts(batch)
+    predictions = predict_diseases_batch(symptoms, vitals)
+    return [
+        ({"name": f"Patient {i}", "age": age, "gender": "Female" if i % 2 else "Male", "vitals": v},
+         disease, confidence, "HIGH")
+        for i, (age, v, (disease, confidence)) in enumerate(zip(batch["age"].tolist(), vitals, predictions))
+    ]
+
+
+def _whatsapp_qr(patient_data: Dict, disease: str, confidence: float, risk_level: str) -> bytes:
+    """What app.generate_whatsapp_qr does, minus the cache"""
+    return render_qr_png(build_whatsapp_url(patient_data, disease, confidence, risk_level))
+
+
+def bench_generate_whatsapp_qr(options: argparse.Namespace) -> Dict:
+    """Link + QR for distinct patients, i.e. every call renders (cache misses)"""
+    return _combine([_timed(_whatsapp_qr, _escalation_args(options))])
+
+
+def bench_generate_whatsapp_qr_cached(options: argparse.Namespace) -> Dict:
+    """Link + QR through QRCodeCache once every URL has been rendered (cache hits)"""
+    args = _escalation_args(options)
+    cache = QRCodeCache(maxsize=len(args))
+    for patient_args in args:
+        cache.get_png(build_whatsapp_url(*patient_args))
+    repeats = max(1, options.scalar_records // max(len(args), 1))
+    return _combine([_timed(lambda *a: cache.get_png(build_whatsapp_url(*a)), args * repeats)])
+
+
+def _timed(fn: Callable, calls: Iterable[tuple]) -> List[int]:
+    latencies = []
+    clock = time.perf_counter_ns
+    for args in calls:
+        started = clock()
+        fn(*args)
+        latencies.append(clock() - started)
+    return latencies
+
+
+def _combine(parts: List[List[int]]) -> Dict:
+    latencies = [latency for part in parts for latency in part]
+    return summarize(latencies, len(latencies))
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], Dict]] = {
+    "predict_disease": bench_predict_disease,
+    "predict_diseases_batch": bench_predict_diseases_batch,
+    "classify_risk": bench_classify_risk,
+    "classify_risk_batch": bench_classify_risk_batch,
+    "normalize_symptom_name": bench_normalize_symptom_name,
+    "predict_differential": bench_predict_differential,
+    "predict_differential_dense": bench_predict_differential_dense,
+    "get_city_summary": bench_get_city_summary,
+    "get_trend_direction": bench_get_trend_direction,
+    "generate_whatsapp_qr": bench_generate_whatsapp_qr,
+    "generate_whatsapp_qr_cached": bench_generate_whatsapp_qr_cached,
+}
+
+
+# ==================== RESULTS ====================
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(RESULTS_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(options: argparse.Namespace) -> Dict:
+    """Run the selected benchmarks; returns the results document"""
+    results = {}
+    for name in options.only or BENCHMARKS:
+        print(f"{name} ...", end=" ", flush=True)
+        results[name] = BENCHMARKS[name](options)
+        print(f"{results[name]['throughput']:,.0f}/s  p50 {results[name]['p50_us']:.1f}µs  "
+              f"p99 {results[name]['p99_us']:.1f}µs per {results[name]['unit']}")
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "records": options.records,
+            "scalar_records": options.scalar_records,
+            "qr_records": options.qr_records,
+            "seed": options.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    Per-benchmark throughput and p50 changes between two result documents
+    A benchmark regresses when throughput drops or p50 latency grows by more than `threshold`
+    """
+    rows = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        throughput_change = new["throughput"] / old["throughput"] - 1 if old["throughput"] else 0.0
+        p50_change = new["p50_us"] / old["p50_us"] - 1 if old["p50_us"] else 0.0
+        rows.append({
+            "name": name,
+            "throughput_change": throughput_change,
+            "p50_change": p50_change,
+            "regressed": throughput_change < -threshold or p50_change > threshold,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the prediction, risk, city data and QR paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and save the results as JSON")
+    run_parser.add_argument("--records", type=parse_count, default=parse_count("100k"),
+                            help="Synthetic records (1k .. 10m, default 100k)")
+    run_parser.add_argument("--scalar-records", type=parse_count, default=parse_count("100k"),
+                            help="Cap for one-call-per-record benchmarks (default 100k)")
+    run_parser.add_argument("--qr-records", type=parse_count, default=200, help="Cap for QR rendering (default 200)")
+    run_parser.add_argument("--catalog-diseases", type=int, default=5000, help="Diseases in the differential catalog")
+    run_parser.add_argument("--catalog-symptoms", type=int, default=400, help="Symptoms in the differential catalog")
+    run_parser.add_argument("--series-length", type=int, default=52, help="Points per generated case series")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    run_parser.add_argument("--output", help="Results file (default benchmarks/results/<timestamp>.json)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change counted as a regression (default 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        document = run(args)
+        output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved {output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'benchmark':<30}{'throughput':>12}{'p50':>10}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['name']:<30}{row['throughput_change']:>+12.1%}{row['p50_change']:>+10.1%}{flag}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
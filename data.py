@@ -3,9 +3,15 @@ Mock city-wise disease monitoring data
 Provides weekly trends for different cities and diseases
 """
 
-from typing import Dict, List
+import os
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
 import random
 
+import numpy as np
+
+from timeseries import CaseSeries, CaseSeriesStore, DateLike, TrendIndex, ingest, read_feed
+
 # City-wise disease trends (Week 1 → Week 4)
 CITY_DISEASE_DATA: Dict[str, Dict[str, List[int]]] = {
     "Ahmedabad": {
@@ -58,6 +64,55 @@ CITY_DISEASE_DATA: Dict[str, Dict[str, List[int]]] = {
     },
 }
 
+# The mock data above is weekly, Week 1 starting on this date
+MOCK_SERIES_START = "2024-01-01"
+
+
+def _case_store_stamp(path: str) -> Optional[int]:
+    """mtime of a saved store's index.json, which CaseSeriesStore.save replaces last"""
+    try:
+        return os.stat(os.path.join(path, "index.json")).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_case_store() -> CaseSeriesStore:
+    """Load the store saved at HEALTHCARE_CASE_STORE, or fall back to the mock data"""
+    global _CASE_STORE_STAMP
+    path = os.environ.get("HEALTHCARE_CASE_STORE")
+    if path:
+        _CASE_STORE_STAMP = _case_store_stamp(path)
+        return CaseSeriesStore.load(path)
+    return CaseSeriesStore.from_dict(CITY_DISEASE_DATA, MOCK_SERIES_START, step_days=7)
+
+
+# index.json mtime of the saved store CASE_STORE was loaded from (or last saved to)
+_CASE_STORE_STAMP: Optional[int] = None
+_CASE_STORE_LOCK = threading.Lock()
+
+CASE_STORE: CaseSeriesStore = load_case_store()
+TREND_INDEX = TrendIndex(CASE_STORE)
+
+
+def refresh_case_store() -> bool:
+    """
+    Reload HEALTHCARE_CASE_STORE if it was saved since it was loaded (e.g. by the timeseries.py
+    feed CLI); returns whether it was. Versions continue from the old store, so caches keyed on
+    get_city_version never serve the old data.
+    """
+    global CASE_STORE, TREND_INDEX, _CASE_STORE_STAMP
+    path = os.environ.get("HEALTHCARE_CASE_STORE")
+    stamp = _case_store_stamp(path) if path else None
+    if stamp is None or stamp == _CASE_STORE_STAMP:
+        return False
+    with _CASE_STORE_LOCK:
+        if stamp == _CASE_STORE_STAMP:
+            return False
+        store = CaseSeriesStore.load(path)
+        store.continue_versions(CASE_STORE)
+        CASE_STORE, TREND_INDEX, _CASE_STORE_STAMP = store, TrendIndex(store), stamp
+    return True
+
 # Disease symptoms mapping
 DISEASE_SYMPTOMS: Dict[str, List[str]] = {
     "Dengue": ["fever", "headache", "joint pain", "rash", "bleeding", "nausea"],
@@ -69,14 +124,27 @@ DISEASE_SYMPTOMS: Dict[str, List[str]] = {
 }
 
 
-def get_city_trends(city: str) -> Dict[str, List[int]]:
-    """Get disease trends for a specific city"""
-    return CITY_DISEASE_DATA.get(city, {})
+def get_city_trends(
+    city: str,
+    last_weeks: Optional[int] = None,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Get disease trends for a specific city
+    Optionally limited to the last N weeks or a [start, end] date range; arrays are views, not copies
+    """
+    return CASE_STORE.window(city, last_weeks, start, end)
+
+
+def get_city_series(city: str) -> Dict[str, CaseSeries]:
+    """Get the full case series (with dates) for every disease in a city"""
+    return CASE_STORE.city_series(city)
 
 
 def get_all_cities() -> List[str]:
     """Get list of all available cities"""
-    return list(CITY_DISEASE_DATA.keys())
+    return CASE_STORE.cities()
 
 
 def get_disease_symptoms(disease: str) -> List[str]:
@@ -101,17 +169,46 @@ def get_trend_direction(cases: List[int]) -> str:
 
 
 def get_city_summary(city: str) -> str:
-    """Get a text summary of city disease trends"""
-    trends = get_city_trends(city)
+    """Get a text summary of city disease trends (from the trend index)"""
+    trends = TREND_INDEX.city_trends(city)
     if not trends:
         return f"No data available for {city}"
     
     summary_parts = []
-    for disease, cases in trends.items():
-        direction = get_trend_direction(cases)
-        change_pct = int(((cases[-1] - cases[0]) / cases[0]) * 100) if cases[0] > 0 else 0
+    for disease, (direction, change_pct) in trends.items():
         status = "rising" if direction == "↑" else "falling" if direction == "↓" else "steady"
         summary_parts.append(f"{disease} {status} ({change_pct:+d}%)")
     
     return ", ".join(summary_parts)
 
+
+def get_city_trend(city: str, disease: str) -> Optional[Tuple[str, int]]:
+    """(trend direction, change %) of a disease in a city, or None if there is no data for it"""
+    return TREND_INDEX.lookup(city, disease)
+
+
+def get_city_trend_signature(city: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """(rising diseases, diseases with data) for a city"""
+    return TREND_INDEX.signature(city)
+
+
+def get_city_version(city: str) -> int:
+    """Data version of a city; changes whenever new counts are ingested for it"""
+    return CASE_STORE.version(city)
+
+
+def ingest_case_feed(path: str, step_days: int = 7) -> int:
+    """
+    Append a CSV/JSONL case-count feed (city,disease,date,cases) to the live city data
+    With HEALTHCARE_CASE_STORE set the store is saved back, so the counts outlive the process
+    """
+    global _CASE_STORE_STAMP
+    store_path = os.environ.get("HEALTHCARE_CASE_STORE")
+    with _CASE_STORE_LOCK:
+        try:
+            return ingest(CASE_STORE, read_feed(path), step_days)
+        finally:
+            # Rows before a bad one stay ingested, so they are saved too
+            if store_path:
+                CASE_STORE.save(store_path)
+                _CASE_STORE_STAMP = _case_store_stamp(store_path)
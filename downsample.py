@@ -0,0 +1,57 @@
+"""
+Shape-preserving downsampling for long time series charts
+Largest-Triangle-Three-Buckets (LTTB): keeps the points that carry the visual shape
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps when reducing (x, y) to `threshold` points
+    First and last points are always kept; short series are returned whole
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        bucket_x = x[start:stop]
+        bucket_y = y[start:stop]
+        areas = np.abs(
+            (x[previous] - avg_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int):
+    """
+    Downsample (x, y) to at most `threshold` points with LTTB; x may be datetime64. Returns (x, y)
+    Points where y is NaN (no report) are left out
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    reported = ~np.isnan(y) if np.issubdtype(y.dtype, np.floating) else None
+    if reported is not None and not reported.all():
+        x, y = x[reported], y[reported]
+    numeric_x = x.astype("datetime64[D]").astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) else x
+    indices = lttb_indices(numeric_x, y, threshold)
+    return x[indices], y[indices]
@@ -0,0 +1,234 @@
+"""
+WhatsApp escalation links and QR codes
+QR PNGs are cached by a hash of the final WhatsApp URL: in-memory LRU plus an optional disk tier
+
+Usage:
+    python escalation.py high_risk_escalations.zip [--db patients.db] [--risk-level HIGH] [--workers N]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import urllib.parse
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, TextIOWrapper
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+from storage import DEFAULT_DB_PATH, PatientStore
+
+
+DEFAULT_PHONE = "917878000000"
+
+
+def build_whatsapp_url(patient_data: Dict, disease: str, confidence: float, risk_level: str) -> str:
+    """Build the wa.me link carrying the patient summary (missing fields are left blank)"""
+    vitals = patient_data.get('vitals') or {}
+    bp = "/".join("?" if vitals.get(field) is None else str(vitals[field]) for field in ("bp_systolic", "bp_diastolic"))
+    summary = (
+        f"Patient: {patient_data.get('name') or 'Unknown'}, {patient_data.get('age', '')}"
+        f"{(patient_data.get('gender') or '')[:1]}, "
+        f"{disease} {confidence:.0f}%, BP {bp}, "
+        f"Risk: {risk_level}"
+    )
+
+    phone = str(patient_data.get('phone') or DEFAULT_PHONE).replace('+', '').replace('-', '').replace(' ', '')
+    encoded_text = urllib.parse.quote(summary)
+    return f"https://wa.me/{phone}?text={encoded_text}"
+
+
+def render_qr_png(data: str) -> bytes:
+    """Encode data as a QR code PNG"""
+    # qrcode (and PIL behind it) are only needed once a QR is actually generated
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5, error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class QRCodeCache:
+    """Content-addressed QR PNG cache: bounded in-memory LRU with an optional on-disk tier"""
+
+    def __init__(self, maxsize: int = 256, disk_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get_png(self, url: str) -> bytes:
+        """PNG bytes of the QR code for url, generated only on a miss in both tiers"""
+        key = self.key(url)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+
+        png = self._read_disk(key)
+        if png is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            png = render_qr_png(url)
+            self._write_disk(key, png)
+
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return png
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, png: bytes):
+        if not self.disk_dir:
+            return
+        tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, self._disk_path(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# Process-wide cache; HEALTHCARE_QR_CACHE_DIR enables the disk tier
+QR_CACHE = QRCodeCache(disk_dir=os.environ.get("HEALTHCARE_QR_CACHE_DIR"))
+
+
+# ==================== BULK EXPORT ====================
+INDEX_FIELDS = [
+    "id", "name", "age", "city", "disease", "confidence", "risk_level", "risk_score", "whatsapp_url", "qr_file",
+    "error",
+]
+
+
+def _render_escalation(record: Dict) -> Tuple[str, Optional[bytes], str]:
+    """
+    Worker task: (WhatsApp link, QR PNG, "") for one stored patient record
+    A record that cannot be rendered gives ("", None, error) instead of failing the whole export
+    """
+    try:
+        url = build_whatsapp_url(record, record["disease"], record["confidence"], record["risk_level"])
+        return url, QR_CACHE.get_png(url), ""
+    except Exception as e:
+        return "", None, f"{type(e).__name__}: {e}"
+
+
+def _qr_filename(number: int, record: Dict) -> str:
+    name = re.sub(r"[^A-Za-z0-9]+", "_", str(record.get("name") or "patient")).strip("_") or "patient"
+    return f"qr/{record.get('id', number)}_{name}.png"
+
+
+def export_escalations(
+    records: Iterable[Dict],
+    dest: Union[str, BinaryIO],
+    max_workers: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Generate WhatsApp links and QR codes for records across a process pool and
+    stream them into a ZIP (qr/*.png plus index.csv). Only a bounded window of
+    results is in flight, so memory stays flat however many records there are.
+    Records that fail get an index.csv row with `error` set and no QR file.
+    Returns (patients exported, records that failed).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    window = 4 * max_workers
+    exported = failed = 0
+    with tempfile.TemporaryFile("w+", newline="") as index_file, \
+            zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+        index = csv.DictWriter(index_file, fieldnames=INDEX_FIELDS, extrasaction="ignore")
+        index.writeheader()
+
+        def write_result(record: Dict, url: str, png: Optional[bytes], error: str):
+            nonlocal exported, failed
+            if error:
+                failed += 1
+                index.writerow({**record, "whatsapp_url": "", "qr_file": "", "error": error})
+                return
+            exported += 1
+            filename = _qr_filename(exported, record)
+            # PNGs are already compressed
+            archive.writestr(filename, png, compress_type=zipfile.ZIP_STORED)
+            index.writerow({**record, "whatsapp_url": url, "qr_file": filename, "error": ""})
+
+        pending: "deque[Tuple[Dict, object]]" = deque()
+        for record in records:
+            pending.append((record, pool.submit(_render_escalation, record)))
+            if len(pending) >= window:
+                done_record, future = pending.popleft()
+                write_result(done_record, *future.result())
+        while pending:
+            done_record, future = pending.popleft()
+            write_result(done_record, *future.result())
+
+        index_file.seek(0)
+        with TextIOWrapper(archive.open("index.csv", "w"), encoding="utf-8", newline="") as text:
+            for line in index_file:
+                text.write(line)
+    return exported, failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export WhatsApp links and QR codes for stored patients as a ZIP")
+    parser.add_argument("output", help="Output ZIP file")
+    parser.add_argument("--db", default=os.environ.get("HEALTHCARE_DB_PATH", DEFAULT_DB_PATH))
+    parser.add_argument("--risk-level", default="HIGH", help="Only patients at this risk level (default: HIGH)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    records = PatientStore(args.db).iter_records(risk_level=args.risk_level)
+    exported, failed = export_escalations(records, args.output, args.workers)
+    print(f"Exported {exported:,} patients to {args.output}"
+          + (f"; {failed:,} failed (see the error column of index.csv)" if failed else ""), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
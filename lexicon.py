@@ -0,0 +1,102 @@
+"""
+Symptom lexicon compiled once at import time
+Inverted synonym → canonical map plus an Aho-Corasick matcher for free text
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# Endings a matched pattern may carry into the rest of its word ("fevers", "coughing", "feverish")
+INFLECTIONS = frozenset({"s", "es", "ed", "ing", "ish", "y"})
+
+
+class SymptomLexicon:
+    """Synonym lookup and single-pass multi-pattern symptom extraction"""
+
+    def __init__(self, symptoms: Iterable[str], variations: Dict[str, List[str]]):
+        # First standard listing a variant wins, like the old linear scan did
+        self.canonical: Dict[str, str] = {}
+        for standard, variants in variations.items():
+            for variant in variants:
+                self.canonical.setdefault(variant.lower(), standard)
+        for symptom in symptoms:
+            self.canonical.setdefault(symptom.lower(), symptom)
+
+        # Aho-Corasick automaton: goto transitions, failure links and the
+        # (pattern length, canonical name) outputs ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for pattern, standard in self.canonical.items():
+            self._add_pattern(pattern, standard)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, standard: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(pattern), standard))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def normalize(self, symptom: str) -> str:
+        """Map a symptom or one of its synonyms to the canonical name"""
+        symptom = symptom.lower().strip()
+        return self.canonical.get(symptom, symptom)
+
+    def extract(self, text: str) -> List[str]:
+        """
+        Find canonical symptoms mentioned in free text, in order of appearance
+        A match must start a word and end one, optionally followed by an inflection
+        ("headaches", "coughing"); overlapping matches keep the leftmost-longest
+        """
+        text = text.lower()
+        matches: List[Tuple[int, int, str]] = []
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, standard in self._out[state]:
+                start = end - length
+                if (start == 0 or not text[start - 1].isalnum()) and _word_rest(text, end) in _ENDINGS:
+                    matches.append((start, -length, standard))
+
+        found: List[str] = []
+        covered_until = 0
+        for start, neg_length, standard in sorted(matches):
+            if start < covered_until:
+                continue
+            covered_until = start - neg_length
+            if standard not in found:
+                found.append(standard)
+        return found
+
+
+_ENDINGS = INFLECTIONS | {""}
+
+
+def _word_rest(text: str, end: int) -> str:
+    """The rest of the word a match ends in ("" when the match ends the word)"""
+    stop = end
+    while stop < len(text) and text[stop].isalnum():
+        stop += 1
+    return text[end:stop]
@@ -0,0 +1,207 @@
+"""
+Per-stage latency instrumentation: timing spans feeding in-process histograms
+Disabled unless HEALTHCARE_METRICS=1; while disabled span() returns a shared no-op
+context manager, so instrumented code pays one function call per span
+
+Exports (Prometheus text format):
+    HEALTHCARE_METRICS_PORT=9108       serve GET /metrics on 127.0.0.1:9108
+    HEALTHCARE_METRICS_FILE=<path>     rewrite <path> on every export_file() call
+"""
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from 100µs (a cached lookup) to 10s (a cold chart build)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+METRIC_NAME = "healthcare_stage_duration_seconds"
+GAUGE_PREFIX = "healthcare_"
+
+_NOOP_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (thread-safe)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow bucket
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self):
+        """(per-bucket counts, sum, count) at one instant"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile in seconds, interpolated linearly inside its bucket"""
+        counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class _Span:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+_enabled = os.environ.get("HEALTHCARE_METRICS", "").lower() in ("1", "true", "yes", "on")
+_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+# One-off values such as time to first render; recorded even while spans are disabled
+_gauges: Dict[str, Tuple[float, str]] = {}
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def histogram(stage: str) -> Histogram:
+    """Histogram for a stage, created on first use"""
+    found = _histograms.get(stage)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(stage, Histogram())
+    return found
+
+
+def span(stage: str):
+    """Context manager timing one execution of a stage"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(histogram(stage))
+
+
+def set_gauge(name: str, value: float, help_text: str = ""):
+    """Set a gauge, exported as healthcare_<name>"""
+    _gauges[name] = (value, help_text)
+
+
+def gauge(name: str) -> Optional[float]:
+    found = _gauges.get(name)
+    return found[0] if found else None
+
+
+def reset():
+    """Drop every recorded observation"""
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def summary() -> List[Dict]:
+    """Per-stage count, mean, p50 and p99 (milliseconds), for the debug panel"""
+    rows = []
+    for stage, hist in sorted(_histograms.items()):
+        _, total, count = hist.snapshot()
+        rows.append({
+            "stage": stage,
+            "count": count,
+            "mean_ms": round(total / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(hist.quantile(0.5) * 1000, 2),
+            "p99_ms": round(hist.quantile(0.99) * 1000, 2),
+        })
+    return rows
+
+
+def render_prometheus() -> str:
+    """All histograms in the Prometheus text exposition format"""
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each stage of the healthcare app",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage, hist in sorted(_histograms.items()):
+        counts, total, count = hist.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(hist.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    for name, (value, help_text) in sorted(_gauges.items()):
+        lines.append(f"# HELP {GAUGE_PREFIX}{name} {help_text or name}")
+        lines.append(f"# TYPE {GAUGE_PREFIX}{name} gauge")
+        lines.append(f"{GAUGE_PREFIX}{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export_file(path: Optional[str] = None) -> Optional[str]:
+    """Write the Prometheus text to path (default HEALTHCARE_METRICS_FILE); returns the path written"""
+    path = path or os.environ.get("HEALTHCARE_METRICS_FILE")
+    if not path or not _enabled:
+        return None
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+    return path
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+    """Serve GET /metrics from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,265 @@
+"""
+Versioned on-disk models: <dir>/weights-v<N>.json
+A file holds the disease catalog, symptom weights, vitals multipliers, symptom variations and
+risk thresholds. Loading compiles it into a prediction.CompiledModel; ModelWatcher polls the
+directory and activates each newer version as it appears.
+
+Usage:
+    python model_files.py export [--dir models] [--version 1]   write the built-in model
+    python model_files.py check models/weights-v2.json          validate a file
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import prediction
+from prediction import RISK_THRESHOLDS, CompiledModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = "models"
+FORMAT = 1
+FILE_PATTERN = re.compile(r"^weights-v(\d+)\.json$")
+
+
+def model_file_name(version: int) -> str:
+    return f"weights-v{version}.json"
+
+
+def model_to_dict(model: CompiledModel, version: Optional[int] = None) -> Dict:
+    """The JSON document for a model"""
+    return {
+        "format": FORMAT,
+        "version": model.version if version is None else version,
+        "diseases": model.disease_symptoms,
+        "symptom_weights": model.symptom_weights,
+        "low_bp_multipliers": model.low_bp_multipliers,
+        "fever_multipliers": model.fever_multipliers,
+        "symptom_variations": model.symptom_variations,
+        "risk_thresholds": model.risk_thresholds,
+    }
+
+
+def _number(value, where: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{where} must be a number")
+    return value
+
+
+def model_from_dict(document: Dict, source: str = "<dict>") -> CompiledModel:
+    """Validate a model document and compile it; raises ValueError describing the first problem"""
+    if not isinstance(document, dict):
+        raise ValueError("model file must hold a JSON object")
+    if document.get("format", FORMAT) != FORMAT:
+        raise ValueError(f"unsupported model format {document.get('format')!r}")
+    version = document.get("version")
+    if isinstance(version, bool) or not isinstance(version, int) or version < 1:
+        raise ValueError("version must be a positive integer")
+
+    diseases = document.get("diseases")
+    if not isinstance(diseases, dict) or not diseases:
+        raise ValueError("diseases must map disease names to symptom lists")
+    for disease, symptoms in diseases.items():
+        if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+            raise ValueError(f"diseases[{disease!r}] must be a list of symptom names")
+
+    symptom_weights = document.get("symptom_weights")
+    if not isinstance(symptom_weights, dict) or not symptom_weights:
+        raise ValueError("symptom_weights must map symptoms to {disease: weight}")
+    for symptom, weights in symptom_weights.items():
+        if not isinstance(weights, dict):
+            raise ValueError(f"symptom_weights[{symptom!r}] must map diseases to weights")
+        for disease, weight in weights.items():
+            if disease not in diseases:
+                raise ValueError(f"symptom_weights[{symptom!r}] names unknown disease {disease!r}")
+            _number(weight, f"symptom_weights[{symptom!r}][{disease!r}]")
+
+    multipliers = {}
+    for field in ("low_bp_multipliers", "fever_multipliers"):
+        table = document.get(field, {})
+        if not isinstance(table, dict):
+            raise ValueError(f"{field} must map diseases to multipliers")
+        for disease, multiplier in table.items():
+            if disease not in diseases:
+                raise ValueError(f"{field} names unknown disease {disease!r}")
+            _number(multiplier, f"{field}[{disease!r}]")
+        multipliers[field] = table
+
+    variations = document.get("symptom_variations", {})
+    if not isinstance(variations, dict) or not all(
+        isinstance(v, list) and all(isinstance(s, str) for s in v) for v in variations.values()
+    ):
+        raise ValueError("symptom_variations must map symptoms to lists of phrases")
+
+    thresholds = document.get("risk_thresholds", {})
+    if not isinstance(thresholds, dict):
+        raise ValueError("risk_thresholds must be an object")
+    for name, value in thresholds.items():
+        if name not in RISK_THRESHOLDS:
+            raise ValueError(f"unknown risk threshold {name!r}")
+        _number(value, f"risk_thresholds[{name!r}]")
+        # Points are added to an integer score
+        if name.endswith("_points") and not isinstance(value, int):
+            raise ValueError(f"risk_thresholds[{name!r}] must be an integer")
+
+    return CompiledModel(
+        symptom_weights,
+        diseases,
+        multipliers["low_bp_multipliers"],
+        multipliers["fever_multipliers"],
+        variations,
+        thresholds,
+        version=version,
+        source=source,
+    )
+
+
+def load_model(path: str) -> CompiledModel:
+    """Load and compile one model file; its version must match the file name"""
+    with open(path, encoding="utf-8") as f:
+        try:
+            document = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: not valid JSON ({e})")
+    try:
+        model = model_from_dict(document, source=path)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}")
+    match = FILE_PATTERN.match(os.path.basename(path))
+    if match and int(match.group(1)) != model.version:
+        raise ValueError(f"{path}: file name says version {match.group(1)}, contents say {model.version}")
+    return model
+
+
+def activate_model_file(path: str) -> CompiledModel:
+    """Load a model file and make it the active model; also a process pool initializer"""
+    model = load_model(path)
+    prediction.activate_model(model)
+    return model
+
+
+def save_model(model: CompiledModel, directory: str = DEFAULT_MODEL_DIR, version: Optional[int] = None) -> str:
+    """Write a model file atomically, so a watcher never sees it half-written; returns its path"""
+    document = model_to_dict(model, version)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, model_file_name(document["version"]))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def model_versions(directory: str = DEFAULT_MODEL_DIR) -> List[Tuple[int, str]]:
+    """(version, path) of every model file in directory, oldest first"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        match = FILE_PATTERN.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+class ModelWatcher:
+    """
+    Polls a model directory and activates the newest version above the active one
+    A file that fails to load is logged and skipped until it changes (e.g. a copy that was
+    still being written when polled); the current model stays active
+    """
+
+    def __init__(self, directory: str = DEFAULT_MODEL_DIR, interval: float = 5.0):
+        self.directory = directory
+        self.interval = interval
+        self.errors: Dict[str, str] = {}
+        # (mtime_ns, size) of each file when it failed to load
+        self._failed: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> Optional[CompiledModel]:
+        """Activate the newest loadable version newer than the active model; returns it if one was"""
+        active = prediction.get_active_model().version
+        for version, path in reversed(model_versions(self.directory)):
+            if version <= active:
+                return None
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self._failed.get(path) == signature:
+                continue
+            try:
+                model = load_model(path)
+            except (OSError, ValueError) as e:
+                self._failed[path] = signature
+                self.errors[path] = str(e)
+                logger.error("Skipping model file: %s", e)
+                continue
+            self._failed.pop(path, None)
+            self.errors.pop(path, None)
+            prediction.activate_model(model)
+            logger.info("Activated model v%d from %s", model.version, path)
+            return model
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Model watcher check failed")
+
+    def start(self) -> "ModelWatcher":
+        """Check once now, then keep polling from a daemon thread"""
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export or validate versioned model files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write the built-in model as a model file")
+    export.add_argument("--dir", default=DEFAULT_MODEL_DIR)
+    export.add_argument("--version", type=int, default=1)
+    check = sub.add_parser("check", help="Validate model files")
+    check.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(save_model(prediction.builtin_model(), args.dir, args.version))
+        return 0
+
+    failed = 0
+    for path in args.paths:
+        try:
+            model = load_model(path)
+        except (OSError, ValueError) as e:
+            print(f"FAIL {e}")
+            failed += 1
+            continue
+        print(f"OK   {path}: v{model.version}, {len(model.disease_symptoms)} diseases, "
+              f"{len(model.symptom_weights)} symptoms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Streaming columnar export of patient records (Parquet or Arrow IPC file)
+Records are pulled from PatientStore.iter_records and written one row group at a time,
+so memory stays flat whatever the record count. pyarrow is imported on first use.
+
+Columns: id, created_at (timestamp, UTC), name, age, gender, city, phone,
+symptoms (list<string>), vitals (struct<bp_systolic, bp_diastolic, temperature>),
+disease, confidence, risk_level, risk_score
+
+Usage:
+    python patient_export.py patients.parquet [--format arrow] [--db patients.db] [--risk-level HIGH]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+from storage import DEFAULT_DB_PATH, FILTER_COLUMNS, PatientStore
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MIME_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.file"}
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+_SCHEMA = None
+
+
+def patient_schema():
+    """Arrow schema of the exported records"""
+    global _SCHEMA
+    if _SCHEMA is None:
+        import pyarrow as pa
+
+        _SCHEMA = pa.schema([
+            ("id", pa.int64()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("name", pa.string()),
+            ("age", pa.int32()),
+            ("gender", pa.string()),
+            ("city", pa.string()),
+            ("phone", pa.string()),
+            ("symptoms", pa.list_(pa.string())),
+            ("vitals", pa.struct([
+                ("bp_systolic", pa.int32()),
+                ("bp_diastolic", pa.int32()),
+                ("temperature", pa.float64()),
+            ])),
+            ("disease", pa.string()),
+            ("confidence", pa.float64()),
+            ("risk_level", pa.string()),
+            ("risk_score", pa.int32()),
+        ])
+    return _SCHEMA
+
+
+def record_batch(records: List[Dict]):
+    """Convert patient record dicts (as returned by PatientStore) into one Arrow record batch"""
+    import pyarrow as pa
+
+    schema = patient_schema()
+    columns = []
+    for field in schema:
+        if field.name == "created_at":
+            # Stored as epoch seconds
+            values = [None if r.get("created_at") is None else round(r["created_at"] * 1_000_000) for r in records]
+        elif field.name == "vitals":
+            values = [r.get("vitals") or None for r in records]
+        else:
+            values = [r.get(field.name) for r in records]
+        columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def iter_record_batches(records: Iterable[Dict], batch_size: int = DEFAULT_ROW_GROUP_SIZE) -> Iterator:
+    """Record batches of at most batch_size rows; only one batch of dicts is held at a time"""
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, batch_size))
+        if not chunk:
+            return
+        yield record_batch(chunk)
+
+
+def export_patients(
+    records: Iterable[Dict],
+    dest: Union[str, BinaryIO],
+    format: str = "parquet",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Stream records into a Parquet file (one row group per batch, zstd) or an Arrow IPC file
+    (one record batch per batch). Returns the number of records written.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format {format!r}; expected one of {', '.join(FORMATS)}")
+    import pyarrow as pa
+
+    schema = patient_schema()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(dest, schema, compression="zstd")
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = pa.ipc.new_file(dest, schema)
+        write = writer.write_batch
+
+    written = 0
+    with writer:
+        for batch in iter_record_batches(records, row_group_size):
+            write(batch)
+            written += batch.num_rows
+    return written
+
+
+def export_store(
+    store: PatientStore,
+    dest: Union[str, BinaryIO],
+    format: str = "parquet",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    **filters: Optional[str],
+) -> int:
+    """Export every patient matching the equality filters (see PatientStore.iter_records)"""
+    records = store.iter_records(batch_size=min(row_group_size, 1000), **filters)
+    return export_patients(records, dest, format, row_group_size)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export patient records to Parquet or Arrow IPC")
+    parser.add_argument("output", help="Output file")
+    parser.add_argument("--format", choices=list(FORMATS), default=None,
+                        help="Default: from the output extension, else parquet")
+    parser.add_argument("--db", default=os.environ.get("HEALTHCARE_DB_PATH", DEFAULT_DB_PATH))
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    for column in FILTER_COLUMNS:
+        parser.add_argument(f"--{column.replace('_', '-')}", dest=column, default=None,
+                            help=f"Only patients with this {column}")
+    args = parser.parse_args(argv)
+
+    format = args.format or next(
+        (name for name, ext in FORMATS.items() if args.output.endswith(ext)), "parquet"
+    )
+    started = time.perf_counter()
+    written = export_store(
+        PatientStore(args.db), args.output, format, args.row_group_size,
+        **{column: getattr(args, column) for column in FILTER_COLUMNS},
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Exported {written:,} patients to {args.output} ({format}) in {elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
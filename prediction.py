@@ -3,8 +3,19 @@ Disease prediction and risk classification logic
 Maps symptoms to diseases and calculates risk levels
 """
 
-from typing import Dict, List, Tuple
-from data import DISEASE_SYMPTOMS
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+from data import DISEASE_SYMPTOMS, get_city_trend, get_city_trend_signature
+from lexicon import SymptomLexicon
+
+logger = logging.getLogger(__name__)
 
 
 # Symptom to disease matching weights
@@ -33,48 +44,75 @@ SYMPTOM_WEIGHTS: Dict[str, Dict[str, float]] = {
     "loss of taste": {"Dengue": 0.2, "Typhoid": 0.2, "Flu": 0.3, "TB": 0.2, "Malaria": 0.2, "COVID-19": 0.8},
 }
 
+# Vitals adjustments: score multipliers applied for low BP and high temperature
+LOW_BP_MULTIPLIERS: Dict[str, float] = {"Dengue": 1.2, "Typhoid": 1.15}
+FEVER_MULTIPLIERS: Dict[str, float] = {
+    "Dengue": 1.1, "Typhoid": 1.1, "Flu": 1.1, "Malaria": 1.1, "COVID-19": 1.1,
+}
+
+# Points and cut-offs used by classify_risk
+RISK_THRESHOLDS: Dict[str, float] = {
+    "senior_age": 50, "senior_points": 15,
+    "elderly_age": 65, "elderly_points": 30,
+    "few_symptoms": 2, "few_symptoms_points": 20,
+    "many_symptoms": 4, "many_symptoms_points": 35,
+    "single_symptom_points": 10,
+    "low_bp_systolic": 90, "low_bp_diastolic": 60,
+    "high_bp_systolic": 140, "high_bp_diastolic": 90,
+    "abnormal_bp_points": 20,
+    "fever_temperature": 101, "fever_points": 15,
+    "confidence_weight": 0.3,
+    "trend_points": 10, "trend_fallback_confidence": 70,
+    "medium_risk": 40, "high_risk": 70,
+}
+
+
+# Common ways of saying a symptom, mapped to the SYMPTOM_WEIGHTS name
+SYMPTOM_VARIATIONS: Dict[str, List[str]] = {
+    "fever": ["fever", "high temperature", "temp"],
+    "headache": ["headache", "head pain", "head ache"],
+    "cough": ["cough", "coughing"],
+    "breathing difficulty": ["breathing difficulty", "shortness of breath", "breathlessness", "difficulty breathing"],
+    "body ache": ["body ache", "body pain", "muscle pain", "aches"],
+    "stomach pain": ["stomach pain", "abdominal pain", "belly pain"],
+}
+
 
 def normalize_symptom_name(symptom: str) -> str:
     """Normalize symptom name to lowercase and handle variations"""
-    symptom = symptom.lower().strip()
-    # Handle common variations
-    variations = {
-        "fever": ["fever", "high temperature", "temp"],
-        "headache": ["headache", "head pain", "head ache"],
-        "cough": ["cough", "coughing"],
-        "breathing difficulty": ["breathing difficulty", "shortness of breath", "breathlessness", "difficulty breathing"],
-        "body ache": ["body ache", "body pain", "muscle pain", "aches"],
-        "stomach pain": ["stomach pain", "abdominal pain", "belly pain"],
-    }
-    
-    for standard, variants in variations.items():
-        if symptom in variants:
-            return standard
-    
-    return symptom
+    return _ACTIVE_MODEL.lexicon.normalize(symptom)
 
 
-def predict_disease(symptoms: List[str], age: int, city: str, vitals: Dict[str, float]) -> Tuple[str, float]:
+def extract_symptoms(text: str) -> List[str]:
+    """Extract canonical symptom names mentioned in free text (e.g. voice input)"""
+    return _ACTIVE_MODEL.lexicon.extract(text)
+
+
+def predict_disease(
+    symptoms: List[str], age: int, city: str, vitals: Dict[str, float], model: Optional["CompiledModel"] = None
+) -> Tuple[str, float]:
     """
     Predict disease based on symptoms, age, city, and vitals
     Returns: (disease_name, confidence_percentage)
     """
     if not symptoms:
         return "No Disease", 0.0
+    model = model or _ACTIVE_MODEL
+    symptom_weights = model.symptom_weights
     
     # Normalize symptoms
-    normalized_symptoms = [normalize_symptom_name(s) for s in symptoms]
+    normalized_symptoms = [model.lexicon.normalize(s) for s in symptoms]
     
     # Calculate scores for each disease
     disease_scores: Dict[str, float] = {}
     
-    for disease in DISEASE_SYMPTOMS.keys():
+    for disease in model.disease_symptoms.keys():
         score = 0.0
         matched_symptoms = 0
         
         for symptom in normalized_symptoms:
-            if symptom in SYMPTOM_WEIGHTS and disease in SYMPTOM_WEIGHTS[symptom]:
-                score += SYMPTOM_WEIGHTS[symptom][disease]
+            if symptom in symptom_weights and disease in symptom_weights[symptom]:
+                score += symptom_weights[symptom][disease]
                 matched_symptoms += 1
         
         # Average score weighted by number of matched symptoms
@@ -91,13 +129,13 @@ def predict_disease(symptoms: List[str], age: int, city: str, vitals: Dict[str,
         
         # Low BP increases risk for Dengue/Typhoid
         if bp_systolic < 90 or bp_diastolic < 60:
-            disease_scores["Dengue"] *= 1.2
-            disease_scores["Typhoid"] *= 1.15
+            for disease, multiplier in model.low_bp_multipliers.items():
+                disease_scores[disease] *= multiplier
         
         # High temperature increases all fever-related diseases
         if temperature > 100:
-            for disease in ["Dengue", "Typhoid", "Flu", "Malaria", "COVID-19"]:
-                disease_scores[disease] *= 1.1
+            for disease, multiplier in model.fever_multipliers.items():
+                disease_scores[disease] *= multiplier
     
     # Get top disease
     if not disease_scores or max(disease_scores.values()) < 30:
@@ -107,13 +145,328 @@ def predict_disease(symptoms: List[str], age: int, city: str, vitals: Dict[str,
     return top_disease[0], min(top_disease[1], 100.0)
 
 
+# ==================== BATCH SCORING ====================
+class ScoringModel:
+    """
+    SYMPTOM_WEIGHTS compiled into dense symptom x disease matrices
+    Row `pad_index` is all zeros and stands for unknown symptoms / empty slots
+    """
+
+    def __init__(
+        self,
+        symptom_weights: Dict[str, Dict[str, float]],
+        diseases: Sequence[str],
+        low_bp_multipliers: Dict[str, float],
+        fever_multipliers: Dict[str, float],
+        normalize: Callable[[str], str] = normalize_symptom_name,
+    ):
+        self.normalize = normalize
+        self.symptoms: List[str] = list(symptom_weights)
+        self.diseases: List[str] = list(diseases)
+        self.symptom_index: Dict[str, int] = {s: i for i, s in enumerate(self.symptoms)}
+        disease_index = {d: j for j, d in enumerate(self.diseases)}
+        self.pad_index = len(self.symptoms)
+
+        shape = (len(self.symptoms) + 1, len(self.diseases))
+        self.weights = np.zeros(shape, dtype=np.float64)
+        self.matches = np.zeros(shape, dtype=np.int64)
+        for i, symptom in enumerate(self.symptoms):
+            for disease, weight in symptom_weights[symptom].items():
+                if disease in disease_index:
+                    self.weights[i, disease_index[disease]] = weight
+                    self.matches[i, disease_index[disease]] = 1
+        # Weights and match counts side by side, so scoring gathers each slot once
+        self._weights_and_matches = np.hstack([self.weights, self.matches.astype(np.float64)])
+
+        self.low_bp_multipliers = np.ones(len(self.diseases), dtype=np.float64)
+        for disease, multiplier in low_bp_multipliers.items():
+            self.low_bp_multipliers[disease_index[disease]] = multiplier
+        self.fever_multipliers = np.ones(len(self.diseases), dtype=np.float64)
+        for disease, multiplier in fever_multipliers.items():
+            self.fever_multipliers[disease_index[disease]] = multiplier
+
+    def encode(self, symptoms_batch: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        Encode symptom lists as a (batch, slots) matrix of symptom indices
+        Slots keep the input order so scores are summed exactly like predict_disease
+        """
+        lengths = np.fromiter(map(len, symptoms_batch), dtype=np.intp, count=len(symptoms_batch))
+        width = int(lengths.max()) if len(lengths) else 0
+        slots = np.full((len(symptoms_batch), width), self.pad_index, dtype=np.intp)
+        flat = list(itertools.chain.from_iterable(symptoms_batch))
+        if not flat:
+            return slots
+        # Each distinct string is normalized once; the per-symptom work is a C-level dict lookup
+        lookup = dict.fromkeys(flat)
+        for symptom in lookup:
+            lookup[symptom] = self.symptom_index.get(self.normalize(symptom), self.pad_index)
+        indices = np.array(list(map(lookup.__getitem__, flat)), dtype=np.intp)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        slots[rows, cols] = indices
+        return slots
+
+    def encode_masks(self, masks: np.ndarray) -> np.ndarray:
+        """
+        Encode symptom bitmasks (bit i = self.symptoms[i], as in records.py) without a Python loop
+        Slots follow ascending bit order, i.e. the order decode_symptoms lists the symptoms in
+        """
+        masks = np.asarray(masks, dtype=np.int64)
+        bits = ((masks[:, None] >> np.arange(len(self.symptoms))) & 1).astype(bool)
+        return np.where(bits, np.arange(len(self.symptoms)), self.pad_index)
+
+    def score(
+        self,
+        slots: np.ndarray,
+        bp_systolic: np.ndarray,
+        bp_diastolic: np.ndarray,
+        temperature: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of encoded symptom slots with vectorized vitals adjustments
+        Returns: (disease_index, confidence) arrays, disease_index -1 meaning "No Disease"
+        """
+        batch = slots.shape[0]
+        n_diseases = len(self.diseases)
+        totals = np.zeros((batch, 2 * n_diseases), dtype=np.float64)
+        # Accumulate slot by slot: padding adds exact zeros and the float
+        # additions happen in the same order as the scalar loop (match counts are exact)
+        for col in range(slots.shape[1]):
+            totals += self._weights_and_matches[slots[:, col]]
+        scores, matched = totals[:, :n_diseases], totals[:, n_diseases:]
+
+        np.divide(scores, matched, out=scores, where=matched > 0)
+        scores *= 100
+
+        low_bp = (np.asarray(bp_systolic) < 90) | (np.asarray(bp_diastolic) < 60)
+        scores[low_bp] *= self.low_bp_multipliers
+        fever = np.asarray(temperature) > 100
+        scores[fever] *= self.fever_multipliers
+
+        top = np.argmax(scores, axis=1) if len(self.diseases) else np.zeros(batch, dtype=np.intp)
+        best = scores[np.arange(batch), top] if len(self.diseases) else np.zeros(batch)
+        no_disease = best < 30
+        disease_index = np.where(no_disease, -1, top)
+        confidence = np.where(no_disease, 0.0, np.minimum(best, 100.0))
+        return disease_index, confidence
+
+
+# ==================== DIFFERENTIAL DIAGNOSIS ====================
+class SparseScoringModel:
+    """
+    Inverted index symptom → (disease indices, weights) for large disease catalogs
+    Scoring touches only the postings of the symptoms present, not every disease
+    """
+
+    def __init__(
+        self,
+        symptom_weights: Dict[str, Dict[str, float]],
+        diseases: Sequence[str],
+        low_bp_multipliers: Dict[str, float],
+        fever_multipliers: Dict[str, float],
+        normalize: Callable[[str], str] = normalize_symptom_name,
+    ):
+        self.normalize = normalize
+        self.diseases: List[str] = list(diseases)
+        disease_index = {d: j for j, d in enumerate(self.diseases)}
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for symptom, weights in symptom_weights.items():
+            entries = [(disease_index[d], w) for d, w in weights.items() if d in disease_index]
+            self.postings[symptom] = (
+                np.array([d for d, _ in entries], dtype=np.intp),
+                np.array([w for _, w in entries], dtype=np.float64),
+            )
+        self.low_bp_multipliers = np.ones(len(self.diseases), dtype=np.float64)
+        for disease, multiplier in low_bp_multipliers.items():
+            if disease in disease_index:
+                self.low_bp_multipliers[disease_index[disease]] = multiplier
+        self.fever_multipliers = np.ones(len(self.diseases), dtype=np.float64)
+        for disease, multiplier in fever_multipliers.items():
+            if disease in disease_index:
+                self.fever_multipliers[disease_index[disease]] = multiplier
+
+    def scores(
+        self, symptoms: List[str], vitals: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(disease indices, confidences) for every disease matching at least one symptom"""
+        postings = [self.postings.get(self.normalize(s)) for s in symptoms]
+        postings = [p for p in postings if p is not None and len(p[0])]
+        if not postings:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        # Postings are concatenated in symptom order and bincount adds in input order,
+        # so each disease's sum is accumulated exactly like predict_disease
+        touched, slot = np.unique(np.concatenate([d for d, _ in postings]), return_inverse=True)
+        totals = np.bincount(slot, weights=np.concatenate([w for _, w in postings]), minlength=len(touched))
+        matched = np.bincount(slot, minlength=len(touched))
+        scores = (totals / matched) * 100
+        
+        if vitals:
+            if vitals.get("bp_systolic", 120) < 90 or vitals.get("bp_diastolic", 80) < 60:
+                scores *= self.low_bp_multipliers[touched]
+            if vitals.get("temperature", 98.6) > 100:
+                scores *= self.fever_multipliers[touched]
+        return touched, scores
+
+    def top_k(
+        self, symptoms: List[str], vitals: Optional[Dict[str, float]] = None, k: int = 5, min_confidence: float = 0.0
+    ) -> List[Tuple[str, float]]:
+        """Ranked (disease, confidence) differential; ties rank in catalog order like predict_disease"""
+        if k <= 0:
+            return []
+        touched, scores = self.scores(symptoms, vitals)
+        # Filter on the confidence as reported, i.e. capped at 100
+        keep = np.minimum(scores, 100.0) >= min_confidence
+        touched, scores = touched[keep], scores[keep]
+        if len(scores) > k:
+            # Everything tied with the k-th best stays in, so ties are broken by catalog order below
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= kth
+            touched, scores = touched[keep], scores[keep]
+        order = np.lexsort((touched, -scores))[:k]
+        return [(self.diseases[d], min(c, 100.0)) for d, c in zip(touched[order].tolist(), scores[order].tolist())]
+
+
+# ==================== ACTIVE MODEL ====================
+class CompiledModel:
+    """
+    One version of the weights, disease catalog and risk thresholds, compiled into the
+    lexicon and scoring structures. Never mutated once built: a new version is a new
+    CompiledModel swapped in by activate_model(), so an analysis that grabbed this one
+    finishes on it
+    """
+
+    def __init__(
+        self,
+        symptom_weights: Dict[str, Dict[str, float]],
+        disease_symptoms: Dict[str, List[str]],
+        low_bp_multipliers: Dict[str, float],
+        fever_multipliers: Dict[str, float],
+        symptom_variations: Optional[Dict[str, List[str]]] = None,
+        risk_thresholds: Optional[Dict[str, float]] = None,
+        version: int = 0,
+        source: str = "built-in",
+    ):
+        self.version = version
+        self.source = source
+        self.symptom_weights = symptom_weights
+        self.disease_symptoms = disease_symptoms
+        self.low_bp_multipliers = low_bp_multipliers
+        self.fever_multipliers = fever_multipliers
+        self.symptom_variations = symptom_variations if symptom_variations is not None else {}
+        self._risk_threshold_source = risk_thresholds
+        # Thresholds missing from a model file keep the built-in values
+        self.risk_thresholds: Dict[str, float] = {**RISK_THRESHOLDS, **(risk_thresholds or {})}
+        
+        self.lexicon = SymptomLexicon(symptom_weights.keys(), self.symptom_variations)
+        diseases = list(disease_symptoms.keys())
+        self.scoring = ScoringModel(
+            symptom_weights, diseases, low_bp_multipliers, fever_multipliers, self.lexicon.normalize
+        )
+        self.sparse = SparseScoringModel(
+            symptom_weights, diseases, low_bp_multipliers, fever_multipliers, self.lexicon.normalize
+        )
+
+    def recompiled(self) -> "CompiledModel":
+        """A fresh compilation of the same source tables (picks up in-place edits)"""
+        return CompiledModel(
+            self.symptom_weights, self.disease_symptoms, self.low_bp_multipliers, self.fever_multipliers,
+            self.symptom_variations, self._risk_threshold_source, self.version, self.source,
+        )
+
+
+def builtin_model() -> CompiledModel:
+    """The model defined by the literals in this module (version 0)"""
+    return CompiledModel(
+        SYMPTOM_WEIGHTS, DISEASE_SYMPTOMS, LOW_BP_MULTIPLIERS, FEVER_MULTIPLIERS, SYMPTOM_VARIATIONS, RISK_THRESHOLDS
+    )
+
+
+# Swapped as a whole by activate_model(); readers take one reference per analysis
+_ACTIVE_MODEL: CompiledModel = builtin_model()
+_MODEL_LOCK = threading.Lock()
+
+
+def get_active_model() -> CompiledModel:
+    return _ACTIVE_MODEL
+
+
+def get_scoring_model() -> ScoringModel:
+    """Dense scoring structures of the active model"""
+    return _ACTIVE_MODEL.scoring
+
+
+def get_sparse_model() -> SparseScoringModel:
+    """Inverted-index scoring structures of the active model"""
+    return _ACTIVE_MODEL.sparse
+
+
+def activate_model(model: CompiledModel):
+    """
+    Make model the active one. Analyses already running keep the model they started with;
+    cached results and a prediction table built from other weights are dropped
+    """
+    global _ACTIVE_MODEL, _PREDICTION_TABLE
+    with _MODEL_LOCK:
+        _ACTIVE_MODEL = model
+        table = _PREDICTION_TABLE
+        if table is not None and not table.is_current():
+            _PREDICTION_TABLE = None
+            logger.warning(
+                "Table mode is off: prediction table %s was not built from model v%d; rebuild it with "
+                "python prediction_table.py build --model <model file>", table.path, model.version,
+            )
+        PREDICTION_CACHE.clear()
+
+
+def predict_differential(
+    symptoms: List[str], vitals: Optional[Dict[str, float]] = None, k: int = 5, min_confidence: float = 0.0
+) -> List[Tuple[str, float]]:
+    """
+    Top-k differential diagnosis: (disease, confidence) pairs, best first
+    Confidences are computed exactly as in predict_disease, whose answer is the first
+    entry when it is at least 30%
+    """
+    return _ACTIVE_MODEL.sparse.top_k(symptoms, vitals, k, min_confidence)
+
+
+def vitals_columns(
+    vitals_batch: Optional[Sequence[Optional[Dict[str, float]]]], size: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split a list of vitals dicts into (bp_systolic, bp_diastolic, temperature) columns"""
+    if vitals_batch is None:
+        return np.full(size, 120.0), np.full(size, 80.0), np.full(size, 98.6)
+    present = [vitals or {} for vitals in vitals_batch]
+    return (
+        np.array([vitals.get("bp_systolic", 120) for vitals in present], dtype=np.float64),
+        np.array([vitals.get("bp_diastolic", 80) for vitals in present], dtype=np.float64),
+        np.array([vitals.get("temperature", 98.6) for vitals in present], dtype=np.float64),
+    )
+
+
+def predict_diseases_batch(
+    symptoms_batch: Sequence[Sequence[str]],
+    vitals_batch: Optional[Sequence[Optional[Dict[str, float]]]] = None,
+    model: Optional[CompiledModel] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Predict diseases for many patients at once
+    Returns the same (disease_name, confidence_percentage) pairs as predict_disease
+    """
+    model = (model or _ACTIVE_MODEL).scoring
+    slots = model.encode(symptoms_batch)
+    disease_index, confidence = model.score(slots, *vitals_columns(vitals_batch, len(symptoms_batch)))
+    names = model.diseases + ["No Disease"]
+    return [(names[d], c) for d, c in zip(disease_index.tolist(), confidence.tolist())]
+
+
 def classify_risk(
     age: int,
     symptoms: List[str],
     vitals: Dict[str, float],
     city: str,
     disease: str,
-    disease_confidence: float
+    disease_confidence: float,
+    thresholds: Optional[Dict[str, float]] = None,
 ) -> Tuple[str, int]:
     """
     Classify risk level: HIGH, MEDIUM, or LOW
@@ -122,23 +475,25 @@ def classify_risk(
     HIGH: Elderly + multiple symptoms + rising city trend
     MEDIUM: 2+ symptoms OR abnormal vitals
     LOW: 1 symptom + normal vitals
+    Thresholds default to the active model's risk_thresholds
     """
+    t = thresholds or _ACTIVE_MODEL.risk_thresholds
     risk_score = 0
     
     # Age factor (elderly = higher risk)
-    if age >= 65:
-        risk_score += 30
-    elif age >= 50:
-        risk_score += 15
+    if age >= t["elderly_age"]:
+        risk_score += t["elderly_points"]
+    elif age >= t["senior_age"]:
+        risk_score += t["senior_points"]
     
     # Symptom count
     symptom_count = len(symptoms)
-    if symptom_count >= 4:
-        risk_score += 35
-    elif symptom_count >= 2:
-        risk_score += 20
+    if symptom_count >= t["many_symptoms"]:
+        risk_score += t["many_symptoms_points"]
+    elif symptom_count >= t["few_symptoms"]:
+        risk_score += t["few_symptoms_points"]
     else:
-        risk_score += 10
+        risk_score += t["single_symptom_points"]
     
     # Vitals check
     if vitals:
@@ -147,28 +502,320 @@ def classify_risk(
         temperature = vitals.get("temperature", 98.6)
         
         # Abnormal vitals
-        if bp_systolic < 90 or bp_diastolic < 60 or bp_systolic > 140 or bp_diastolic > 90:
-            risk_score += 20
+        if (bp_systolic < t["low_bp_systolic"] or bp_diastolic < t["low_bp_diastolic"]
+                or bp_systolic > t["high_bp_systolic"] or bp_diastolic > t["high_bp_diastolic"]):
+            risk_score += t["abnormal_bp_points"]
         
-        if temperature > 101:
-            risk_score += 15
+        if temperature > t["fever_temperature"]:
+            risk_score += t["fever_points"]
     
     # Disease confidence
-    risk_score += int(disease_confidence * 0.3)
+    risk_score += int(disease_confidence * t["confidence_weight"])
     
-    # City trend factor (would need to check if disease is rising in city)
-    # For now, add small boost if confidence is high
-    if disease_confidence > 70:
-        risk_score += 10
+    # City trend factor: boost diseases rising in the patient's city; without
+    # trend data for the pair, fall back to a boost for high-confidence predictions
+    risk_score += city_trend_boost(city, disease, disease_confidence, t)
     
     # Cap at 100
     risk_score = min(risk_score, 100)
     
     # Classify
-    if risk_score >= 70:
+    if risk_score >= t["high_risk"]:
         return "HIGH", risk_score
-    elif risk_score >= 40:
+    elif risk_score >= t["medium_risk"]:
         return "MEDIUM", risk_score
     else:
         return "LOW", risk_score
 
+
+
+def city_trend_boost(
+    city: str, disease: str, disease_confidence: float, thresholds: Optional[Dict[str, float]] = None
+) -> int:
+    """Risk points from the city trend index: trend_points if the disease is rising in the city"""
+    t = thresholds or _ACTIVE_MODEL.risk_thresholds
+    trend = get_city_trend(city, disease)
+    if trend is None:
+        return t["trend_points"] if disease_confidence > t["trend_fallback_confidence"] else 0
+    return t["trend_points"] if trend[0] == "↑" else 0
+
+
+def _factorize(values: Sequence[Hashable]) -> Tuple[List, np.ndarray]:
+    """(distinct values in first-seen order, index of each value into them)"""
+    distinct = list(dict.fromkeys(values))
+    lookup = {value: i for i, value in enumerate(distinct)}
+    return distinct, np.array(list(map(lookup.__getitem__, values)), dtype=np.intp)
+
+
+def _trend_codes(
+    city_names: Sequence[str], city_ids: np.ndarray, disease_names: Sequence[str], disease_ids: np.ndarray,
+    trend_points: int,
+) -> np.ndarray:
+    """city_trend_codes over factorized columns: each distinct pair is looked up once, then expanded"""
+    width = max(len(disease_names), 1)
+    pair_ids = city_ids * width + disease_ids
+    space = len(city_names) * width
+    if space <= 4 * len(pair_ids) + 1024:
+        # Small pair space: mark the pairs present instead of sorting
+        present = np.zeros(space, dtype=bool)
+        present[pair_ids] = True
+        pairs, inverse = np.flatnonzero(present), None
+    else:
+        pairs, inverse = np.unique(pair_ids, return_inverse=True)
+    codes = np.empty(len(pairs), dtype=np.int64)
+    for k, (city, disease) in enumerate(zip((pairs // width).tolist(), (pairs % width).tolist())):
+        trend = get_city_trend(city_names[city], disease_names[disease])
+        codes[k] = -1 if trend is None else trend_points if trend[0] == "↑" else 0
+    if inverse is None:
+        table = np.empty(space, dtype=np.int64)
+        table[pairs] = codes
+        return table[pair_ids]
+    return codes[inverse.reshape(-1)]
+
+
+def city_trend_codes(cities: Sequence[str], diseases: Sequence[str], trend_points: int = 10) -> np.ndarray:
+    """
+    Trend factor inputs for classify_risk_batch: trend_points rising, 0 steady/falling, -1 no data
+    Each distinct (city, disease) pair is looked up once
+    """
+    return _trend_codes(*_factorize(cities), *_factorize(diseases), trend_points)
+
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+
+
+def classify_risk_batch(
+    ages: np.ndarray,
+    symptom_counts: np.ndarray,
+    bp_systolic: np.ndarray,
+    bp_diastolic: np.ndarray,
+    temperature: np.ndarray,
+    disease_confidence: np.ndarray,
+    trend_codes: Optional[np.ndarray] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized classify_risk over column arrays
+    Missing vitals should be passed as the classify_risk defaults (120/80, 98.6°F)
+    trend_codes come from city_trend_codes(); without them every row gets the no-data fallback
+    Returns: (risk_level, risk_percentage) arrays
+    """
+    ages = np.asarray(ages)
+    symptom_counts = np.asarray(symptom_counts)
+    bp_systolic = np.asarray(bp_systolic)
+    bp_diastolic = np.asarray(bp_diastolic)
+    temperature = np.asarray(temperature)
+    disease_confidence = np.asarray(disease_confidence, dtype=np.float64)
+    t = thresholds or _ACTIVE_MODEL.risk_thresholds
+
+    # Age factor
+    risk_score = np.where(
+        ages >= t["elderly_age"], t["elderly_points"], np.where(ages >= t["senior_age"], t["senior_points"], 0)
+    ).astype(np.int64)
+    
+    # Symptom count
+    risk_score += np.where(
+        symptom_counts >= t["many_symptoms"], t["many_symptoms_points"],
+        np.where(symptom_counts >= t["few_symptoms"], t["few_symptoms_points"], t["single_symptom_points"]),
+    )
+    
+    # Abnormal vitals
+    abnormal_bp = (
+        (bp_systolic < t["low_bp_systolic"]) | (bp_diastolic < t["low_bp_diastolic"])
+        | (bp_systolic > t["high_bp_systolic"]) | (bp_diastolic > t["high_bp_diastolic"])
+    )
+    risk_score += np.where(abnormal_bp, t["abnormal_bp_points"], 0)
+    risk_score += np.where(temperature > t["fever_temperature"], t["fever_points"], 0)
+    
+    # Disease confidence (int() truncates toward zero)
+    risk_score += np.trunc(disease_confidence * t["confidence_weight"]).astype(np.int64)
+    fallback = np.where(disease_confidence > t["trend_fallback_confidence"], t["trend_points"], 0)
+    risk_score += fallback if trend_codes is None else np.where(np.asarray(trend_codes) < 0, fallback, trend_codes)
+    
+    np.minimum(risk_score, 100, out=risk_score)
+    
+    level_index = np.where(risk_score >= t["high_risk"], 2, np.where(risk_score >= t["medium_risk"], 1, 0))
+    return RISK_LEVELS[level_index], risk_score
+
+
+def analyze_patients_batch(
+    symptoms_batch: Sequence[Sequence[str]],
+    ages: Sequence[int],
+    cities: Sequence[str],
+    vitals_batch: Optional[Sequence[Optional[Dict[str, float]]]] = None,
+) -> List[Tuple[str, float, str, int]]:
+    """
+    predict_diseases_batch + classify_risk_batch for many patients
+    Returns the same (disease, confidence, risk_level, risk_score) as predict_disease + classify_risk
+    The whole batch is scored with the model active when it starts
+    """
+    if not len(symptoms_batch):
+        return []
+    model = _ACTIVE_MODEL
+    thresholds = model.risk_thresholds
+    scoring = model.scoring
+    vitals = vitals_columns(vitals_batch, len(symptoms_batch))
+    disease_index, confidence = scoring.score(scoring.encode(symptoms_batch), *vitals)
+    # "No Disease" (-1) becomes the last name, so disease ids can index names directly
+    names = scoring.diseases + ["No Disease"]
+    disease_ids = np.where(disease_index < 0, len(scoring.diseases), disease_index)
+    risk_levels, risk_scores = classify_risk_batch(
+        np.asarray(ages),
+        np.fromiter(map(len, symptoms_batch), dtype=np.int64, count=len(symptoms_batch)),
+        *vitals,
+        confidence,
+        _trend_codes(*_factorize(cities), names, disease_ids, thresholds["trend_points"]),
+        thresholds,
+    )
+    return list(zip(
+        map(names.__getitem__, disease_ids.tolist()), confidence.tolist(), risk_levels.tolist(), risk_scores.tolist()
+    ))
+
+
+# ==================== RESULT CACHE ====================
+class PredictionCache:
+    """Bounded, thread-safe LRU cache of analyze_patient results"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[str, float, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, float, str, int]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: Tuple[str, float, str, int]):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+PREDICTION_CACHE = PredictionCache()
+
+# Optional precomputed table (see prediction_table.py) consulted on cache misses
+_PREDICTION_TABLE = None
+
+
+def set_prediction_table(table):
+    """Enable table mode with a loaded PredictionTable, or disable it with None"""
+    global _PREDICTION_TABLE
+    _PREDICTION_TABLE = table
+    PREDICTION_CACHE.clear()
+
+
+def _band(value: float, thresholds: Sequence[float]) -> int:
+    """Index of the highest threshold reached (0 when none is)"""
+    return sum(1 for threshold in thresholds if value >= threshold)
+
+
+def analysis_cache_key(
+    symptoms: List[str], age: int, city: str, vitals: Dict[str, float], model: Optional[CompiledModel] = None
+) -> Hashable:
+    """
+    Cache key: model version, the normalized known symptoms in input order (the order
+    predict_disease sums their weights in, so cached results match it exactly) plus the
+    vitals and age bucketed into exactly the thresholds predict_disease/classify_risk branch on,
+    and the city's current trend signature (cities trending alike share entries)
+    """
+    model = model or _ACTIVE_MODEL
+    t = model.risk_thresholds
+    known = tuple(s for s in (model.lexicon.normalize(s) for s in symptoms) if s in model.symptom_weights)
+    
+    vitals = vitals or {}
+    bp_systolic = vitals.get("bp_systolic", 120)
+    bp_diastolic = vitals.get("bp_diastolic", 80)
+    temperature = vitals.get("temperature", 98.6)
+    # predict_disease's low-BP / fever adjustments, then classify_risk's abnormal vitals
+    bp_class = (
+        bp_systolic < 90 or bp_diastolic < 60,
+        bp_systolic < t["low_bp_systolic"] or bp_diastolic < t["low_bp_diastolic"]
+        or bp_systolic > t["high_bp_systolic"] or bp_diastolic > t["high_bp_diastolic"],
+    )
+    temp_class = (temperature > 100, temperature > t["fever_temperature"])
+    
+    return (
+        model.version,
+        known,
+        _band(len(symptoms), (t["few_symptoms"], t["many_symptoms"])),
+        _band(age, (t["senior_age"], t["elderly_age"])),
+        bp_class,
+        temp_class,
+        get_city_trend_signature(city),
+    )
+
+
+def analyze_patient(
+    symptoms: List[str], age: int, city: str, vitals: Dict[str, float]
+) -> Tuple[str, float, str, int]:
+    """
+    predict_disease + classify_risk through PREDICTION_CACHE
+    Returns: (disease_name, confidence_percentage, risk_level, risk_percentage)
+    Scored start to finish with the model active when the call begins
+    """
+    model = _ACTIVE_MODEL
+    key = analysis_cache_key(symptoms, age, city, vitals, model)
+    result = PREDICTION_CACHE.get(key)
+    if result is not None:
+        return result
+    
+    # The table was scored with symptoms in SYMPTOM_WEIGHTS order; other orders can sum
+    # their weights differently, so they go through predict_disease
+    known = key[1]
+    positions = [model.scoring.symptom_index[s] for s in known]
+    in_table_order = all(a < b for a, b in zip(positions, positions[1:]))
+    table = _PREDICTION_TABLE
+    with metrics.span("predict_disease"):
+        if table is not None and model is _ACTIVE_MODEL and in_table_order:
+            disease, confidence = table.predict(list(known), vitals)
+        else:
+            disease, confidence = predict_disease(symptoms, age, city, vitals, model)
+    with metrics.span("classify_risk"):
+        risk_level, risk_score = classify_risk(
+            age, symptoms, vitals, city, disease, confidence, model.risk_thresholds
+        )
+    result = (disease, confidence, risk_level, risk_score)
+    PREDICTION_CACHE.put(key, result)
+    return result
+
+
+def prediction_cache_stats() -> Dict[str, int]:
+    """Hit/miss/eviction counters of the analysis cache"""
+    return PREDICTION_CACHE.stats()
+
+
+def clear_prediction_cache():
+    """
+    Recompile the active model and drop cached results, e.g. after SYMPTOM_WEIGHTS is edited in place
+    Table mode is switched off too, since the table was built from the old weights
+    """
+    global _PREDICTION_TABLE
+    _PREDICTION_TABLE = None
+    activate_model(_ACTIVE_MODEL.recompiled())
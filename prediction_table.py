@@ -0,0 +1,249 @@
+"""
+Table mode: every possible predict_disease input precomputed ahead of time
+Each symptom bitmask x vitals class is scored once into a memory-mapped .npy file,
+so a prediction becomes one bitmask computation plus one array read
+
+Usage:
+    python prediction_table.py build [--path prediction_table.npy] [--workers N] [--model models/weights-v2.json]
+    python prediction_table.py verify [--path prediction_table.npy] [--samples 100000] [--model models/weights-v2.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import prediction
+from model_files import activate_model_file, load_model
+from prediction import ScoringModel, get_scoring_model, normalize_symptom_name, predict_disease
+
+
+DEFAULT_TABLE_PATH = "prediction_table.npy"
+
+# One packed record per input: 9 bytes, disease -1 meaning "No Disease"
+TABLE_DTYPE = np.dtype([("disease", np.int8), ("confidence", np.float64)])
+MAX_TABLE_DISEASES = int(np.iinfo(TABLE_DTYPE["disease"]).max) + 1
+
+# The table has 2^symptoms rows per vitals class: 26 symptoms is already ~2.4 GB
+MAX_TABLE_SYMPTOMS = 26
+
+# predict_disease only branches on low BP (<90/60) and temperature >100,
+# so four vitals classes cover every vitals input. Representative values:
+VITALS_CLASSES: List[Dict[str, float]] = [
+    {"bp_systolic": 120, "bp_diastolic": 80, "temperature": 98.6},
+    {"bp_systolic": 120, "bp_diastolic": 80, "temperature": 101.0},
+    {"bp_systolic": 80, "bp_diastolic": 50, "temperature": 98.6},
+    {"bp_systolic": 80, "bp_diastolic": 50, "temperature": 101.0},
+]
+
+CHUNK_SIZE = 1 << 16
+
+
+def vitals_class(vitals: Optional[Dict[str, float]]) -> int:
+    """Index into VITALS_CLASSES for a vitals dict"""
+    vitals = vitals or {}
+    low_bp = vitals.get("bp_systolic", 120) < 90 or vitals.get("bp_diastolic", 80) < 60
+    fever = vitals.get("temperature", 98.6) > 100
+    return 2 * low_bp + fever
+
+
+def model_fingerprint(model: ScoringModel) -> str:
+    """Hash of everything that affects the table contents"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([model.symptoms, model.diseases]).encode())
+    for array in (model.weights, model.matches, model.low_bp_multipliers, model.fever_multipliers):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def check_table_fits(model: ScoringModel):
+    """Raise ValueError when the model is too large for TABLE_DTYPE or a table file"""
+    if len(model.diseases) > MAX_TABLE_DISEASES:
+        raise ValueError(
+            f"Model has {len(model.diseases)} diseases; the table stores the disease index as int8, "
+            f"so at most {MAX_TABLE_DISEASES} fit"
+        )
+    if len(model.symptoms) > MAX_TABLE_SYMPTOMS:
+        size_gb = len(VITALS_CLASSES) * TABLE_DTYPE.itemsize * (1 << len(model.symptoms)) / 1e9
+        raise ValueError(
+            f"Model has {len(model.symptoms)} symptoms; the table would hold 2^{len(model.symptoms)} rows "
+            f"per vitals class ({size_gb:,.0f} GB), more than the {MAX_TABLE_SYMPTOMS}-symptom limit"
+        )
+
+
+def _metadata_path(path: str) -> str:
+    return path + ".json"
+
+
+def _fill_chunk(path: str, vclass: int, start: int, stop: int):
+    """Score masks [start, stop) for one vitals class and write them into the table file"""
+    model = get_scoring_model()
+    # Ascending symptom order, padding in place of absent symptoms
+    slots = model.encode_masks(np.arange(start, stop, dtype=np.int64))
+
+    vitals = VITALS_CLASSES[vclass]
+    size = stop - start
+    disease_index, confidence = model.score(
+        slots,
+        np.full(size, vitals["bp_systolic"]),
+        np.full(size, vitals["bp_diastolic"]),
+        np.full(size, vitals["temperature"]),
+    )
+
+    table = np.load(path, mmap_mode="r+")
+    table["disease"][vclass, start:stop] = disease_index
+    table["confidence"][vclass, start:stop] = confidence
+    table.flush()
+    del table
+
+
+def build_table(path: str = DEFAULT_TABLE_PATH, workers: Optional[int] = None, model_path: Optional[str] = None) -> str:
+    """
+    Build the full table in parallel; the file is swapped in atomically when done
+    model_path builds it for a model file instead of the active model
+    """
+    model = load_model(model_path).scoring if model_path else get_scoring_model()
+    check_table_fits(model)
+    n_masks = 1 << len(model.symptoms)
+    tmp_path = path + ".tmp.npy"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=TABLE_DTYPE, shape=(len(VITALS_CLASSES), n_masks))
+    del table
+
+    jobs = [
+        (vclass, start, min(start + CHUNK_SIZE, n_masks))
+        for vclass in range(len(VITALS_CLASSES))
+        for start in range(0, n_masks, CHUNK_SIZE)
+    ]
+    # Workers score with the model file when one is given
+    initializer, initargs = (activate_model_file, (model_path,)) if model_path else (None, ())
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        futures = [pool.submit(_fill_chunk, tmp_path, *job) for job in jobs]
+        for future in futures:
+            future.result()
+
+    os.replace(tmp_path, path)
+    with open(_metadata_path(path), "w") as f:
+        json.dump({
+            "fingerprint": model_fingerprint(model),
+            "symptoms": model.symptoms,
+            "diseases": model.diseases,
+        }, f, indent=2)
+    return path
+
+
+class PredictionTable:
+    """Read-only, memory-mapped prediction table"""
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        with open(_metadata_path(path)) as f:
+            metadata = json.load(f)
+        self.path = path
+        self.fingerprint: str = metadata["fingerprint"]
+        self.symptoms: List[str] = metadata["symptoms"]
+        self.diseases: List[str] = metadata["diseases"]
+        self.symptom_bits = {s: 1 << i for i, s in enumerate(self.symptoms)}
+        self.table = np.load(path, mmap_mode="r")
+
+    def is_current(self) -> bool:
+        """Whether the table was built from the weights currently in use"""
+        return self.fingerprint == model_fingerprint(get_scoring_model())
+
+    def symptom_mask(self, symptoms: List[str]) -> Optional[int]:
+        """
+        Bitmask of the known symptoms
+        None when a symptom repeats, since a bitmask cannot represent that
+        """
+        mask = 0
+        for symptom in symptoms:
+            bit = self.symptom_bits.get(normalize_symptom_name(symptom), 0)
+            if mask & bit:
+                return None
+            mask |= bit
+        return mask
+
+    def lookup(self, mask: int, vclass: int) -> Tuple[str, float]:
+        disease, confidence = self.table[vclass, mask].item()
+        return (self.diseases[disease] if disease >= 0 else "No Disease"), confidence
+
+    def predict(self, symptoms: List[str], vitals: Dict[str, float]) -> Tuple[str, float]:
+        """
+        Same result as predict_disease with the symptoms in SYMPTOM_WEIGHTS order
+        Repeated symptoms fall back to predict_disease
+        """
+        mask = self.symptom_mask(symptoms)
+        if mask is None:
+            return predict_disease(symptoms, 0, "", vitals)
+        return self.lookup(mask, vitals_class(vitals))
+
+
+def enable_table_mode(path: str = DEFAULT_TABLE_PATH) -> PredictionTable:
+    """Load a table and route analyze_patient cache misses through it"""
+    table = PredictionTable(path)
+    if not table.is_current():
+        raise ValueError(f"Prediction table {path} was built from different weights; rebuild it")
+    prediction.set_prediction_table(table)
+    return table
+
+
+def verify_table(table: PredictionTable, samples: int = 100_000, seed: int = 0) -> int:
+    """Compare the table against the live predict_disease on random inputs; returns mismatch count"""
+    rng = random.Random(seed)
+    mismatches = 0
+    for _ in range(samples):
+        mask = rng.getrandbits(len(table.symptoms))
+        symptoms = [s for i, s in enumerate(table.symptoms) if mask >> i & 1]
+        vitals = {
+            "bp_systolic": rng.randint(60, 200),
+            "bp_diastolic": rng.randint(40, 150),
+            "temperature": round(rng.uniform(95.0, 106.0), 1),
+        }
+        if table.predict(symptoms, vitals) != predict_disease(symptoms, 0, "", vitals):
+            mismatches += 1
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or verify the precomputed prediction table")
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("--path", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--samples", type=int, default=100_000, help="Random samples checked by verify")
+    parser.add_argument("--model", default=None, help="Model file to build or verify against (default: built-in)")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        try:
+            activate_model_file(args.model)
+        except (OSError, ValueError) as e:
+            print(f"Cannot load model: {e}", file=sys.stderr)
+            return 1
+
+    if args.command == "build":
+        started = time.perf_counter()
+        try:
+            build_table(args.path, args.workers, args.model)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        size_mb = os.path.getsize(args.path) / 1e6
+        print(f"Built {args.path} ({size_mb:.0f} MB) in {time.perf_counter() - started:.1f}s")
+        return 0
+
+    table = PredictionTable(args.path)
+    if not table.is_current():
+        print(f"{args.path} is stale: built from different weights")
+        return 1
+    mismatches = verify_table(table, args.samples)
+    print(f"{mismatches} mismatches in {args.samples} samples")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""
+Compact patient records
+PatientRecord holds one patient in __slots__ fields; PatientTable stores many as columns:
+symptoms as a uint32 bitmask, vitals as fixed-width numbers, and city, gender, disease and
+risk level as small interned codes. Both convert to and from the app's patient dicts.
+
+Usage (bytes per patient, dicts vs compact):
+    python records.py [count]
+"""
+
+import math
+import random
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from prediction import SYMPTOM_WEIGHTS
+
+# Bit i of a symptom mask is SYMPTOMS[i]; anything else is kept as an extra symptom string
+SYMPTOMS: List[str] = list(SYMPTOM_WEIGHTS)
+SYMPTOM_BITS: Dict[str, int] = {symptom: 1 << i for i, symptom in enumerate(SYMPTOMS)}
+if len(SYMPTOMS) > 32:
+    raise ValueError(f"{len(SYMPTOMS)} symptoms do not fit the 32-bit symptom masks")
+
+# Input order, when it differs from mask order, is kept as 6-bit codes packed into an int
+# (first symptom in the lowest bits): SYMPTOMS[i] is i + 1, the next extra symptom is 63
+ORDER_BITS = 6
+_EXTRA_CODE = (1 << ORDER_BITS) - 1
+_SYMPTOM_CODES: Dict[str, int] = {symptom: i + 1 for i, symptom in enumerate(SYMPTOMS)}
+
+VITAL_FIELDS = ("bp_systolic", "bp_diastolic", "temperature")
+
+
+def encode_symptoms(symptoms: Iterable[str]) -> Tuple[int, Tuple[str, ...], int]:
+    """
+    (bitmask of known symptoms, tuple of the others in input order, order)
+    order is 0 when the input lists known symptoms in SYMPTOMS order before any extra one,
+    otherwise the packed input order; decode_symptoms restores the input list either way
+    """
+    mask, extra, codes = 0, [], []
+    for symptom in symptoms:
+        bit = SYMPTOM_BITS.get(symptom)
+        if bit is None or mask & bit:
+            extra.append(symptom)
+            codes.append(_EXTRA_CODE)
+        else:
+            mask |= bit
+            codes.append(_SYMPTOM_CODES[symptom])
+    order = 0
+    # Ascending codes are exactly the order decode_symptoms gives without one
+    if any(a > b for a, b in zip(codes, codes[1:])):
+        for position, code in enumerate(codes):
+            order |= code << (ORDER_BITS * position)
+    return mask, tuple(extra), order
+
+
+def decode_symptoms(mask: int, extra: Tuple[str, ...] = (), order: int = 0) -> List[str]:
+    """The symptom list: in the recorded input order, or without one known symptoms in SYMPTOMS order, then the extra ones"""
+    if not order:
+        return [symptom for symptom, bit in SYMPTOM_BITS.items() if mask & bit] + list(extra)
+    symptoms, extras = [], iter(extra)
+    while order:
+        code = order & _EXTRA_CODE
+        symptoms.append(next(extras) if code == _EXTRA_CODE else SYMPTOMS[code - 1])
+        order >>= ORDER_BITS
+    return symptoms
+
+
+class PatientRecord:
+    """
+    One patient without per-record dicts: symptoms as a bitmask (plus any unknown
+    symptom strings and, when it differs from mask order, the packed input order), vitals
+    as plain fields. Symptoms come back in input order, which predict_disease sums in.
+    """
+
+    __slots__ = (
+        "id", "created_at", "name", "age", "gender", "city", "phone", "symptom_mask", "extra_symptoms",
+        "symptom_order", "bp_systolic", "bp_diastolic", "temperature", "disease", "confidence", "risk_level", "risk_score",
+    )
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        age: Optional[int] = None,
+        gender: Optional[str] = None,
+        city: Optional[str] = None,
+        phone: Optional[str] = None,
+        symptoms: Iterable[str] = (),
+        bp_systolic: Optional[float] = None,
+        bp_diastolic: Optional[float] = None,
+        temperature: Optional[float] = None,
+        disease: Optional[str] = None,
+        confidence: Optional[float] = None,
+        risk_level: Optional[str] = None,
+        risk_score: Optional[int] = None,
+        id: Optional[int] = None,
+        created_at: Optional[float] = None,
+    ):
+        self.id = id
+        self.created_at = created_at
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.city = city
+        self.phone = phone
+        self.symptom_mask, self.extra_symptoms, self.symptom_order = encode_symptoms(symptoms)
+        self.bp_systolic = bp_systolic
+        self.bp_diastolic = bp_diastolic
+        self.temperature = temperature
+        self.disease = disease
+        self.confidence = confidence
+        self.risk_level = risk_level
+        self.risk_score = risk_score
+
+    @property
+    def symptoms(self) -> List[str]:
+        return decode_symptoms(self.symptom_mask, self.extra_symptoms, self.symptom_order)
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> "PatientRecord":
+        """Build from the app's patient dict (vitals nested under "vitals")"""
+        vitals = record.get("vitals") or {}
+        return cls(
+            name=record.get("name"),
+            age=record.get("age"),
+            gender=record.get("gender"),
+            city=record.get("city"),
+            phone=record.get("phone"),
+            symptoms=record.get("symptoms", ()),
+            bp_systolic=vitals.get("bp_systolic"),
+            bp_diastolic=vitals.get("bp_diastolic"),
+            temperature=vitals.get("temperature"),
+            disease=record.get("disease"),
+            confidence=record.get("confidence"),
+            risk_level=record.get("risk_level"),
+            risk_score=record.get("risk_score"),
+            id=record.get("id"),
+            created_at=record.get("created_at"),
+        )
+
+    def to_dict(self) -> Dict:
+        """The app's patient dict; id/created_at only when set, vitals None when none were recorded"""
+        record = {} if self.id is None else {"id": self.id}
+        if self.created_at is not None:
+            record["created_at"] = self.created_at
+        vitals = {field: getattr(self, field) for field in VITAL_FIELDS if getattr(self, field) is not None}
+        record.update({
+            "name": self.name,
+            "age": self.age,
+            "gender": self.gender,
+            "city": self.city,
+            "phone": self.phone,
+            "symptoms": self.symptoms,
+            "vitals": vitals or None,
+            "disease": self.disease,
+            "confidence": self.confidence,
+            "risk_level": self.risk_level,
+            "risk_score": self.risk_score,
+        })
+        return record
+
+    def __repr__(self) -> str:
+        return f"PatientRecord({self.name!r}, {self.age}, {self.city!r}, {self.disease!r}, {self.risk_level!r})"
+
+
+class Interner:
+    """Small-integer codes for repeated strings; code 0 is None"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.codes: Dict[Optional[str], int] = {None: 0}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> Optional[str]:
+        return self.values[code]
+
+
+class PatientTable:
+    """
+    Struct-of-arrays patient storage; columns grow by doubling
+    Missing numbers are stored as sentinels: the dtype's maximum for age/BP/risk score, NaN for floats, -1 for id
+    Integer columns only take whole numbers in range (ValueError otherwise), so nothing is truncated
+    """
+
+    COLUMNS = {
+        "id": np.int64,
+        "created_at": np.float64,
+        "age": np.uint8,
+        "symptom_mask": np.uint32,
+        "symptom_order": np.uint64,
+        "bp_systolic": np.uint16,
+        "bp_diastolic": np.uint16,
+        "temperature": np.float64,
+        "confidence": np.float64,
+        "risk_score": np.uint8,
+        "city": np.uint16,
+        "gender": np.uint8,
+        "disease": np.uint8,
+        "risk_level": np.uint8,
+    }
+    INTERNED = ("city", "gender", "disease", "risk_level")
+    _MISSING = {
+        "id": -1,
+        "created_at": math.nan,
+        "age": 0xFF,
+        "bp_systolic": 0xFFFF,
+        "bp_diastolic": 0xFFFF,
+        "temperature": math.nan,
+        "confidence": math.nan,
+        "risk_score": 0xFF,
+    }
+
+    def __init__(self, capacity: int = 64):
+        self._length = 0
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()
+        }
+        self.interners: Dict[str, Interner] = {name: Interner() for name in self.INTERNED}
+        self.names: List[Optional[str]] = []
+        self.phones: List[Optional[str]] = []
+        # row → unknown symptom strings, only for the rows that have any
+        self.extra_symptoms: Dict[int, Tuple[str, ...]] = {}
+        # row → input order too long for the uint64 column (more than 10 symptoms, rare)
+        self.long_orders: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _grow(self):
+        capacity = max(2 * len(self.columns["id"]), 64)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._length] = column[:self._length]
+            self.columns[name] = grown
+
+    def append(self, record: PatientRecord) -> int:
+        """Append a record; returns its row"""
+        if self._length == len(self.columns["id"]):
+            self._grow()
+        row = self._length
+        values = {}
+        for name in self.COLUMNS:
+            if name in self.INTERNED:
+                continue
+            value = getattr(record, name)
+            if name == "symptom_order" and value >> 64:
+                self.long_orders[row] = value
+                value = 0
+            if value is None:
+                value = self._MISSING.get(name, 0)
+            elif np.issubdtype(self.COLUMNS[name], np.integer):
+                value = self._whole_number(name, value)
+            values[name] = value
+        # Validated before anything is written, so a rejected record leaves no partial row
+        for name in self.INTERNED:
+            values[name] = self.interners[name].code(getattr(record, name))
+        for name, value in values.items():
+            self.columns[name][row] = value
+        self.names.append(record.name)
+        self.phones.append(record.phone)
+        if record.extra_symptoms:
+            self.extra_symptoms[row] = record.extra_symptoms
+        self._length += 1
+        return row
+
+    def _whole_number(self, name: str, value) -> int:
+        """value as an int that fits column name below its missing sentinel; raises ValueError otherwise"""
+        info = np.iinfo(self.COLUMNS[name])
+        missing = self._MISSING.get(name)
+        low = 0 if missing == -1 else info.min
+        high = info.max - 1 if missing == info.max else info.max
+        try:
+            whole = int(value)
+        except (TypeError, ValueError, OverflowError):
+            whole = None
+        if whole is None or whole != value:
+            raise ValueError(f"{name} must be a whole number to fit the table, got {value!r}")
+        if not low <= whole <= high:
+            raise ValueError(f"{name} {value!r} is outside the table's range {low}..{high}")
+        return whole
+
+    def append_dict(self, record: Dict) -> int:
+        return self.append(PatientRecord.from_dict(record))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "PatientTable":
+        """Build from patient dicts, e.g. PatientStore.iter_records()"""
+        table = cls()
+        for record in records:
+            table.append_dict(record)
+        return table
+
+    def column(self, name: str) -> np.ndarray:
+        """Live view of a numeric or code column"""
+        return self.columns[name][:self._length]
+
+    def record(self, row: int) -> PatientRecord:
+        if not 0 <= row < self._length:
+            raise IndexError(row)
+        values = {}
+        for name in self.COLUMNS:
+            value = self.columns[name][row].item()
+            if name in self.INTERNED:
+                value = self.interners[name][value]
+            elif name in self._MISSING:
+                missing = self._MISSING[name]
+                value = None if value == missing or (isinstance(value, float) and math.isnan(value)) else value
+            values[name] = value
+        record = PatientRecord.__new__(PatientRecord)
+        for name, value in values.items():
+            setattr(record, name, value)
+        record.name = self.names[row]
+        record.phone = self.phones[row]
+        record.extra_symptoms = self.extra_symptoms.get(row, ())
+        if row in self.long_orders:
+            record.symptom_order = self.long_orders[row]
+        return record
+
+    def to_dict(self, row: int) -> Dict:
+        return self.record(row).to_dict()
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(self._length):
+            yield self.to_dict(row)
+
+    def nbytes(self) -> int:
+        """Approximate memory held: used column bytes plus the string and interning structures"""
+        used = sum(column.dtype.itemsize * self._length for column in self.columns.values())
+        strings = (
+            deep_sizeof(self.names) + deep_sizeof(self.phones) + deep_sizeof(self.extra_symptoms)
+            + deep_sizeof(self.long_orders)
+        )
+        interned = sum(deep_sizeof(interner.values) + sys.getsizeof(interner.codes) for interner in self.interners.values())
+        return used + strings + interned
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """sys.getsizeof including everything reachable through containers and __slots__"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+
+def memory_report(records: List[Dict]) -> Dict[str, float]:
+    """Bytes per patient as dicts, as PatientRecords and in a PatientTable"""
+    count = max(len(records), 1)
+    compact = [PatientRecord.from_dict(record) for record in records]
+    return {
+        "dict": deep_sizeof(records) / count,
+        "record": deep_sizeof(compact) / count,
+        "table": PatientTable.from_records(records).nbytes() / count,
+    }
+
+
+def sample_records(count: int, seed: int = 0) -> List[Dict]:
+    """Patient dicts shaped like the ones app.py builds"""
+    rng = random.Random(seed)
+    cities = ["Ahmedabad", "Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+    return [
+        {
+            "name": f"Patient {i}",
+            "age": rng.randint(1, 99),
+            "gender": rng.choice(["Male", "Female", "Other"]),
+            "city": rng.choice(cities),
+            "phone": f"+91-98{rng.randint(0, 99999999):08d}",
+            "symptoms": rng.sample(SYMPTOMS, rng.randint(1, 6)),
+            "vitals": {
+                "bp_systolic": rng.randint(60, 200),
+                "bp_diastolic": rng.randint(40, 150),
+                "temperature": round(rng.uniform(95.0, 105.0), 1),
+            },
+            "disease": rng.choice(["Dengue", "Typhoid", "Flu", "TB", "Malaria", "COVID-19", "No Disease"]),
+            "confidence": rng.uniform(0, 100),
+            "risk_level": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            "risk_score": rng.randint(0, 100),
+        }
+        for i in range(count)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 10_000
+    report = memory_report(sample_records(count))
+    print(f"Bytes per patient ({count:,} patients)")
+    for layout, size in report.items():
+        print(f"  {layout:<8}{size:>10,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Process-wide shared patient registry for cross-session notifications
+Appends take a lock; reads take none: they grab the current immutable snapshot reference
+and slice it. Readers track an absolute cursor, so each check only touches new entries.
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RegistrySnapshot:
+    """Entries [base, base + length) of the registry at one instant"""
+
+    __slots__ = ("base", "items", "length")
+
+    def __init__(self, base: int, items: List[Dict], length: int):
+        self.base = base
+        # Shared with the registry; only positions < length are part of this snapshot
+        self.items = items
+        self.length = length
+
+    @property
+    def end(self) -> int:
+        """Cursor just past the newest entry"""
+        return self.base + self.length
+
+    def since(self, cursor: int) -> Sequence[Dict]:
+        start = min(max(cursor - self.base, 0), self.length)
+        return self.items[start:self.length]
+
+
+class PatientRegistry:
+    """
+    Append-only registry of patient summaries shared by every session
+    Only the newest `maxlen` entries are retained; cursors stay absolute
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self.maxlen = maxlen
+        self._snapshot = RegistrySnapshot(0, [], 0)
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+
+    def snapshot(self) -> RegistrySnapshot:
+        """Current immutable view (lock-free)"""
+        return self._snapshot
+
+    @property
+    def cursor(self) -> int:
+        """Cursor after the newest entry; start here to see only future appends"""
+        return self._snapshot.end
+
+    def append(self, entry: Dict) -> int:
+        """Append an entry and wake waiters; returns its absolute position"""
+        with self._lock:
+            current = self._snapshot
+            items, base, length = current.items, current.base, current.length
+            if length >= 2 * self.maxlen:
+                # Compact into a fresh list; existing snapshots keep the old one
+                items = items[length - self.maxlen:length]
+                base += length - self.maxlen
+                length = self.maxlen
+            items.append(entry)
+            self._snapshot = RegistrySnapshot(base, items, length + 1)
+            self._appended.notify_all()
+            return base + length
+
+    def since(self, cursor: int) -> Tuple[Sequence[Dict], int]:
+        """(entries appended at or after cursor, new cursor), without locking"""
+        snapshot = self._snapshot
+        return snapshot.since(cursor), snapshot.end
+
+    def wait(self, cursor: int, timeout: Optional[float] = None) -> Tuple[Sequence[Dict], int]:
+        """Block until something is appended at or after cursor (or timeout), then return since(cursor)"""
+        if self._snapshot.end <= cursor:
+            with self._appended:
+                self._appended.wait_for(lambda: self._snapshot.end > cursor, timeout)
+        return self.since(cursor)
+
+    def __len__(self) -> int:
+        return self._snapshot.end
@@ -0,0 +1,303 @@
+"""
+Standalone asyncio HTTP scoring service
+Concurrent requests are coalesced into micro-batches scored with predict_diseases_batch
+and classify_risk_batch, which return the same results as predict_disease/classify_risk
+
+Usage:
+    python service.py [--host 127.0.0.1] [--port 8600] [--max-batch-size 256] [--max-wait-ms 5] [--model-dir models]
+
+Model files in --model-dir (HEALTHCARE_MODEL_DIR, default models/) are activated at startup
+and hot-swapped as newer versions land, as in the app
+
+Endpoints:
+    POST /score        {"symptoms": ["Fever", ...], "age": 45, "city": "Mumbai", "vitals": {...}}
+    POST /score/batch  {"patients": [<patient>, ...]}
+    GET  /health
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from model_files import DEFAULT_MODEL_DIR, ModelWatcher
+from prediction import analyze_patients_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8600
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+Patient = Tuple[List[str], int, str, Optional[Dict[str, float]]]
+
+
+def parse_patient(payload: Dict) -> Patient:
+    """Validate one patient payload; raises ValueError with a client-facing message"""
+    if not isinstance(payload, dict):
+        raise ValueError("patient must be a JSON object")
+    symptoms = payload.get("symptoms", [])
+    if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+        raise ValueError("symptoms must be a list of strings")
+    age = payload.get("age")
+    if isinstance(age, bool) or not isinstance(age, int):
+        raise ValueError("age must be an integer")
+    city = payload.get("city", "")
+    if not isinstance(city, str):
+        raise ValueError("city must be a string")
+    vitals = payload.get("vitals")
+    if vitals is not None:
+        if not isinstance(vitals, dict) or not all(
+            isinstance(vitals[k], (int, float)) and not isinstance(vitals[k], bool)
+            for k in ("bp_systolic", "bp_diastolic", "temperature") if k in vitals
+        ):
+            raise ValueError("vitals must map bp_systolic/bp_diastolic/temperature to numbers")
+    return symptoms, age, city, vitals
+
+
+def score_patients(patients: Sequence[Patient]) -> List[Dict]:
+    """Score a batch of parsed patients: disease, confidence, risk level and score for each"""
+    results = analyze_patients_batch(
+        [symptoms for symptoms, _, _, _ in patients],
+        [age for _, age, _, _ in patients],
+        [city for _, _, city, _ in patients],
+        [vitals for _, _, _, vitals in patients],
+    )
+    return [
+        {"disease": disease, "confidence": confidence, "risk_level": level, "risk_score": score}
+        for disease, confidence, level, score in results
+    ]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrently submitted patients into batches of at most max_batch_size,
+    waiting at most max_wait seconds after the first patient of a batch arrives
+    """
+
+    def __init__(self, max_batch_size: int = 256, max_wait: float = 0.005):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "asyncio.Queue[Tuple[Patient, asyncio.Future]]" = asyncio.Queue()
+        # One scoring thread: batches run in order while the event loop keeps accepting requests
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.scored = 0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, patients: Sequence[Patient]) -> List[Dict]:
+        """Queue patients for scoring and wait for their results"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for patient in patients:
+            future = loop.create_future()
+            self._queue.put_nowait((patient, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _collect(self) -> List[Tuple[Patient, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                with metrics.span("service_batch"):
+                    results = await loop.run_in_executor(self._executor, score_patients, [p for p, _ in batch])
+            except Exception as e:
+                logger.exception("Scoring a batch of %d failed", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.scored += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+# ==================== HTTP ====================
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def body_length(headers: Dict[str, str]) -> int:
+    """Request body size from the headers; raises HTTPError for bodies this server will not read"""
+    if "transfer-encoding" in headers:
+        raise HTTPError(411, "send a Content-Length body (chunked bodies are not supported)")
+    value = headers.get("content-length", "")
+    if not value:
+        return 0
+    # Digits only: int() would also take signs, underscores and surrounding whitespace
+    if not value.isascii() or not value.isdigit():
+        raise HTTPError(400, f"invalid Content-Length {value!r}")
+    length = int(value)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"body too large (limit {MAX_BODY_BYTES} bytes)")
+    return length
+
+
+class ScoringService:
+    """HTTP/1.1 keep-alive JSON endpoints in front of a MicroBatcher"""
+
+    def __init__(self, max_batch_size: int = 256, max_wait: float = 0.005):
+        self.batcher = MicroBatcher(max_batch_size, max_wait)
+
+    async def handle(self, method: str, path: str, body: bytes) -> Dict:
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return {"status": "ok", "batches": self.batcher.batches, "scored": self.batcher.scored}
+        if path not in ("/score", "/score/batch"):
+            raise HTTPError(404, f"no route for {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(400, "body is not valid JSON")
+        try:
+            if path == "/score":
+                return (await self.batcher.submit([parse_patient(payload)]))[0]
+            if not isinstance(payload, dict) or not isinstance(payload.get("patients"), list):
+                raise ValueError('body must be {"patients": [...]}')
+            patients = [parse_patient(patient) for patient in payload["patients"]]
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return {"results": await self.batcher.submit(patients)}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive"
+                )
+
+                try:
+                    length = body_length(headers)
+                except HTTPError as e:
+                    # The body is left unread, so the connection cannot be reused
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, response = 200, await self.handle(method, target.split("?")[0], body)
+                except HTTPError as e:
+                    status, response = e.status, {"error": str(e)}
+                except Exception:
+                    logger.exception("Request %s %s failed", method, target)
+                    status, response = 500, {"error": "internal error"}
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self.batcher.start()
+        return await asyncio.start_server(self.serve_connection, host, port, limit=64 * 1024)
+
+
+async def serve(host: str, port: int, max_batch_size: int, max_wait: float, model_dir: Optional[str] = None):
+    watcher = ModelWatcher(model_dir).start() if model_dir else None
+    service = ScoringService(max_batch_size, max_wait)
+    server = await service.start(host, port)
+    logger.info("Scoring service listening on http://%s:%d", host, port)
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            await service.batcher.stop()
+            if watcher:
+                watcher.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP scoring service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=256, help="Most patients scored per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Longest wait for a batch to fill after its first patient arrives")
+    parser.add_argument("--model-dir", default=os.environ.get("HEALTHCARE_MODEL_DIR", DEFAULT_MODEL_DIR),
+                        help="Directory of weights-v<N>.json model files (default: built-in model if none)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000, args.model_dir))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Startup-time measurement
+Records the app's time to first render and profiles the cold import cost of each module
+
+Usage:
+    python startup_profile.py [module ...]
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import metrics
+
+# Set when app.py first imports this module, i.e. at the start of the first script run
+SCRIPT_STARTED = time.perf_counter()
+
+_first_render_ms: Optional[float] = None
+
+# Modules whose import cost matters for a cold start of app.py
+PROFILED_MODULES = [
+    "streamlit",
+    "numpy",
+    "plotly.graph_objects",
+    "qrcode",
+    "PIL.Image",
+    "data",
+    "prediction",
+    "storage",
+    "escalation",
+    "app",
+]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def record_first_render() -> float:
+    """Record (once per process) the time from the first script start to the end of its first render"""
+    global _first_render_ms
+    if _first_render_ms is None:
+        _first_render_ms = (time.perf_counter() - SCRIPT_STARTED) * 1000
+        metrics.set_gauge(
+            "time_to_first_render_seconds", _first_render_ms / 1000, "Time from the first script start to its first render"
+        )
+        # Streamlit leaves the root logger unconfigured, so report on stderr directly
+        print(f"Time to first render: {_first_render_ms:.0f} ms", file=sys.stderr, flush=True)
+    return _first_render_ms
+
+
+def first_render_ms() -> Optional[float]:
+    """Time to first render in milliseconds, or None before the first render finished"""
+    return _first_render_ms
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative cold import time of a module, measured in a fresh interpreter with -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Top-level entries are indented by exactly one space
+        if match and match.group(4) == module and len(match.group(3)) == 1:
+            return int(match.group(2)) / 1000
+    return 0.0
+
+
+def profile_imports(modules: List[str] = PROFILED_MODULES) -> Dict[str, float]:
+    """Cold import time (ms) of each module"""
+    return {module: import_time_ms(module) for module in modules}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    modules = (argv if argv is not None else sys.argv[1:]) or PROFILED_MODULES
+    print(f"{'module':<24}{'cold import (ms)':>18}")
+    for module, ms in profile_imports(modules).items():
+        print(f"{module:<24}{ms:>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Persistent patient store backed by SQLite (WAL mode)
+Indexed on city, risk level and disease followed by creation time, so filtered
+newest-first pages are index range scans (keyset pagination on (created_at, id))
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_DB_PATH = "patients.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    name TEXT,
+    age INTEGER,
+    gender TEXT,
+    city TEXT,
+    phone TEXT,
+    symptoms TEXT NOT NULL,
+    bp_systolic INTEGER,
+    bp_diastolic INTEGER,
+    temperature REAL,
+    disease TEXT,
+    confidence REAL,
+    risk_level TEXT,
+    risk_score INTEGER
+);
+-- Newest-first pages walk one of these backwards: the equality filters, then (created_at, id),
+-- so neither a filter nor the keyset cursor needs a temp B-tree sort
+DROP INDEX IF EXISTS idx_patients_city;
+DROP INDEX IF EXISTS idx_patients_risk_level;
+DROP INDEX IF EXISTS idx_patients_disease;
+DROP INDEX IF EXISTS idx_patients_created_at;
+CREATE INDEX IF NOT EXISTS idx_patients_created ON patients(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_city_created ON patients(city, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_risk_created ON patients(risk_level, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_disease_created ON patients(disease, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_city_disease_created ON patients(city, disease, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_city_risk_created ON patients(city, risk_level, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_disease_risk_created ON patients(disease, risk_level, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS patient_counts (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS patients_count_insert AFTER INSERT ON patients BEGIN
+    INSERT INTO patient_counts VALUES
+        ('total', '', 1),
+        ('risk_level', COALESCE(NEW.risk_level, ''), 1),
+        ('disease', COALESCE(NEW.disease, ''), 1),
+        ('city', COALESCE(NEW.city, ''), 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS patients_count_delete AFTER DELETE ON patients BEGIN
+    UPDATE patient_counts SET count = count - 1 WHERE
+        (dimension = 'total')
+        OR (dimension = 'risk_level' AND value = COALESCE(OLD.risk_level, ''))
+        OR (dimension = 'disease' AND value = COALESCE(OLD.disease, ''))
+        OR (dimension = 'city' AND value = COALESCE(OLD.city, ''));
+END;
+"""
+
+# Columns that may be used as equality filters; each also has running counts
+FILTER_COLUMNS = ("city", "risk_level", "disease")
+
+# Columns shown in patient listings (everything else loads with get())
+SUMMARY_COLUMNS = "id, created_at, name, age, city, disease, risk_level, risk_score"
+
+# Position in a newest-first listing: (created_at, id) of the last row already shown
+PageCursor = Tuple[float, int]
+
+
+def page_cursor(row: Dict) -> PageCursor:
+    """Cursor that continues a listing after row"""
+    return row["created_at"], row["id"]
+
+
+def _row_to_record(row: sqlite3.Row) -> Dict:
+    """Convert a database row back to the patient record dict used by the app"""
+    return {
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "name": row["name"],
+        "age": row["age"],
+        "gender": row["gender"],
+        "city": row["city"],
+        "phone": row["phone"],
+        "symptoms": json.loads(row["symptoms"]),
+        "vitals": {
+            "bp_systolic": row["bp_systolic"],
+            "bp_diastolic": row["bp_diastolic"],
+            "temperature": row["temperature"],
+        },
+        "disease": row["disease"],
+        "confidence": row["confidence"],
+        "risk_level": row["risk_level"],
+        "risk_score": row["risk_score"],
+    }
+
+
+def _where(filters: Dict[str, Optional[str]]) -> Tuple[str, List]:
+    """Build a WHERE clause from equality filters and an optional name_prefix, skipping None values"""
+    clauses, params = [], []
+    for column, value in filters.items():
+        if column != "name_prefix" and column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter patients by {column!r}")
+        if value is None:
+            continue
+        if column == "name_prefix":
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class PatientStore:
+    """SQLite patient store; safe to share between Streamlit sessions (one connection per thread)"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        # Databases created before the counters existed get them backfilled once
+        has_total = conn.execute("SELECT 1 FROM patient_counts WHERE dimension = 'total'").fetchone()
+        if not has_total and conn.execute("SELECT 1 FROM patients LIMIT 1").fetchone():
+            self.rebuild_counters()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, record: Dict) -> int:
+        """Append a patient record; returns its id"""
+        vitals = record.get("vitals") or {}
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO patients (created_at, name, age, gender, city, phone, symptoms,"
+                " bp_systolic, bp_diastolic, temperature, disease, confidence, risk_level, risk_score)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.get("created_at", time.time()),
+                    record.get("name"),
+                    record.get("age"),
+                    record.get("gender"),
+                    record.get("city"),
+                    record.get("phone"),
+                    json.dumps(record.get("symptoms", [])),
+                    vitals.get("bp_systolic"),
+                    vitals.get("bp_diastolic"),
+                    vitals.get("temperature"),
+                    record.get("disease"),
+                    record.get("confidence"),
+                    record.get("risk_level"),
+                    record.get("risk_score"),
+                ),
+            )
+        return cursor.lastrowid
+
+    def get(self, patient_id: int) -> Optional[Dict]:
+        row = self._conn().execute("SELECT * FROM patients WHERE id = ?", (patient_id,)).fetchone()
+        return _row_to_record(row) if row else None
+
+    def count(self, **filters: Optional[str]) -> int:
+        """
+        Number of patients matching the filters (city, risk_level, disease, name_prefix)
+        No filter or a single equality filter is answered from the running counters
+        """
+        active = {column: value for column, value in filters.items() if value is not None}
+        dimension, value = next(iter(active.items()), ("total", ""))
+        if len(active) <= 1 and dimension in FILTER_COLUMNS + ("total",):
+            row = self._conn().execute(
+                "SELECT count FROM patient_counts WHERE dimension = ? AND value = ?", (dimension, value)
+            ).fetchone()
+            return row[0] if row else 0
+        where, params = _where(active)
+        return self._conn().execute(f"SELECT COUNT(*) FROM patients{where}", params).fetchone()[0]
+
+    def counts_by(self, column: str) -> Dict[str, int]:
+        """Running patient counts per city, risk_level or disease (missing values count under '')"""
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot group patients by {column!r}")
+        rows = self._conn().execute(
+            "SELECT value, count FROM patient_counts WHERE dimension = ? AND count > 0", (column,)
+        )
+        return {value: count for value, count in rows}
+
+    def recount(self) -> Dict[str, Dict[str, int]]:
+        """Full recount of every counter dimension by scanning the patients table"""
+        conn = self._conn()
+        counts = {"total": {"": conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]}}
+        for column in FILTER_COLUMNS:
+            rows = conn.execute(f"SELECT COALESCE({column}, ''), COUNT(*) FROM patients GROUP BY 1")
+            counts[column] = {value: count for value, count in rows}
+        return counts
+
+    def verify_counters(self) -> bool:
+        """Whether the running counters agree with a full recount"""
+        stored: Dict[str, Dict[str, int]] = {"total": {"": 0}}
+        for dimension, value, count in self._conn().execute("SELECT dimension, value, count FROM patient_counts"):
+            if count:
+                stored.setdefault(dimension, {})[value] = count
+        recount = self.recount()
+        return all(stored.get(dimension, {}) == counts for dimension, counts in recount.items())
+
+    def rebuild_counters(self):
+        """Reset the running counters from a full recount"""
+        recount = self.recount()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM patient_counts")
+            conn.executemany(
+                "INSERT INTO patient_counts VALUES (?, ?, ?)",
+                [(dimension, value, count) for dimension, counts in recount.items() for value, count in counts.items()],
+            )
+
+    def query(self, limit: int = 50, offset: int = 0, **filters: Optional[str]) -> List[Dict]:
+        """Newest-first page of patients matching the equality filters"""
+        where, params = _where(filters)
+        rows = self._conn().execute(
+            f"SELECT * FROM patients{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [_row_to_record(row) for row in rows]
+
+    def page(
+        self, page_size: int = 20, after: Optional[PageCursor] = None, skip: int = 0, **filters: Optional[str]
+    ) -> List[Dict]:
+        """
+        Newest-first patient summaries (SUMMARY_COLUMNS only) older than the after cursor
+        skip drops that many rows first, for jumping ahead of the last known cursor
+        Filters: city, risk_level, disease and name_prefix
+        """
+        where, params = _where(filters)
+        if after is not None:
+            where += " AND (created_at, id) < (?, ?)" if where else " WHERE (created_at, id) < (?, ?)"
+            params += list(after)
+        rows = self._conn().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM patients{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [page_size, skip],
+        )
+        return [dict(row) for row in rows]
+
+    def iter_records(self, batch_size: int = 1000, **filters: Optional[str]) -> Iterator[Dict]:
+        """Stream all matching patients in insertion order, one batch in memory at a time"""
+        where, params = _where(filters)
+        where += " AND id > ?" if where else " WHERE id > ?"
+        last_id = 0
+        while True:
+            rows = self._conn().execute(
+                f"SELECT * FROM patients{where} ORDER BY id LIMIT ?", params + [last_id, batch_size]
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_record(row)
+            last_id = rows[-1]["id"]
+
+    def clear(self):
+        """Delete every patient record"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM patients")
+            conn.execute("DELETE FROM patient_counts")
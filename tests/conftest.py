@@ -0,0 +1,71 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prediction  # noqa: E402
+from prediction import SYMPTOM_VARIATIONS, SYMPTOM_WEIGHTS, classify_risk, predict_disease  # noqa: E402
+
+CITIES = ["Ahmedabad", "Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Pune", "Nowhere"]
+SYMPTOMS = list(SYMPTOM_WEIGHTS) + [v for variants in SYMPTOM_VARIATIONS.values() for v in variants] + ["unknown"]
+
+
+def random_cases(count: int, seed: int):
+    """(symptoms, age, city, vitals) tuples, including repeats, synonyms, unknown symptoms and missing vitals"""
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            symptoms = [rng.choice(SYMPTOMS) for _ in range(rng.randint(1, 5))]
+        else:
+            symptoms = rng.sample(SYMPTOMS, rng.randint(0, 7))
+        vitals = None if rng.random() < 0.1 else {
+            "bp_systolic": rng.randint(70, 170),
+            "bp_diastolic": rng.randint(45, 110),
+            "temperature": round(rng.uniform(97.0, 104.0), 1),
+        }
+        cases.append((symptoms, rng.randint(1, 95), rng.choice(CITIES), vitals))
+    return cases
+
+
+def scalar_analysis(symptoms, age, city, vitals):
+    disease, confidence = predict_disease(symptoms, age, city, vitals)
+    return (disease, confidence) + classify_risk(age, symptoms, vitals, city, disease, confidence)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    prediction.PREDICTION_CACHE.clear()
+    yield
+    prediction.PREDICTION_CACHE.clear()
+
+
+SMALL_MODEL = {
+    "version": 7,
+    "diseases": {"Flu": ["fever", "cough"], "Migraine": ["headache", "nausea"]},
+    "symptom_weights": {
+        "fever": {"Flu": 3},
+        "cough": {"Flu": 2},
+        "headache": {"Flu": 1, "Migraine": 3},
+        "nausea": {"Migraine": 2},
+    },
+    "low_bp_multipliers": {"Migraine": 1.5},
+    "fever_multipliers": {"Flu": 1.2},
+    "symptom_variations": {"fever": ["high temperature"]},
+}
+
+
+@pytest.fixture
+def small_model():
+    """Activate a four-symptom model for the test, then restore the built-in one"""
+    from model_files import model_from_dict
+
+    model = model_from_dict(SMALL_MODEL)
+    prediction.activate_model(model)
+    yield model
+    prediction.set_prediction_table(None)
+    prediction.activate_model(prediction.builtin_model())
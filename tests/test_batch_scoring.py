@@ -0,0 +1,57 @@
+"""
+Batch scoring (ScoringModel.encode/score) against the scalar predict_disease
+"""
+
+import numpy as np
+
+from conftest import random_cases, scalar_analysis
+from prediction import (
+    analyze_patients_batch,
+    get_scoring_model,
+    predict_disease,
+    predict_diseases_batch,
+    vitals_columns,
+)
+from records import SYMPTOMS, decode_symptoms
+
+
+def test_predict_diseases_batch_matches_predict_disease():
+    cases = random_cases(3000, seed=1)
+    batch = predict_diseases_batch([c[0] for c in cases], [c[3] for c in cases])
+    assert batch == [predict_disease(*case) for case in cases]
+
+
+def test_analyze_patients_batch_matches_scalar():
+    cases = random_cases(3000, seed=2)
+    batch = analyze_patients_batch(*(list(column) for column in zip(*cases)))
+    assert batch == [scalar_analysis(*case) for case in cases]
+
+
+def test_encode_keeps_input_order_and_pads():
+    model = get_scoring_model()
+    slots = model.encode([["cough", "FEVER ", "no such symptom"], [], ["fever"]])
+    fever, cough = model.symptom_index["fever"], model.symptom_index["cough"]
+    assert slots.tolist() == [
+        [cough, fever, model.pad_index],
+        [model.pad_index] * 3,
+        [fever, model.pad_index, model.pad_index],
+    ]
+
+
+def test_encode_empty_batch():
+    model = get_scoring_model()
+    assert model.encode([]).shape == (0, 0)
+    assert model.encode([[], []]).shape == (2, 0)
+    diseases, _ = model.score(model.encode([[], []]), *vitals_columns(None, 2))
+    assert diseases.tolist() == [-1, -1]
+
+
+def test_encode_masks_matches_decoded_lists():
+    model = get_scoring_model()
+    rng = np.random.default_rng(7)
+    masks = rng.integers(0, 1 << len(SYMPTOMS), size=2000)
+    columns = vitals_columns(None, len(masks))
+    from_masks = model.score(model.encode_masks(masks), *columns)
+    from_lists = model.score(model.encode([decode_symptoms(int(m)) for m in masks]), *columns)
+    assert np.array_equal(from_masks[0], from_lists[0])
+    assert np.array_equal(from_masks[1], from_lists[1])
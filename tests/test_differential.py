@@ -0,0 +1,42 @@
+"""
+Top-k differential diagnosis (SparseScoringModel.top_k)
+"""
+
+from conftest import random_cases
+from prediction import DISEASE_SYMPTOMS, predict_differential, predict_disease
+
+
+def test_predict_differential_top_matches_predict_disease():
+    for symptoms, age, city, vitals in random_cases(3000, seed=4):
+        disease, confidence = predict_disease(symptoms, age, city, vitals)
+        differential = predict_differential(symptoms, vitals, k=3)
+        if disease == "No Disease":
+            assert not differential or differential[0][1] < 30
+        else:
+            assert differential[0] == (disease, confidence)
+
+
+def test_ranking_is_descending_and_complete():
+    for symptoms, _, _, vitals in random_cases(500, seed=16):
+        differential = predict_differential(symptoms, vitals, k=len(DISEASE_SYMPTOMS) + 5)
+        confidences = [confidence for _, confidence in differential]
+        assert confidences == sorted(confidences, reverse=True)
+        assert len({disease for disease, _ in differential}) == len(differential) <= len(DISEASE_SYMPTOMS)
+        assert predict_differential(symptoms, vitals, k=2) == differential[:2]
+
+
+def test_min_confidence():
+    differential = predict_differential(["fever", "headache", "joint pain"], k=10, min_confidence=40)
+    assert differential and all(confidence >= 40 for _, confidence in differential)
+    assert predict_differential(["fever"], k=10, min_confidence=101) == []
+    # Confidences are capped at 100 before filtering, as they are reported
+    vitals = {"bp_systolic": 80, "bp_diastolic": 50, "temperature": 103}
+    assert predict_differential(["fever", "joint pain", "rash"], vitals, k=3)[0][1] == 100.0
+    assert predict_differential(["fever", "joint pain", "rash"], vitals, k=3, min_confidence=110) == []
+
+
+def test_predict_differential_without_symptoms_or_k():
+    assert predict_differential([], k=3) == []
+    assert predict_differential(["no such symptom"], k=3) == []
+    assert predict_differential(["fever", "cough"], k=0) == []
+    assert predict_differential(["fever", "cough"], k=-1) == []
@@ -0,0 +1,46 @@
+"""
+LTTB downsampling keeps the shape of long series
+"""
+
+import numpy as np
+
+from downsample import lttb, lttb_indices
+
+
+def daily_series(days=5 * 365, seed=11):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2020-01-01") + np.arange(days)
+    cases = 50 + 20 * np.sin(np.arange(days) / 30) + rng.normal(0, 3, days)
+    return dates, cases
+
+
+def test_keeps_first_last_and_budget():
+    dates, cases = daily_series()
+    kept_dates, kept_cases = lttb(dates, cases, 1000)
+    assert len(kept_dates) == len(kept_cases) == 1000
+    assert kept_dates[0] == dates[0] and kept_dates[-1] == dates[-1]
+    assert kept_cases[0] == cases[0] and kept_cases[-1] == cases[-1]
+    assert (np.diff(kept_dates.astype(np.int64)) > 0).all()
+
+
+def test_keeps_peaks():
+    dates, cases = daily_series()
+    peaks = [100, 700, 1500]
+    cases[peaks] = [400, 380, 420]
+    cases[900] = -100
+    kept = lttb_indices(dates.astype(np.float64), cases, 200)
+    assert set(peaks + [900]) <= set(kept.tolist())
+
+
+def test_short_series_and_small_budgets_are_returned_whole():
+    x = np.arange(10.0)
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 2).tolist() == list(range(10))
+
+
+def test_unreported_points_are_dropped():
+    dates = np.datetime64("2024-01-01") + np.arange(6)
+    cases = np.array([1, np.nan, 3, np.nan, 5, 6], dtype=np.float32)
+    kept_dates, kept_cases = lttb(dates, cases, 100)
+    assert kept_cases.tolist() == [1, 3, 5, 6]
+    assert kept_dates.tolist() == dates[[0, 2, 4, 5]].tolist()
@@ -0,0 +1,58 @@
+"""
+WhatsApp links and the bulk escalation ZIP
+"""
+
+import csv
+import io
+import urllib.parse
+import zipfile
+
+from escalation import DEFAULT_PHONE, build_whatsapp_url, export_escalations
+
+
+def patient(**overrides):
+    record = {
+        "id": 1, "name": "Asha", "age": 34, "gender": "Female", "phone": "+91 98765-43210", "city": "Pune",
+        "vitals": {"bp_systolic": 85, "bp_diastolic": 55, "temperature": 102.1},
+        "disease": "Dengue", "confidence": 87.5, "risk_level": "HIGH", "risk_score": 80,
+    }
+    record.update(overrides)
+    return record
+
+
+def message(url):
+    return urllib.parse.unquote(url.split("?text=", 1)[1])
+
+
+def test_whatsapp_url():
+    url = build_whatsapp_url(patient(), "Dengue", 87.5, "HIGH")
+    assert url.startswith("https://wa.me/919876543210?text=")
+    assert message(url) == "Patient: Asha, 34F, Dengue 88%, BP 85/55, Risk: HIGH"
+
+
+def test_whatsapp_url_with_missing_fields():
+    record = patient(gender="", phone=None, vitals={"bp_systolic": None, "bp_diastolic": 60})
+    url = build_whatsapp_url(record, "Dengue", 87.5, "HIGH")
+    assert url.startswith(f"https://wa.me/{DEFAULT_PHONE}?")
+    assert message(url) == "Patient: Asha, 34, Dengue 88%, BP ?/60, Risk: HIGH"
+    assert "BP ?/?" in message(build_whatsapp_url({"name": "X"}, "Flu", 40, "LOW"))
+
+
+def test_export_writes_failed_records_to_the_index():
+    records = [
+        patient(id=1),
+        patient(id=2, gender=None, phone=None),
+        patient(id=3, confidence=None),
+        patient(id=4, name="Ravi / Kumar"),
+    ]
+    buffer = io.BytesIO()
+    assert export_escalations(records, buffer, max_workers=1) == (3, 1)
+
+    with zipfile.ZipFile(buffer) as archive:
+        index = list(csv.DictReader(io.TextIOWrapper(archive.open("index.csv"), encoding="utf-8")))
+        names = set(archive.namelist())
+    assert [row["id"] for row in index] == ["1", "2", "3", "4"]
+    assert [bool(row["error"]) for row in index] == [False, False, True, False]
+    assert "TypeError" in index[2]["error"] and not index[2]["qr_file"]
+    assert {row["qr_file"] for row in index if row["qr_file"]} | {"index.csv"} == names
+    assert "qr/4_Ravi_Kumar.png" in names
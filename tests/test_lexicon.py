@@ -0,0 +1,60 @@
+"""
+Free-text symptom extraction (SymptomLexicon.extract)
+"""
+
+import pytest
+
+from prediction import extract_symptoms, normalize_symptom_name
+
+# The voice parser before the lexicon: a substring test per form symptom
+FORM_SYMPTOMS = [
+    "Fever", "Headache", "Cough", "Joint Pain", "Rash", "Bleeding",
+    "Nausea", "Stomach Pain", "Diarrhea", "Weakness", "Loss of Appetite",
+    "Sore Throat", "Body Ache", "Fatigue", "Runny Nose", "Weight Loss",
+    "Night Sweats", "Chest Pain", "Chills", "Breathing Difficulty", "Loss of Taste",
+]
+
+PHRASES = [
+    "I have headaches and fevers",
+    "Fever, headache, cough",
+    "coughing a lot since monday and feeling feverish with chills",
+    "my child has a rash and joint pains",
+    "nausea and stomach pains after eating, some diarrhea",
+    "sore throat, runny nose and body aches",
+    "night sweats and weight loss for two months, coughing blood",
+    "chest pain and breathing difficulty when walking",
+    "extreme fatigue and weakness, loss of appetite",
+    "gums bleeding, high temperature",
+    "lost my sense of smell, loss of taste",
+]
+
+
+def substring_extract(text):
+    text = text.lower()
+    return {normalize_symptom_name(s) for s in FORM_SYMPTOMS if s.lower() in text}
+
+
+@pytest.mark.parametrize("text", PHRASES)
+def test_extract_finds_what_the_substring_parser_did(text):
+    assert substring_extract(text) <= set(extract_symptoms(text))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I have headaches and fevers", ["headache", "fever"]),
+    ("coughing a lot, feeling feverish", ["cough", "fever"]),
+    ("rashes on both arms", ["rash"]),
+    ("shortness of breath and head ache", ["breathing difficulty", "headache"]),
+    ("Fever fever FEVER", ["fever"]),
+])
+def test_extract_inflections_and_synonyms(text, expected):
+    assert extract_symptoms(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "temperature is normal",
+    "Rashid came in for a checkup",
+    "feverfew tea",
+    "",
+])
+def test_extract_ignores_matches_inside_other_words(text):
+    assert extract_symptoms(text) == []
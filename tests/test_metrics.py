@@ -0,0 +1,89 @@
+"""
+Stage latency histograms and their Prometheus export
+"""
+
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import METRIC_NAME, Histogram
+
+
+@pytest.fixture
+def enabled_metrics():
+    was_enabled = metrics.enabled()
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.reset()
+    if not was_enabled:
+        metrics.disable()
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram(buckets=(0.1, 0.2, 0.4))
+    for seconds in (0.05, 0.1, 0.15, 0.3, 1.0):
+        hist.observe(seconds)
+    counts, total, count = hist.snapshot()
+    # A value equal to a bound falls in that bound's bucket (Prometheus `le`)
+    assert counts == [2, 1, 1, 1]
+    assert (round(total, 6), count) == (1.6, 5)
+    assert hist.quantile(0.4) == pytest.approx(0.1)
+    assert hist.quantile(0.5) == pytest.approx(0.15)
+    assert hist.quantile(1.0) == 0.4
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_disabled_spans_record_nothing():
+    metrics.disable()
+    try:
+        with metrics.span("disabled_stage"):
+            pass
+        assert metrics.span("other") is metrics.span("another")
+        assert "disabled_stage" not in {row["stage"] for row in metrics.summary()}
+    finally:
+        metrics.reset()
+
+
+def test_spans_feed_summary_and_prometheus(enabled_metrics):
+    for _ in range(3):
+        with metrics.span("predict"):
+            time.sleep(0.001)
+    metrics.set_gauge("test_gauge_seconds", 1.5, "A test gauge")
+    row, = metrics.summary()
+    assert row["stage"] == "predict" and row["count"] == 3 and row["mean_ms"] >= 1
+
+    text = metrics.render_prometheus()
+    assert f'{METRIC_NAME}_bucket{{stage="predict",le="+Inf"}} 3' in text
+    assert f'{METRIC_NAME}_count{{stage="predict"}} 3' in text
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(f"{METRIC_NAME}_bucket")]
+    assert buckets == sorted(buckets)
+    assert "# TYPE healthcare_test_gauge_seconds gauge\nhealthcare_test_gauge_seconds 1.5" in text
+    assert metrics.gauge("test_gauge_seconds") == 1.5
+
+
+def test_export_file_and_http(enabled_metrics, tmp_path):
+    with metrics.span("export"):
+        pass
+    path = metrics.export_file(str(tmp_path / "metrics.prom"))
+    with open(path) as f:
+        assert 'stage="export"' in f.read()
+
+    server = metrics.serve(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert 'stage="export"' in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_export_file_is_skipped_while_disabled(tmp_path):
+    metrics.disable()
+    assert metrics.export_file(str(tmp_path / "metrics.prom")) is None
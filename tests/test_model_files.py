@@ -0,0 +1,153 @@
+"""
+Versioned model files, the model watcher, and running the entry points on a model file
+"""
+
+import copy
+import csv
+import io
+import json
+import logging
+import os
+
+import pytest
+
+import prediction
+from conftest import SMALL_MODEL
+from model_files import ModelWatcher, load_model, model_file_name, model_from_dict, save_model
+from prediction import predict_disease
+from prediction_table import MAX_TABLE_SYMPTOMS, PredictionTable, build_table, check_table_fits
+from triage import triage
+
+
+@pytest.fixture(autouse=True)
+def builtin_model_after():
+    yield
+    prediction.set_prediction_table(None)
+    prediction.activate_model(prediction.builtin_model())
+
+
+def small_document(**changes):
+    document = copy.deepcopy(SMALL_MODEL)
+    document.update(changes)
+    return document
+
+
+def write_document(directory, document, version=None):
+    path = os.path.join(directory, model_file_name(version or document["version"]))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f)
+    return path
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"version": 0}, "version must be a positive integer"),
+    ({"version": True}, "version must be a positive integer"),
+    ({"format": 2}, "unsupported model format"),
+    ({"diseases": {}}, "diseases must map"),
+    ({"symptom_weights": {"fever": {"Cold": 1}}}, "unknown disease 'Cold'"),
+    ({"symptom_weights": {"fever": {"Flu": "3"}}}, "must be a number"),
+    ({"fever_multipliers": {"Cold": 1.2}}, "fever_multipliers names unknown disease"),
+    ({"risk_thresholds": {"nope": 1}}, "unknown risk threshold"),
+])
+def test_invalid_documents_are_rejected(changes, message):
+    with pytest.raises(ValueError, match=message):
+        model_from_dict(small_document(**changes))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = model_from_dict(SMALL_MODEL)
+    path = save_model(model, str(tmp_path))
+    assert os.path.basename(path) == "weights-v7.json"
+    loaded = load_model(path)
+    assert loaded.version == 7 and loaded.source == path
+    assert loaded.disease_symptoms == model.disease_symptoms
+    assert loaded.symptom_weights == model.symptom_weights
+
+
+def test_file_name_must_match_version(tmp_path):
+    path = write_document(str(tmp_path), SMALL_MODEL, version=8)
+    with pytest.raises(ValueError, match="file name says version 8"):
+        load_model(path)
+
+
+def test_watcher_activates_newest_version(tmp_path):
+    write_document(str(tmp_path), small_document(version=1))
+    write_document(str(tmp_path), small_document(version=2))
+    model = ModelWatcher(str(tmp_path)).check()
+    assert model.version == 2
+    assert prediction.get_active_model() is model
+    assert predict_disease(["fever", "cough"], 30, "", None) == ("Flu", 100)
+
+
+def test_watcher_skips_bad_file_until_it_changes(tmp_path, caplog):
+    write_document(str(tmp_path), small_document(version=1))
+    bad = os.path.join(str(tmp_path), model_file_name(2))
+    with open(bad, "w") as f:
+        f.write("{not json")
+    watcher = ModelWatcher(str(tmp_path))
+    with caplog.at_level(logging.ERROR, logger="model_files"):
+        assert watcher.check().version == 1
+    assert bad in watcher.errors
+    assert "Skipping model file" in caplog.text
+    # Not retried while unchanged
+    assert watcher.check() is None
+
+    write_document(str(tmp_path), small_document(version=2))
+    os.utime(bad, ns=(0, 0))
+    assert watcher.check().version == 2
+    assert watcher.errors == {}
+
+
+def test_watcher_ignores_older_versions(tmp_path):
+    prediction.activate_model(model_from_dict(small_document(version=5)))
+    write_document(str(tmp_path), small_document(version=3))
+    assert ModelWatcher(str(tmp_path)).check() is None
+    assert prediction.get_active_model().version == 5
+
+
+def test_dropping_stale_table_logs_warning(small_model, tmp_path, caplog):
+    table = PredictionTable(build_table(str(tmp_path / "table.npy"), workers=1))
+    prediction.set_prediction_table(table)
+    with caplog.at_level(logging.WARNING, logger="prediction"):
+        prediction.activate_model(model_from_dict(small_document(version=8, fever_multipliers={"Flu": 2.0})))
+    assert prediction._PREDICTION_TABLE is None
+    assert "Table mode is off" in caplog.text and "v8" in caplog.text
+
+
+def test_build_table_for_model_file(tmp_path):
+    path = save_model(model_from_dict(SMALL_MODEL), str(tmp_path))
+    # Built while the built-in model is active
+    table = PredictionTable(build_table(str(tmp_path / "table.npy"), workers=1, model_path=path))
+    assert table.symptoms == load_model(path).scoring.symptoms
+    assert not table.is_current()
+    prediction.activate_model(load_model(path))
+    assert table.is_current()
+    assert table.predict(["fever", "headache"], None) == predict_disease(["fever", "headache"], 0, "", None)
+
+
+def test_table_fit_is_checked_up_front(tmp_path):
+    many_diseases = {f"D{i}": ["fever"] for i in range(129)}
+    model = model_from_dict(small_document(diseases=many_diseases, symptom_weights={"fever": {"D0": 1}},
+                                           low_bp_multipliers={}, fever_multipliers={}))
+    with pytest.raises(ValueError, match="129 diseases"):
+        check_table_fits(model.scoring)
+
+    many_symptoms = {f"s{i}": {"Flu": 1} for i in range(MAX_TABLE_SYMPTOMS + 1)}
+    path = save_model(model_from_dict(small_document(symptom_weights=many_symptoms)), str(tmp_path))
+    with pytest.raises(ValueError, match=f"{MAX_TABLE_SYMPTOMS + 1} symptoms"):
+        build_table(str(tmp_path / "table.npy"), workers=1, model_path=path)
+    assert not os.path.exists(tmp_path / "table.npy.tmp.npy")
+
+
+def test_triage_scores_with_model_file(tmp_path):
+    path = save_model(model_from_dict(SMALL_MODEL), str(tmp_path))
+    source = io.StringIO("name,age,city,symptoms\nA,30,Pune,headache;nausea\nB,40,Pune,high temperature;cough\n")
+    dest = io.StringIO()
+    triage(source, dest, workers=1, progress_every=0, model_path=path)
+    rows = list(csv.DictReader(io.StringIO(dest.getvalue())))
+    prediction.activate_model(load_model(path))
+    assert [row["disease"] for row in rows] == ["Migraine", "Flu"]
+    assert [float(row["confidence"]) for row in rows] == [
+        predict_disease(["headache", "nausea"], 30, "Pune", None)[1],
+        predict_disease(["high temperature", "cough"], 40, "Pune", None)[1],
+    ]
@@ -0,0 +1,108 @@
+"""
+Columnar patient export: Parquet and Arrow IPC files hold exactly the stored records
+"""
+
+import io
+import random
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from conftest import CITIES  # noqa: E402
+from patient_export import export_patients, export_store, main, patient_schema  # noqa: E402
+from prediction import SYMPTOM_WEIGHTS  # noqa: E402
+from storage import PatientStore  # noqa: E402
+
+
+def add_patients(store, count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        store.add({
+            "created_at": 1_700_000_000 + rng.randint(0, 10_000_000) / 1000,
+            "name": f"Patient {i}",
+            "age": rng.randint(1, 95),
+            "gender": rng.choice(["Male", "Female", None]),
+            "city": rng.choice(CITIES),
+            "phone": rng.choice([None, f"+91{rng.randint(7_000_000_000, 9_999_999_999)}"]),
+            "symptoms": rng.sample(list(SYMPTOM_WEIGHTS), rng.randint(0, 4)),
+            "vitals": None if rng.random() < 0.2 else {
+                "bp_systolic": rng.randint(80, 160),
+                "bp_diastolic": rng.randint(50, 100),
+                "temperature": round(rng.uniform(97.0, 104.0), 1),
+            },
+            "disease": rng.choice(["Dengue", "Flu", "No Disease"]),
+            "confidence": round(rng.uniform(0, 100), 1),
+            "risk_level": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            "risk_score": rng.randint(0, 100),
+        })
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PatientStore(str(tmp_path / "patients.db"))
+    add_patients(store, 250, seed=25)
+    return store
+
+
+def exported_rows(table):
+    rows = table.to_pylist()
+    for row in rows:
+        row["created_at"] = row["created_at"].timestamp()
+    return rows
+
+
+def expected_rows(records):
+    return [{**record, "created_at": round(record["created_at"], 6)} for record in records]
+
+
+def read_arrow(data):
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all()
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_round_trip(store, format):
+    buffer = io.BytesIO()
+    assert export_store(store, buffer, format, row_group_size=64) == 250
+    data = buffer.getvalue()
+    table = pq.read_table(pa.BufferReader(data)) if format == "parquet" else read_arrow(data)
+    assert table.schema.equals(patient_schema())
+    assert exported_rows(table) == expected_rows(store.iter_records())
+
+
+def test_one_row_group_per_batch(store, tmp_path):
+    path = str(tmp_path / "patients.parquet")
+    export_store(store, path, row_group_size=100)
+    metadata = pq.ParquetFile(path).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [100, 100, 50]
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def test_filters(store):
+    buffer = io.BytesIO()
+    written = export_store(store, buffer, "arrow", risk_level="HIGH", city="Pune")
+    expected = list(store.iter_records(risk_level="HIGH", city="Pune"))
+    assert written == len(expected) > 0
+    assert exported_rows(read_arrow(buffer.getvalue())) == expected_rows(expected)
+
+
+def test_empty_export_has_schema():
+    buffer = io.BytesIO()
+    assert export_patients([], buffer, "parquet") == 0
+    table = pq.read_table(pa.BufferReader(buffer.getvalue()))
+    assert table.num_rows == 0 and table.schema.equals(patient_schema())
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unknown export format 'csv'"):
+        export_patients([], io.BytesIO(), "csv")
+
+
+def test_cli_picks_format_from_extension(store, tmp_path, capsys):
+    path = str(tmp_path / "high.arrow")
+    assert main([path, "--db", store.path, "--risk-level", "HIGH"]) == 0
+    with open(path, "rb") as f:
+        table = read_arrow(f.read())
+    assert table.num_rows == store.count(risk_level="HIGH")
+    assert "Exported" in capsys.readouterr().err
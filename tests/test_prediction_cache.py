@@ -0,0 +1,39 @@
+"""
+analyze_patient's LRU cache returns exactly what the uncached scalar path does
+"""
+
+import prediction
+from conftest import random_cases, scalar_analysis
+from prediction import PredictionCache, analysis_cache_key, analyze_patient
+
+
+def test_analyze_patient_matches_scalar_on_hits_and_misses():
+    cases = random_cases(3000, seed=3)
+    # Every case twice: first a miss, then usually a hit on an equivalent earlier key
+    for case in cases + cases:
+        assert analyze_patient(*case) == scalar_analysis(*case)
+    assert prediction.prediction_cache_stats()["hits"] > 0
+
+
+def test_analyze_patient_symptom_order():
+    symptoms = ["weight loss", "fever", "loss of appetite", "chills", "bleeding", "stomach pain", "chest pain"]
+    vitals = {"bp_systolic": 147, "bp_diastolic": 88, "temperature": 101.8}
+    for ordering in (symptoms, sorted(symptoms), list(reversed(symptoms))):
+        assert analyze_patient(ordering, 20, "Pune", vitals) == scalar_analysis(ordering, 20, "Pune", vitals)
+
+
+def test_cache_key_keeps_symptom_order_and_drops_unknowns():
+    vitals = {"bp_systolic": 120, "bp_diastolic": 80, "temperature": 98.6}
+    key = analysis_cache_key(["Fever", "cough", "no such symptom"], 30, "Pune", vitals)
+    assert key == analysis_cache_key(["fever", "coughing"], 30, "Pune", vitals)
+    assert key != analysis_cache_key(["cough", "fever"], 30, "Pune", vitals)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", ("Flu", 50.0, "LOW", 1))
+    cache.put("b", ("Flu", 50.0, "LOW", 1))
+    assert cache.get("a") is not None
+    cache.put("c", ("Flu", 50.0, "LOW", 1))
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
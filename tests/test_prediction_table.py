@@ -0,0 +1,58 @@
+"""
+Table mode: a precomputed table answers exactly like predict_disease
+"""
+
+import itertools
+
+import pytest
+
+import prediction
+from prediction import analyze_patient, predict_disease
+from prediction_table import (
+    PredictionTable,
+    VITALS_CLASSES,
+    build_table,
+    enable_table_mode,
+    verify_table,
+    vitals_class,
+)
+
+
+@pytest.fixture
+def table(small_model, tmp_path):
+    return PredictionTable(build_table(str(tmp_path / "table.npy"), workers=1))
+
+
+def test_table_matches_predict_disease_for_every_input(table):
+    for vitals in VITALS_CLASSES:
+        for count in range(len(table.symptoms) + 1):
+            for symptoms in itertools.combinations(table.symptoms, count):
+                assert table.predict(list(symptoms), vitals) == predict_disease(list(symptoms), 0, "", vitals)
+    assert verify_table(table, samples=2000) == 0
+
+
+def test_repeated_symptoms_fall_back_to_predict_disease(table):
+    assert table.symptom_mask(["fever", "high temperature"]) is None
+    assert table.predict(["fever", "fever"], None) == predict_disease(["fever", "fever"], 0, "", None)
+
+
+def test_vitals_class():
+    assert vitals_class(None) == 0
+    assert vitals_class({"temperature": 100.0}) == 0
+    assert vitals_class({"temperature": 100.1}) == 1
+    assert vitals_class({"bp_systolic": 89}) == 2
+    assert vitals_class({"bp_diastolic": 59, "temperature": 103}) == 3
+
+
+def test_table_mode_serves_analyze_patient(table):
+    enable_table_mode(table.path)
+    vitals = {"bp_systolic": 85, "bp_diastolic": 55, "temperature": 101.5}
+    disease, confidence, _, _ = analyze_patient(["fever", "headache"], 40, "Pune", vitals)
+    assert (disease, confidence) == predict_disease(["fever", "headache"], 40, "Pune", vitals)
+
+
+def test_stale_table_is_refused(table, small_model):
+    prediction.activate_model(prediction.builtin_model())
+    assert not table.is_current()
+    with pytest.raises(ValueError, match="rebuild"):
+        enable_table_mode(table.path)
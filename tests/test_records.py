@@ -0,0 +1,81 @@
+"""
+Compact patient records round-trip the app's patient dicts
+"""
+
+import pytest
+
+from conftest import random_cases
+from prediction import predict_disease
+from records import SYMPTOMS, PatientRecord, PatientTable, decode_symptoms, encode_symptoms, sample_records
+
+
+def test_symptom_order_survives_encoding():
+    symptoms = ["weight loss", "fever", "loss of appetite", "chills", "bleeding", "stomach pain", "chest pain"]
+    vitals = {"bp_systolic": 147, "bp_diastolic": 88, "temperature": 101.8}
+    record = PatientRecord.from_dict({"symptoms": symptoms, "vitals": vitals})
+    assert record.symptoms == symptoms
+    restored = record.to_dict()
+    assert predict_disease(restored["symptoms"], 20, "Pune", restored["vitals"]) == predict_disease(
+        symptoms, 20, "Pune", vitals
+    )
+
+
+@pytest.mark.parametrize("symptoms", [
+    [],
+    ["fever", "cough"],
+    ["cough", "fever"],
+    ["Fever", "cough", "high temperature", "cough"],
+    ["unknown", "fever"],
+    list(reversed(SYMPTOMS)),
+])
+def test_encode_decode_round_trip(symptoms):
+    mask, extra, order = encode_symptoms(symptoms)
+    assert decode_symptoms(mask, extra, order) == symptoms
+
+
+def test_mask_order_needs_no_order():
+    assert encode_symptoms([SYMPTOMS[0], SYMPTOMS[3], "Fever", SYMPTOMS[0]])[2] == 0
+    assert encode_symptoms([SYMPTOMS[3], SYMPTOMS[0]])[2] != 0
+    assert encode_symptoms(["Fever", SYMPTOMS[0]])[2] != 0
+
+
+def test_table_round_trip():
+    records = sample_records(500, seed=3)
+    records.append({**records[0], "symptoms": list(reversed(SYMPTOMS)), "vitals": None, "age": None})
+    table = PatientTable.from_records(records)
+    assert len(table) == len(records)
+    assert list(table) == [PatientRecord.from_dict(r).to_dict() for r in records]
+    assert table.to_dict(len(records) - 1)["symptoms"] == list(reversed(SYMPTOMS))
+
+
+def test_table_predictions_match_the_dicts():
+    table = PatientTable()
+    for symptoms, age, city, vitals in random_cases(500, seed=15):
+        table.append_dict({"symptoms": symptoms, "age": age, "city": city, "vitals": vitals})
+    for row, (symptoms, age, city, vitals) in enumerate(random_cases(500, seed=15)):
+        restored = table.to_dict(row)
+        assert restored["symptoms"] == symptoms
+        assert predict_disease(restored["symptoms"], age, city, restored["vitals"]) == predict_disease(
+            symptoms, age, city, vitals
+        )
+
+
+@pytest.mark.parametrize("field, value", [
+    ("bp_systolic", 120.7),
+    ("bp_systolic", 65535),
+    ("bp_diastolic", -1),
+    ("age", 300),
+    ("age", float("nan")),
+])
+def test_table_rejects_numbers_it_would_truncate(field, value):
+    table = PatientTable()
+    record = {"name": "A", "age": 30, "vitals": {"bp_systolic": 120, "bp_diastolic": 80}}
+    if field == "age":
+        record["age"] = value
+    else:
+        record["vitals"][field] = value
+    with pytest.raises(ValueError, match=field):
+        table.append_dict(record)
+    assert len(table) == 0
+    table.append_dict({**record, "age": 30, "vitals": {"bp_systolic": 120.0, "bp_diastolic": 80}})
+    assert table.to_dict(0)["vitals"]["bp_systolic"] == 120
@@ -0,0 +1,76 @@
+"""
+Shared patient registry: absolute cursors, retention and waiting readers
+"""
+
+import threading
+
+from registry import PatientRegistry
+
+
+def test_cursor_reads_only_new_entries():
+    registry = PatientRegistry()
+    assert registry.since(0) == ([], 0)
+    registry.append({"n": 0})
+    cursor = registry.cursor
+    registry.append({"n": 1})
+    registry.append({"n": 2})
+    entries, cursor = registry.since(cursor)
+    assert [e["n"] for e in entries] == [1, 2]
+    assert registry.since(cursor) == ([], 3)
+    assert len(registry) == 3
+
+
+def test_old_entries_are_dropped_but_cursors_stay_absolute():
+    registry = PatientRegistry(maxlen=10)
+    early = registry.snapshot()
+    positions = [registry.append({"n": n}) for n in range(55)]
+    assert positions == list(range(55))
+    entries, cursor = registry.since(0)
+    assert cursor == 55
+    # Only the retained tail comes back to a cursor that fell behind
+    assert 10 <= len(entries) <= 20 and entries[-1]["n"] == 54
+    assert [e["n"] for e in registry.since(50)[0]] == [50, 51, 52, 53, 54]
+    # Snapshots taken earlier are unaffected by later appends and compaction
+    assert early.since(0) == [] and early.end == 0
+
+
+def test_snapshot_is_stable_while_appending():
+    registry = PatientRegistry(maxlen=4)
+    for n in range(6):
+        registry.append({"n": n})
+    snapshot = registry.snapshot()
+    before = [e["n"] for e in snapshot.since(0)]
+    for n in range(6, 20):
+        registry.append({"n": n})
+    assert [e["n"] for e in snapshot.since(0)] == before
+
+
+def test_wait_wakes_on_append_and_times_out():
+    registry = PatientRegistry()
+    assert registry.wait(0, timeout=0.01) == ([], 0)
+
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(got=registry.wait(0, timeout=5)))
+    waiter.start()
+    registry.append({"n": 0})
+    waiter.join(5)
+    assert result["got"] == ([{"n": 0}], 1)
+
+
+def test_concurrent_appends_get_distinct_positions():
+    registry = PatientRegistry(maxlen=50)
+    positions = []
+    lock = threading.Lock()
+
+    def writer(thread):
+        mine = [registry.append({"thread": thread, "n": n}) for n in range(500)]
+        with lock:
+            positions.extend(mine)
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(positions) == list(range(2000))
+    assert registry.cursor == 2000
@@ -0,0 +1,129 @@
+"""
+Scoring service: HTTP handling and micro-batched results
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import service
+from conftest import random_cases, scalar_analysis
+from service import ScoringService
+
+
+def run(scenario):
+    """Start a service on a free port, run scenario(port) against it, then shut it down"""
+    async def main():
+        svc = ScoringService(max_batch_size=32, max_wait=0.002)
+        server = await svc.start("127.0.0.1", 0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            await svc.batcher.stop()
+    return asyncio.run(main())
+
+
+async def exchange(port, raw: bytes, responses: int = 1):
+    """Send raw request bytes; returns [(status, json body)] for the responses read"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    results = []
+    for _ in range(responses):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(next(line.split(b":")[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")))
+        results.append((int(head.split()[1]), json.loads(await reader.readexactly(length))))
+    writer.close()
+    return results
+
+
+def request(method, path, body=None, headers=None):
+    data = b"" if body is None else json.dumps(body).encode()
+    lines = [f"{method} {path} HTTP/1.1", "Host: test", f"Content-Length: {len(data)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + data
+
+
+def payload(case):
+    symptoms, age, city, vitals = case
+    return {"symptoms": symptoms, "age": age, "city": city, "vitals": vitals}
+
+
+def expected(case):
+    disease, confidence, level, score = scalar_analysis(*case)
+    return {"disease": disease, "confidence": confidence, "risk_level": level, "risk_score": score}
+
+
+def test_concurrent_single_requests_match_scalar():
+    cases = random_cases(200, seed=12)
+
+    async def scenario(port):
+        return await asyncio.gather(*(exchange(port, request("POST", "/score", payload(c))) for c in cases))
+
+    responses = run(scenario)
+    assert [r[0] for r in responses] == [(200, expected(c)) for c in cases]
+
+
+def test_batch_and_keep_alive():
+    cases = random_cases(50, seed=13)
+
+    async def scenario(port):
+        raw = request("POST", "/score/batch", {"patients": [payload(c) for c in cases]}) + request("GET", "/health")
+        return await exchange(port, raw, responses=2)
+
+    (status, body), (health_status, health) = run(scenario)
+    assert status == 200 and body["results"] == [expected(c) for c in cases]
+    assert health_status == 200 and health["scored"] == 50
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"POST /score HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400),
+    (b"POST /score HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (b"POST /score HTTP/1.1\r\nContent-Length: +5\r\n\r\n", 400),
+    (b"POST /score HTTP/1.1\r\nContent-Length: 99999999999\r\n\r\n", 413),
+    (b"POST /score HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", 411),
+    (b"GARBAGE\r\n\r\n", 400),
+])
+def test_unreadable_bodies_are_rejected(raw, status):
+    async def scenario(port):
+        return await exchange(port, raw)
+
+    (got, body), = run(scenario)
+    assert got == status and body["error"]
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("POST", "/score", {"symptoms": "fever", "age": 30}, 400),
+    ("POST", "/score", {"symptoms": [], "age": True}, 400),
+    ("POST", "/score", {"symptoms": [], "age": 30, "vitals": {"temperature": "hot"}}, 400),
+    ("POST", "/score/batch", {"patients": {}}, 400),
+    ("GET", "/score", None, 405),
+    ("POST", "/health", None, 405),
+    ("GET", "/nowhere", None, 404),
+])
+def test_bad_requests(method, path, body, status):
+    async def scenario(port):
+        return await exchange(port, request(method, path, body))
+
+    (got, _), = run(scenario)
+    assert got == status
+
+
+def test_invalid_json():
+    async def scenario(port):
+        return await exchange(port, b"POST /score HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops")
+
+    (status, body), = run(scenario)
+    assert status == 400 and "JSON" in body["error"]
+
+
+def test_body_length_limit(monkeypatch):
+    monkeypatch.setattr(service, "MAX_BODY_BYTES", 10)
+    assert service.body_length({"content-length": "10"}) == 10
+    assert service.body_length({}) == 0
+    with pytest.raises(service.HTTPError) as error:
+        service.body_length({"content-length": "11"})
+    assert error.value.status == 413
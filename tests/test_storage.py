@@ -0,0 +1,128 @@
+"""
+PatientStore: running counters and paging
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from conftest import CITIES
+from prediction import SYMPTOM_WEIGHTS
+from storage import SUMMARY_COLUMNS, PatientStore, _where, page_cursor
+
+
+def add_random_patients(store, count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        store.add({
+            "created_at": 1_700_000_000 + rng.randint(0, 50),
+            "name": rng.choice(["Asha", "Amit", "Ravi", "Rani", "Priya", "50%_off"]) + f" {i}",
+            "age": rng.randint(1, 95),
+            "city": rng.choice(CITIES + [None]),
+            "symptoms": rng.sample(list(SYMPTOM_WEIGHTS), 2),
+            "disease": rng.choice(["Dengue", "Flu", "TB", None]),
+            "risk_level": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+        })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PatientStore(str(tmp_path / "patients.db"))
+
+
+def test_patient_store_counters(store):
+    add_random_patients(store, 200, seed=6)
+    records = list(store.iter_records())
+    assert store.verify_counters()
+    assert store.count() == 200
+    assert store.count(risk_level="HIGH") == sum(1 for r in records if r["risk_level"] == "HIGH")
+    assert store.count(city="Pune", disease="Flu") == sum(
+        1 for r in records if r["city"] == "Pune" and r["disease"] == "Flu"
+    )
+    assert sum(store.counts_by("city").values()) == 200
+    store.clear()
+    assert store.verify_counters()
+    assert store.count() == 0
+
+
+def test_counters_follow_deletes(store):
+    add_random_patients(store, 50, seed=7)
+    conn = sqlite3.connect(store.path)
+    with conn:
+        conn.execute("DELETE FROM patients WHERE risk_level = 'HIGH'")
+    conn.close()
+    assert store.verify_counters()
+    assert store.count(risk_level="HIGH") == 0
+
+
+def test_counters_backfilled_for_an_existing_database(tmp_path):
+    path = str(tmp_path / "patients.db")
+    add_random_patients(PatientStore(path), 30, seed=8)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DELETE FROM patient_counts")
+    conn.close()
+    store = PatientStore(path)
+    assert store.verify_counters()
+    assert store.count() == 30
+
+
+def test_unknown_filter_column_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.count(name="Asha", city="Pune")
+    with pytest.raises(ValueError):
+        store.counts_by("name")
+
+
+def walk_pages(store, page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        rows = store.page(page_size, cursor, **filters)
+        if not rows:
+            return pages
+        pages.append(rows)
+        cursor = page_cursor(rows[-1])
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"risk_level": "HIGH"},
+    {"city": "Pune", "disease": "Flu"},
+    {"city": "Delhi", "disease": "TB", "risk_level": "LOW"},
+    {"name_prefix": "a"},
+    {"name_prefix": "50%_"},
+])
+def test_keyset_pages_match_a_full_newest_first_listing(store, filters):
+    # created_at has many ties, so the id tie-break decides the order
+    add_random_patients(store, 300, seed=9)
+    expected = [
+        (r["created_at"], r["id"]) for r in store.iter_records()
+        if all(r[c] == v for c, v in filters.items() if c != "name_prefix")
+        and r["name"].lower().startswith(filters.get("name_prefix", "").lower())
+    ]
+    expected.sort(reverse=True)
+    pages = walk_pages(store, 7, **filters)
+    assert [page_cursor(row) for rows in pages for row in rows] == expected
+    assert all(len(rows) == 7 for rows in pages[:-1])
+    assert len(expected) == store.count(**filters)
+
+
+def test_skip_jumps_ahead_of_a_cursor(store):
+    add_random_patients(store, 200, seed=10)
+    pages = walk_pages(store, 10, risk_level="LOW")
+    jumped = store.page(10, page_cursor(pages[0][-1]), skip=20, risk_level="LOW")
+    assert jumped == pages[3]
+    assert store.page(10, skip=10, risk_level="LOW") == pages[1]
+
+
+@pytest.mark.parametrize("filters", [{}, {"risk_level": "HIGH"}, {"city": "Pune", "disease": "Flu"}])
+def test_pages_are_index_range_scans(store, filters):
+    where, params = _where(filters)
+    where += " AND (created_at, id) < (?, ?)" if where else " WHERE (created_at, id) < (?, ?)"
+    plan = store._conn().execute(
+        f"EXPLAIN QUERY PLAN SELECT {SUMMARY_COLUMNS} FROM patients{where} ORDER BY created_at DESC, id DESC LIMIT 20",
+        params + [1e12, 1],
+    ).fetchall()
+    details = " ".join(row[3] for row in plan)
+    assert "USING INDEX" in details and "TEMP B-TREE" not in details
@@ -0,0 +1,124 @@
+"""
+Case series: incremental trend statistics, gaps, feeds and the saved store
+"""
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+import data
+from data import get_trend_direction
+from timeseries import CaseSeries, CaseSeriesStore, TrendIndex, ingest, read_feed
+
+
+def test_case_series_append_matches_get_trend_direction():
+    rng = random.Random(5)
+    for _ in range(50):
+        initial = [rng.randint(0, 500) for _ in range(rng.randint(0, 10))]
+        series = CaseSeries(np.array(initial, dtype=np.int32), "2024-01-01")
+        values = list(initial)
+        for _ in range(40):
+            count = rng.randint(0, 500)
+            series.append(count)
+            values.append(count)
+            assert series.trend_direction() == get_trend_direction(values)
+            assert series.values.tolist() == values
+
+
+def test_gaps_are_stored_as_missing_not_zero():
+    store = CaseSeriesStore()
+    store.append("Pune", "Flu", "2024-01-01", 10, step_days=1)
+    store.append("Pune", "Flu", "2024-01-04", 40)
+    series = store.series("Pune", "Flu")
+    assert np.isnan(series.values[1:3]).all()
+    assert series.values[[0, 3]].tolist() == [10, 40]
+    # Unreported points add nothing to either half
+    assert series.trend_direction() == get_trend_direction([10, 0, 0, 40])
+    assert series.change_pct() == 300
+
+
+def test_unreported_latest_point():
+    series = CaseSeries(np.array([20, 30], dtype=np.float32), "2024-01-01")
+    series.append(None)
+    assert len(series) == 3
+    assert series.change_pct() == 50
+    assert series.trend_direction() == get_trend_direction([20, 30, 0])
+
+
+def test_append_publishes_length_and_stats_together():
+    series = CaseSeries(np.array([5, 6, 7], dtype=np.float32), "2024-01-01")
+    for count in range(100):
+        series.append(count)
+        length, first_half, total = series._state
+        values = series.values
+        assert length == len(values)
+        assert (first_half, total) == (int(values[:length // 2].sum()), int(values.sum()))
+
+
+def test_ingest_feed_with_empty_counts(tmp_path):
+    feed = tmp_path / "feed.csv"
+    feed.write_text("city,disease,date,cases\nPune,Flu,2024-01-01,5\nPune,Flu,2024-01-08,\nPune,Flu,2024-01-15,9\n")
+    store = CaseSeriesStore()
+    assert ingest(store, read_feed(str(feed))) == 3
+    values = store.series("Pune", "Flu").values
+    assert values[0] == 5 and np.isnan(values[1]) and values[2] == 9
+
+
+def test_saved_store_round_trip_and_int_stores(tmp_path):
+    store = CaseSeriesStore.from_dict({"Pune": {"Flu": [1, 2, 3]}}, "2024-01-01")
+    store.append("Pune", "Flu", "2024-01-29", 4)
+    store.save(str(tmp_path))
+    loaded = CaseSeriesStore.load(str(tmp_path)).series("Pune", "Flu")
+    assert np.array_equal(loaded.values, store.series("Pune", "Flu").values, equal_nan=True)
+
+    # Stores written before counts were float32 hold int32 values
+    np.save(tmp_path / "values.npy", np.array([1, 2, 3], dtype=np.int32))
+    (tmp_path / "index.json").write_text(json.dumps([
+        {"city": "Pune", "disease": "Flu", "start": "2024-01-01", "step_days": 7, "offset": 0, "length": 3},
+    ]))
+    old = CaseSeriesStore.load(str(tmp_path)).series("Pune", "Flu")
+    old.append(None)
+    assert old.trend_direction() == get_trend_direction([1, 2, 3, 0])
+
+
+def test_refresh_picks_up_a_saved_store(tmp_path, monkeypatch):
+    path = str(tmp_path / "store")
+    CaseSeriesStore.from_dict({"Pune": {"Flu": [1, 2, 3]}}, "2024-01-01").save(path)
+    monkeypatch.setenv("HEALTHCARE_CASE_STORE", path)
+    monkeypatch.setattr(data, "_CASE_STORE_STAMP", None)
+    monkeypatch.setattr(data, "CASE_STORE", data.load_case_store())
+    monkeypatch.setattr(data, "TREND_INDEX", TrendIndex(data.CASE_STORE))
+    assert not data.refresh_case_store()
+    version = data.get_city_version("Pune")
+
+    # What the feed CLI does: load, ingest, save
+    other = CaseSeriesStore.load(path)
+    other.append("Pune", "Flu", "2024-01-22", 30)
+    other.save(path)
+    # Coarse filesystem timestamps could hide a save within the same tick
+    index = os.path.join(path, "index.json")
+    os.utime(index, ns=(os.stat(index).st_atime_ns, data._CASE_STORE_STAMP + 1_000_000_000))
+    assert data.refresh_case_store()
+    assert data.get_city_version("Pune") > version
+    assert data.get_city_trend("Pune", "Flu") == ("↑", 2900)
+
+
+def test_ingest_case_feed_saves_the_store(tmp_path, monkeypatch):
+    path = str(tmp_path / "store")
+    CaseSeriesStore.from_dict({"Pune": {"Flu": [1, 2, 3]}}, "2024-01-01").save(path)
+    monkeypatch.setenv("HEALTHCARE_CASE_STORE", path)
+    monkeypatch.setattr(data, "_CASE_STORE_STAMP", None)
+    monkeypatch.setattr(data, "CASE_STORE", data.load_case_store())
+    monkeypatch.setattr(data, "TREND_INDEX", TrendIndex(data.CASE_STORE))
+    feed = tmp_path / "feed.jsonl"
+    feed.write_text(json.dumps({"city": "Pune", "disease": "Flu", "date": "2024-01-29", "cases": 8}) + "\n")
+    version = data.get_city_version("Pune")
+    assert data.ingest_case_feed(str(feed)) == 1
+    assert data.get_city_version("Pune") > version
+    assert not data.refresh_case_store()
+    assert len(CaseSeriesStore.load(path).series("Pune", "Flu")) == 5
+    with pytest.raises(ValueError, match="already covered"):
+        data.ingest_case_feed(str(feed))
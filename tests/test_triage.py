@@ -0,0 +1,63 @@
+"""
+Batch triage of CSV dumps
+"""
+
+import csv
+import io
+
+import pytest
+
+from conftest import random_cases, scalar_analysis
+from triage import parse_row, score_chunk, triage
+
+
+def to_csv(cases):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "age", "city", "symptoms", "bp_systolic", "bp_diastolic", "temperature", "camp"])
+    for number, (symptoms, age, city, vitals) in enumerate(cases):
+        vitals = vitals or {}
+        writer.writerow([f"P{number}", age, city, ";".join(symptoms), vitals.get("bp_systolic", ""),
+                         vitals.get("bp_diastolic", ""), vitals.get("temperature", ""), "North"])
+    return out.getvalue()
+
+
+def test_parse_row():
+    row = {"age": "42.0", "city": " Pune ", "symptoms": "fever; cough;;", "temperature": "101.5", "bp_systolic": ""}
+    assert parse_row(row) == (["fever", "cough"], 42, "Pune", {"temperature": 101.5})
+    assert parse_row({"age": "7", "symptoms": "fever|rash"}, separator="|") == (["fever", "rash"], 7, "", None)
+    with pytest.raises(ValueError):
+        parse_row({"age": ""})
+    with pytest.raises(ValueError):
+        parse_row({"age": "30", "temperature": "hot"})
+
+
+def test_triage_matches_scalar_in_input_order():
+    # Symptoms containing the separator would not round-trip through the CSV
+    cases = [case for case in random_cases(700, seed=14) if not any(";" in s for s in case[0])]
+    dest = io.StringIO()
+    written = triage(io.StringIO(to_csv(cases)), dest, workers=1, chunk_size=64, progress_every=0)
+    rows = list(csv.DictReader(io.StringIO(dest.getvalue())))
+    assert written == len(rows) == len(cases)
+    for number, (row, case) in enumerate(zip(rows, cases)):
+        assert row["name"] == f"P{number}" and row["camp"] == "North" and row["error"] == ""
+        # The CSV round trip turns the vitals into floats; scalar scoring must see the same values
+        symptoms, age, city, vitals = parse_row(row)
+        disease, confidence, level, score = scalar_analysis(symptoms, age, city, vitals)
+        assert (row["disease"], float(row["confidence"]), row["risk_level"], int(row["risk_score"])) == (
+            disease, confidence, level, score
+        )
+
+
+def test_unparsable_rows_get_an_error():
+    rows = [
+        {"name": "ok", "age": "30", "symptoms": "fever"},
+        {"name": "bad age", "age": "thirty", "symptoms": "fever"},
+        {"name": "huge", "age": "1e400", "symptoms": "fever"},
+        {"name": "bad vitals", "age": "30", "symptoms": "fever", "temperature": "n/a"},
+    ]
+    scored = score_chunk(rows)
+    assert [row["name"] for row in scored] == ["ok", "bad age", "huge", "bad vitals"]
+    assert scored[0]["error"] == "" and scored[0]["disease"]
+    for row in scored[1:]:
+        assert row["error"] and row["disease"] == "" and row["risk_level"] == ""
@@ -0,0 +1,361 @@
+"""
+Columnar case-count store: one NumPy array per (city, disease)
+On disk a store is a directory holding index.json plus one values.npy that is
+loaded memory-mapped, so startup cost does not grow with the amount of history
+
+Usage (append feeds to a saved store):
+    python timeseries.py feed.csv [more.jsonl ...] --store case_store/ [--step-days 1]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+DateLike = Union[str, np.datetime64]
+
+# NaN marks a point with no report (a gap in the feed); float32 holds counts exactly up to 2**24
+VALUES_DTYPE = np.float32
+
+
+def _observed_sum(values: np.ndarray) -> int:
+    """Sum of the reported (non-NaN) points"""
+    return int(np.nansum(values, dtype=np.float64))
+
+
+class CaseSeries:
+    """
+    Regularly spaced case counts starting at `start`, one point every `step_days`; NaN where unreported
+    Appends are amortized O(1) and keep the trend statistics up to date incrementally
+    """
+
+    __slots__ = ("start", "step_days", "_buffer", "_state", "_initial_stats")
+
+    def __init__(self, values: np.ndarray, start: DateLike, step_days: int = 7):
+        self._buffer = values
+        self.start = np.datetime64(start, "D")
+        self.step_days = step_days
+        # (length, first-half sum, total) published as one tuple, so readers never see a length
+        # with statistics from another length; the sums cover reported points only, the first
+        # half being the first len // 2 points. Sums are None until the first append.
+        self._state: Tuple[int, Optional[int], Optional[int]] = (len(values), None, None)
+        # Sums of the initial values, computed on first use
+        self._initial_stats: Optional[Tuple[int, int]] = None
+
+    @property
+    def values(self) -> np.ndarray:
+        length = self._state[0]
+        return self._buffer[:length]
+
+    def __len__(self) -> int:
+        return self._state[0]
+
+    def end(self) -> np.datetime64:
+        """Date of the next point to be appended"""
+        return self.start + len(self) * np.timedelta64(self.step_days, "D")
+
+    def _stats(self, state: Tuple[int, Optional[int], Optional[int]]) -> Tuple[int, int]:
+        """(first-half sum, total) for a state"""
+        length, first_half, total = state
+        if first_half is not None:
+            return first_half, total
+        # Only the initial state has no sums; its points never change, so caching them apart from
+        # _state is safe even when a reader computes them while a writer appends
+        if self._initial_stats is None:
+            values = self._buffer[:length]
+            self._initial_stats = (_observed_sum(values[:length // 2]), _observed_sum(values))
+        return self._initial_stats
+
+    def append(self, count: Optional[int]):
+        """
+        Append the next point (None for a missing report); read-only (memory-mapped) data
+        is copied into a growable buffer once
+        """
+        state = self._state
+        length = state[0]
+        first_half, total = self._stats(state)
+        buffer = self._buffer
+        if length == len(buffer) or not buffer.flags.writeable:
+            grown = np.full(max(2 * length, 16), np.nan, dtype=VALUES_DTYPE)
+            grown[:length] = buffer[:length]
+            self._buffer = buffer = grown
+        # Written past the published length, so readers cannot see it before the state swap
+        buffer[length] = np.nan if count is None else count
+        # The halves split at len // 2, which moves right by one every other append
+        if (length + 1) // 2 > length // 2:
+            first_half += _observed_sum(buffer[length // 2:length // 2 + 1])
+        if count is not None:
+            total += int(count)
+        self._state = (length + 1, first_half, total)
+
+    def trend_direction(self) -> str:
+        """Same result as data.get_trend_direction(values) with unreported points counted as 0, in O(1)"""
+        state = self._state
+        if state[0] < 2:
+            return "→"
+        first_half, total = self._stats(state)
+        second_half = total - first_half
+        if second_half > first_half * 1.1:
+            return "↑"
+        elif second_half < first_half * 0.9:
+            return "↓"
+        else:
+            return "→"
+
+    def change_pct(self) -> int:
+        """Percentage change from the first to the latest reported point"""
+        values = self.values
+        reported = np.flatnonzero(~np.isnan(values))
+        if not len(reported):
+            return 0
+        first, last = int(values[reported[0]]), int(values[reported[-1]])
+        return int(((last - first) / first) * 100) if first > 0 else 0
+
+    def dates(self, first: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Dates of points [first, stop)"""
+        stop = len(self.values) if stop is None else stop
+        return self.start + np.arange(first, stop) * np.timedelta64(self.step_days, "D")
+
+    def _index(self, date: DateLike) -> int:
+        """Index of the first point on or after date"""
+        offset = (np.datetime64(date, "D") - self.start).astype(int)
+        return int(min(max(-(-offset // self.step_days), 0), len(self.values)))
+
+    def window_bounds(
+        self, last_weeks: Optional[int] = None, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+    ) -> slice:
+        """Index range for the last N weeks, or for dates in [start, end]"""
+        if last_weeks is not None:
+            points = -(-last_weeks * 7 // self.step_days)
+            return slice(max(len(self.values) - points, 0), len(self.values))
+        first = self._index(start) if start is not None else 0
+        stop = self._index(np.datetime64(end, "D") + 1) if end is not None else len(self.values)
+        return slice(first, max(stop, first))
+
+    def window(
+        self, last_weeks: Optional[int] = None, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+    ) -> np.ndarray:
+        """Counts in a window, as a view (no copy)"""
+        return self.values[self.window_bounds(last_weeks, start, end)]
+
+
+class CaseSeriesStore:
+    """All (city, disease) case series, city → disease → CaseSeries"""
+
+    def __init__(self):
+        self._series: Dict[str, Dict[str, CaseSeries]] = {}
+        # Bumped on every change to a city's data; caches key on it
+        self._versions: Dict[str, int] = {}
+        # Bumped on any change to any city
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def add_series(self, city: str, disease: str, values, start: DateLike, step_days: int = 7) -> CaseSeries:
+        series = CaseSeries(np.asarray(values, dtype=VALUES_DTYPE), start, step_days)
+        # Copy-on-write so readers iterating the old dicts are never disturbed
+        diseases = dict(self._series.get(city, {}))
+        diseases[disease] = series
+        if city in self._series:
+            self._series[city] = diseases
+        else:
+            self._series = {**self._series, city: diseases}
+        self._versions[city] = self._versions.get(city, 0) + 1
+        self._generation += 1
+        return series
+
+    def version(self, city: str) -> int:
+        """Data version of a city, incremented whenever its series change"""
+        return self._versions.get(city, 0)
+
+    @property
+    def generation(self) -> int:
+        """Store-wide data version, incremented whenever any series changes"""
+        return self._generation
+
+    def continue_versions(self, previous: "CaseSeriesStore"):
+        """Number this store's versions after previous's, e.g. when a reloaded store replaces it"""
+        self._versions = {city: previous.version(city) + 1 for city in set(self._series) | set(previous._versions)}
+        self._generation = previous.generation + 1
+
+    def append(self, city: str, disease: str, date: DateLike, count: Optional[int], step_days: int = 7):
+        """
+        Append one count dated `date` (None: no report). Points missing before it are stored as
+        NaN, not zero; dates already covered or off the series' step grid raise ValueError.
+        `step_days` only applies when this starts a new series.
+        """
+        with self._lock:
+            series = self.series(city, disease)
+            if series is None:
+                self.add_series(city, disease, [count], date, step_days)
+                return
+            offset = int((np.datetime64(date, "D") - series.start).astype(int))
+            index, misaligned = divmod(offset, series.step_days)
+            if misaligned:
+                raise ValueError(f"{date} is not on the {series.step_days}-day grid of {city}/{disease}")
+            if index < len(series):
+                raise ValueError(f"{date} is already covered for {city}/{disease} (series ends {series.end()})")
+            for _ in range(index - len(series)):
+                series.append(None)
+            series.append(count)
+            self._versions[city] = self._versions.get(city, 0) + 1
+            self._generation += 1
+
+    def cities(self) -> List[str]:
+        return list(self._series.keys())
+
+    def city_series(self, city: str) -> Dict[str, CaseSeries]:
+        return self._series.get(city, {})
+
+    def series(self, city: str, disease: str) -> Optional[CaseSeries]:
+        return self._series.get(city, {}).get(disease)
+
+    def window(
+        self,
+        city: str,
+        last_weeks: Optional[int] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Window views of every disease series for a city"""
+        return {
+            disease: series.window(last_weeks, start, end)
+            for disease, series in self.city_series(city).items()
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Dict[str, List[int]]], start: DateLike, step_days: int = 7
+    ) -> "CaseSeriesStore":
+        """Build a store from the city → disease → counts dicts used by data.py"""
+        store = cls()
+        for city, diseases in data.items():
+            for disease, cases in diseases.items():
+                store.add_series(city, disease, cases, start, step_days)
+        return store
+
+    def save(self, path: str):
+        """Write the store as <path>/index.json + <path>/values.npy"""
+        os.makedirs(path, exist_ok=True)
+        index, chunks, offset = [], [], 0
+        for city, diseases in self._series.items():
+            for disease, series in diseases.items():
+                index.append({
+                    "city": city,
+                    "disease": disease,
+                    "start": str(series.start),
+                    "step_days": series.step_days,
+                    "offset": offset,
+                    "length": len(series),
+                })
+                chunks.append(series.values)
+                offset += len(series)
+        values = np.concatenate(chunks) if chunks else np.zeros(0, dtype=VALUES_DTYPE)
+        # Write-then-rename: stores loaded from this path keep their memory maps valid
+        values_path = os.path.join(path, "values.npy")
+        np.save(values_path + ".tmp.npy", values.astype(VALUES_DTYPE, copy=False))
+        os.replace(values_path + ".tmp.npy", values_path)
+        index_path = os.path.join(path, "index.json")
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CaseSeriesStore":
+        """Load a saved store; series are read-only views into the memory-mapped values"""
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode="r" if mmap else None)
+        store = cls()
+        for entry in index:
+            series = CaseSeries(
+                values[entry["offset"]:entry["offset"] + entry["length"]], entry["start"], entry["step_days"]
+            )
+            store._series.setdefault(entry["city"], {})[entry["disease"]] = series
+        return store
+
+
+class TrendIndex:
+    """
+    (city, disease) → (trend direction, growth %) over a store
+    Entries are rebuilt per city when that city's data version changes, so lookups
+    are dict hits plus one version check instead of a series scan
+    """
+
+    def __init__(self, store: CaseSeriesStore):
+        self.store = store
+        # city → (data version, disease → (direction, change %), (rising, covered) disease sets)
+        self._cities: Dict[str, Tuple[int, Dict[str, Tuple[str, int]], Tuple[FrozenSet[str], FrozenSet[str]]]] = {}
+
+    def _city(self, city: str):
+        version = self.store.version(city)
+        entry = self._cities.get(city)
+        if entry is None or entry[0] != version:
+            trends = {
+                disease: (series.trend_direction(), series.change_pct())
+                for disease, series in self.store.city_series(city).items()
+            }
+            rising = frozenset(disease for disease, (direction, _) in trends.items() if direction == "↑")
+            entry = (version, trends, (rising, frozenset(trends)))
+            # Single assignment: concurrent readers see the old or the new entry, never a mix
+            self._cities[city] = entry
+        return entry
+
+    def lookup(self, city: str, disease: str) -> Optional[Tuple[str, int]]:
+        """(direction, change %) of a disease in a city, or None without data for the pair"""
+        return self._city(city)[1].get(disease)
+
+    def city_trends(self, city: str) -> Dict[str, Tuple[str, int]]:
+        return self._city(city)[1]
+
+    def signature(self, city: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """(rising diseases, diseases with data) for a city; equal signatures mean equal trend factors"""
+        return self._city(city)[2]
+
+
+# ==================== FEED INGESTION ====================
+def read_feed(path: str) -> Iterator[Dict]:
+    """
+    Stream case-count rows from a CSV (header: city,disease,date,cases) or JSONL feed
+    JSONL lines are objects with the same keys; an empty or null `cases` means no report
+    """
+    with open(path, newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def ingest(store: CaseSeriesStore, rows: Iterable[Dict], step_days: int = 7) -> int:
+    """Append feed rows to the store in order; returns the number of rows ingested"""
+    ingested = 0
+    for row in rows:
+        cases = row["cases"]
+        store.append(row["city"], row["disease"], row["date"], None if cases in (None, "") else int(cases), step_days)
+        ingested += 1
+    return ingested
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Append CSV/JSONL case-count feeds to a saved case store")
+    parser.add_argument("feeds", nargs="+", help="CSV (city,disease,date,cases) or JSONL feed files")
+    parser.add_argument("--store", required=True, help="Case store directory (created if missing)")
+    parser.add_argument("--step-days", type=int, default=7, help="Spacing of new series: 7 weekly, 1 daily")
+    args = parser.parse_args(argv)
+
+    store = CaseSeriesStore.load(args.store) if os.path.exists(os.path.join(args.store, "index.json")) else CaseSeriesStore()
+    for feed in args.feeds:
+        print(f"{feed}: {ingest(store, read_feed(feed), args.step_days)} rows")
+    store.save(args.store)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
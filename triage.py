@@ -0,0 +1,159 @@
+"""
+Batch triage of screening-camp CSV dumps
+Streams the input in chunks across a process pool and writes scored rows in input order;
+only a bounded window of chunks is in flight, so memory stays flat whatever the file size
+
+Input columns: name, age, city, symptoms (separated by ";"), bp_systolic, bp_diastolic, temperature
+(other columns are copied through). Output adds disease, confidence, risk_level, risk_score, error.
+
+Scores with the newest model file in --model-dir (HEALTHCARE_MODEL_DIR, default models/),
+else the built-in model.
+
+Usage:
+    python triage.py camp.csv scored.csv [--workers N] [--chunk-size 5000] [--model-dir models]
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from model_files import DEFAULT_MODEL_DIR, ModelWatcher, activate_model_file
+from prediction import analyze_patients_batch, get_active_model
+
+RESULT_FIELDS = ["disease", "confidence", "risk_level", "risk_score", "error"]
+VITAL_FIELDS = ("bp_systolic", "bp_diastolic", "temperature")
+
+Row = Dict[str, str]
+
+
+def parse_row(row: Row, separator: str = ";") -> Tuple[List[str], int, str, Optional[Dict[str, float]]]:
+    """(symptoms, age, city, vitals) from one CSV row; raises ValueError/OverflowError on bad age or vitals"""
+    symptoms = [s.strip() for s in (row.get("symptoms") or "").split(separator) if s.strip()]
+    age = int(float(row.get("age") or ""))
+    vitals = {}
+    for field in VITAL_FIELDS:
+        value = (row.get(field) or "").strip()
+        if value:
+            vitals[field] = float(value)
+    return symptoms, age, (row.get("city") or "").strip(), vitals or None
+
+
+def score_chunk(rows: Sequence[Row], separator: str = ";") -> List[Row]:
+    """Worker task: rows with the result columns filled in (or `error` for unparsable rows)"""
+    parsed, valid = [], []
+    scored = [dict(row) for row in rows]
+    for index, row in enumerate(scored):
+        try:
+            parsed.append(parse_row(row, separator))
+            valid.append(index)
+        except (ValueError, OverflowError) as e:
+            row.update({field: "" for field in RESULT_FIELDS}, error=str(e))
+
+    results = analyze_patients_batch(
+        [symptoms for symptoms, _, _, _ in parsed],
+        [age for _, age, _, _ in parsed],
+        [city for _, _, city, _ in parsed],
+        [vitals for _, _, _, vitals in parsed],
+    )
+    for index, (disease, confidence, risk_level, risk_score) in zip(valid, results):
+        scored[index].update(
+            disease=disease, confidence=confidence, risk_level=risk_level, risk_score=risk_score, error=""
+        )
+    return scored
+
+
+def read_chunks(reader: csv.DictReader, chunk_size: int) -> Iterator[List[Row]]:
+    while True:
+        chunk = list(itertools.islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def triage(
+    source: TextIO,
+    dest: TextIO,
+    workers: Optional[int] = None,
+    chunk_size: int = 5000,
+    separator: str = ";",
+    progress_every: float = 2.0,
+    model_path: Optional[str] = None,
+) -> int:
+    """
+    Score every row of the source CSV into dest; returns the number of rows written
+    Workers score with model_path when given, else with the model active in this process
+    """
+    workers = workers or os.cpu_count() or 1
+    window = 2 * workers
+    reader = csv.DictReader(source)
+    fields = list(reader.fieldnames or [])
+    writer = csv.DictWriter(
+        dest, fieldnames=fields + [f for f in RESULT_FIELDS if f not in fields], extrasaction="ignore"
+    )
+    writer.writeheader()
+
+    started = last_report = time.perf_counter()
+    written = 0
+
+    def write(chunk: List[Row]):
+        nonlocal written, last_report
+        writer.writerows(chunk)
+        written += len(chunk)
+        now = time.perf_counter()
+        if progress_every and now - last_report >= progress_every:
+            last_report = now
+            print(f"{written:,} rows ({written / (now - started):,.0f} rows/s)", file=sys.stderr, flush=True)
+
+    initializer, initargs = (activate_model_file, (model_path,)) if model_path else (None, ())
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in read_chunks(reader, chunk_size):
+            pending.append(pool.submit(score_chunk, chunk, separator))
+            if len(pending) >= window:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {written:,} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)",
+          file=sys.stderr)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score screening-camp CSV records with disease and risk predictions")
+    parser.add_argument("input", help="Input CSV ('-' for stdin)")
+    parser.add_argument("output", help="Output CSV ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per worker task")
+    parser.add_argument("--separator", default=";", help="Separator inside the symptoms column")
+    parser.add_argument("--model-dir", default=os.environ.get("HEALTHCARE_MODEL_DIR", DEFAULT_MODEL_DIR),
+                        help="Directory of weights-v<N>.json model files (default: built-in model if none)")
+    args = parser.parse_args(argv)
+
+    # A model file that fails to load is logged and the next newest one is used
+    model = ModelWatcher(args.model_dir).check()
+    active = get_active_model()
+    print(f"Scoring with model v{active.version} ({active.source})", file=sys.stderr)
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    dest = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        triage(source, dest, args.workers, args.chunk_size, args.separator,
+               model_path=model.source if model else None)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if dest is not sys.stdout:
+            dest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())